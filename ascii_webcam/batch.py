@@ -0,0 +1,331 @@
+"""
+17 October 2026
+
+`batch.py` This file converts directories of images to text, ANSI or HTML
+files, on a pool of worker processes. Every result is cached under the hash
+of the image's content and the converter settings (gradient, normalization,
+size, color...), so a rerun only converts the images that changed, and an
+interrupted run picks up where it stopped: results & outputs are written to a
+temporary file & swapped in, so a file is either complete or missing.
+
+The cache lives in the user's cache directory (see cache.py), one file per
+result, grouped in a directory per settings.
+
+Usage: python -m ascii_webcam.batch photos/ -o ascii/ --format html --width 120
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Literal, Union
+from ascii_webcam.cache import cache_dir
+from ascii_webcam.convert import AsciiImageConverter
+from ascii_webcam.gradients import PresetGradients
+from ascii_webcam.sources import IMAGE_EXTENSIONS
+
+BatchFormatsType = Literal["text", "ansi", "html"]
+BatchFormats = ["text", "ansi", "html"]
+
+FORMAT_EXTENSIONS = {"text": ".txt", "ansi": ".ans", "html": ".html"}
+
+# bump when the same settings would convert an image differently
+RESULT_VERSION = 1
+
+DEFAULT_CHUNK_SIZE = 8
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>ascii art</title>
+<style>body {{ background: #000; color: #fff; }} pre {{ font-family: monospace; line-height: 1; }}</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+# the converter, settings & cache of a worker process, created by _init_worker
+_worker: Union[dict, None] = None
+
+
+def settings_key(gradient: str, fmt: BatchFormatsType, color: bool, converter_kwargs: dict) -> str:
+    """ the hash of everything besides the image that decides a result """
+    settings = {
+        "version": RESULT_VERSION,
+        "gradient": gradient,
+        "glyphs": "".join(getattr(PresetGradients, gradient).glyphs),
+        "format": fmt,
+        "color": color,
+        "converter": converter_kwargs,
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def write_atomic(path: str, data: Union[str, bytes]) -> None:
+    """ write to a temporary file & swap, so readers never see a partial file """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data.encode() if isinstance(data, str) else data)
+    os.replace(temp_path, path)
+
+
+class ResultCache:
+    def __init__(self, settings: str, directory: Union[str, None] = None):
+        """
+        Initialize the ResultCache class.
+
+        :param settings: the settings_key the results were converted with
+        :param directory: where the results are stored (default: results in the user cache directory)
+        """
+        self.directory = os.path.join(directory or os.path.join(cache_dir(), "results"), settings)
+
+    def path(self, content: str) -> str:
+        """ the file of the result for an image, by the hash of its content """
+        return os.path.join(self.directory, content[:2], content)
+
+    def get(self, content: str) -> Union[str, None]:
+        """ the path of the cached result, or None if it was never converted """
+        path = self.path(content)
+        return path if os.path.exists(path) else None
+
+    def put(self, content: str, data: str) -> None:
+        try:
+            write_atomic(self.path(content), data)
+        except OSError:
+            # the cache is only an optimization, a read-only home is fine
+            pass
+
+
+def decode_image(data: bytes):
+    """ decode an encoded image (png, jpeg...) to rgb, None when it is not an image """
+    import cv2
+    import numpy as np
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+
+def render(converter: AsciiImageConverter, image, fmt: BatchFormatsType) -> str:
+    """ convert an rgb image & write it out in a batch format, the same for the same image """
+    frame = converter.convert_frame(image)
+    match fmt:
+        case "text":
+            return frame.to_text() + "\n"
+        case "ansi":
+            return frame.to_ansi(converter.terminal_encoder) + "\n"
+        case "html":
+            return HTML_TEMPLATE.format(body=frame.to_html())
+        case _:
+            raise ValueError(f"Invalid format: {fmt}")
+
+
+def find_images(directory: str, recursive: bool = True) -> list:
+    """ the image files in a directory, as paths relative to it, sorted """
+    found = []
+    for root, dirs, files in os.walk(directory):
+        if not recursive:
+            dirs.clear()
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(root, name), directory))
+    return found
+
+
+def _init_worker(gradient: str, fmt: BatchFormatsType, color: bool, converter_kwargs: dict, cache: Union[str, bool]) -> None:
+    global _worker
+    settings = settings_key(gradient, fmt, color, converter_kwargs)
+    _worker = {
+        "converter": AsciiImageConverter(getattr(PresetGradients, gradient), color=color, **converter_kwargs),
+        "format": fmt,
+        "cache": None if cache is False else ResultCache(settings, cache or None),
+    }
+
+
+def _convert_chunk(jobs: list) -> list:
+    """ convert a chunk of (source, output) paths, returns (source, status) per image """
+    converter, fmt, cache = _worker["converter"], _worker["format"], _worker["cache"]
+    results = []
+    for source, output in jobs:
+        try:
+            with open(source, "rb") as f:
+                data = f.read()
+            content = hashlib.sha1(data).hexdigest()
+
+            cached = None if cache is None else cache.get(content)
+            if cached is not None:
+                temp_path = f"{output}.{os.getpid()}.tmp"
+                os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+                shutil.copyfile(cached, temp_path)
+                os.replace(temp_path, output)
+                results.append((source, "hit"))
+                continue
+
+            image = decode_image(data)
+            if image is None:
+                results.append((source, "error"))
+                continue
+            text = render(converter, image, fmt)
+            if cache is not None:
+                cache.put(content, text)
+            write_atomic(output, text)
+            results.append((source, "miss"))
+        except Exception:
+            # one broken image (unreadable, or that fails to convert) must not lose the rest of the chunk
+            results.append((source, "error"))
+    return results
+
+
+def convert_directory_files(directory: str, output: str, fmt: BatchFormatsType = "text", **kwargs) -> Iterator[tuple]:
+    """
+    Convert every image of a directory, yielding the results as they complete.
+
+    :param directory: the directory of images
+    :param output: the directory to write to, mirroring the layout of directory
+    :param fmt: text, ansi or html
+    :param gradient: the name of the PresetGradients entry to use
+    :param color: encode colors (default: for ansi & html)
+    :param recursive: include subdirectories (default: True)
+    :param cache: the cache directory, or False to disable the cache (default: the user cache directory)
+    :param workers: the number of worker processes (default: cpu count)
+    :param chunk_size: the number of images sent to a worker at once
+    :param stats: a dict that is updated with images, total_images, hits, misses, errors, images_per_second & seconds
+    :param converter_kwargs: passed on to each worker's AsciiImageConverter
+    :return: (source path, hit, miss or error) for every image
+    """
+    if fmt not in BatchFormats:
+        raise ValueError(f"Invalid format: {fmt}")
+    gradient = kwargs.get("gradient", "ASCII")
+    color = kwargs.get("color", fmt != "text")
+    workers = kwargs.get("workers", None) or os.cpu_count() or 1
+    chunk_size = kwargs.get("chunk_size", DEFAULT_CHUNK_SIZE)
+    max_pending = 2 * workers
+
+    # photos should not be mirrored like a camera preview
+    converter_kwargs = {"mirror": False, **kwargs.get("converter_kwargs", {})}
+
+    extension = FORMAT_EXTENSIONS[fmt]
+    jobs = [(os.path.join(directory, path), os.path.join(output, os.path.splitext(path)[0] + extension))
+            for path in find_images(directory, kwargs.get("recursive", True))]
+
+    stats = kwargs.get("stats", {})
+    stats.update(images=0, total_images=len(jobs), hits=0, misses=0, errors=0,
+                 images_per_second=0.0, hit_rate=0.0, seconds=0.0)
+
+    start = time.perf_counter()
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(gradient, fmt, color, converter_kwargs, kwargs.get("cache", None))
+    ) as pool:
+        for i in range(0, len(jobs), chunk_size):
+            pending.append(pool.submit(_convert_chunk, jobs[i:i + chunk_size]))
+
+            # block on the oldest chunk, so memory stays bounded
+            while len(pending) >= max_pending:
+                yield from _collect(pending.popleft(), stats, start)
+
+        while pending:
+            yield from _collect(pending.popleft(), stats, start)
+
+
+def _collect(future, stats: dict, start: float) -> Iterator[tuple]:
+    for source, status in future.result():
+        stats["images"] += 1
+        stats[{"hit": "hits", "miss": "misses", "error": "errors"}[status]] += 1
+        stats["seconds"] = time.perf_counter() - start
+        stats["images_per_second"] = stats["images"] / stats["seconds"]
+        stats["hit_rate"] = stats["hits"] / stats["images"]
+        yield source, status
+
+
+def convert_directory(directory: str, output: str, fmt: BatchFormatsType = "text", **kwargs) -> dict:
+    """
+    Convert every image of a directory.
+
+    :param progress: report progress, throughput & the cache hit rate to stderr (default: False)
+    :param kwargs: passed on to convert_directory_files
+    :return: the conversion stats
+    """
+    stats = kwargs.pop("stats", {})
+    progress = kwargs.pop("progress", False)
+
+    last_report = 0.0
+    for source, status in convert_directory_files(directory, output, fmt, stats=stats, **kwargs):
+        if status == "error":
+            # below the progress line, if there is one
+            prefix = "\n" if last_report else ""
+            print(f"{prefix}could not convert {source}", file=sys.stderr)
+
+        # report at most twice a second
+        if progress and stats["seconds"] - last_report >= 0.5:
+            last_report = stats["seconds"]
+            print(f"\r{stats['images']}/{stats['total_images']} images, "
+                  f"{stats['images_per_second']:.1f} images/s, "
+                  f"{100 * stats['hit_rate']:.0f}% cached", end="", file=sys.stderr)
+
+    if progress:
+        print(file=sys.stderr)
+    return stats
+
+
+def main(argv: Union[list, None] = None) -> None:
+    from ascii_webcam.normalize import NormalizationModes
+    from ascii_webcam.terminal import ColorModes
+
+    parser = argparse.ArgumentParser(description="Convert a directory of images to ascii art")
+    parser.add_argument("input", help="the directory of images to convert")
+    parser.add_argument("-o", "--output", required=True, help="the directory to write to")
+    parser.add_argument("-f", "--format", choices=BatchFormats, default="text")
+    parser.add_argument("-g", "--gradient", choices=PresetGradients.names(), default="ASCII")
+    parser.add_argument("-n", "--normalization", choices=NormalizationModes, default="luminance")
+    parser.add_argument("-c", "--color-mode", choices=ColorModes, default="truecolor")
+    parser.add_argument("--width", type=int, default=100, help="the number of columns")
+    parser.add_argument("--height", type=int, help="the number of rows (default: keep aspect ratio)")
+    parser.add_argument("--no-recursive", action="store_true", help="skip subdirectories")
+    parser.add_argument("--cache-dir", help="where to cache results (default: the user cache directory)")
+    parser.add_argument("--no-cache", action="store_true", help="convert every image again")
+    parser.add_argument("-w", "--workers", type=int, help="worker processes (default: cpu count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input):
+        parser.error(f"not a directory: {args.input}")
+
+    # image_size is passed straight to image_resize as (width, height)
+    image_size = (None, args.width) if args.height is None else (args.width, args.height)
+
+    stats = convert_directory(
+        args.input, args.output, args.format,
+        gradient=args.gradient,
+        recursive=not args.no_recursive,
+        cache=False if args.no_cache else args.cache_dir,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        progress=True,
+        converter_kwargs={
+            "image_size": image_size,
+            "normalization": args.normalization,
+            "color_mode": args.color_mode,
+        }
+    )
+    print(f"converted {stats['images']} images in {stats['seconds']:.2f}s "
+          f"({stats['images_per_second']:.1f} images/s, {100 * stats['hit_rate']:.0f}% cached, "
+          f"{stats['errors']} errors)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+17 October 2026
+
+`cache.py` This file contains the GlyphIntensityCache class. Computing the
+intensity of a glyph means rasterizing it with PIL, which adds up quickly for
+large palettes and TrueType fonts. This cache keeps the computed intensities
+in a small binary file in the user's cache directory, so that building the
+same gradient again (even in another process) does not rasterize anything.
+
+Entries are keyed by the hash of the font file, the font size, the glyph and
+the method used to measure it. The file is versioned, and the least recently
+used entries are evicted once the cache grows past its size limit.
+"""
+
+import os
+import struct
+import hashlib
+from typing import Union
+
+CACHE_VERSION = 1
+CACHE_MAGIC = b"AWGC"
+CACHE_FILENAME = "glyph_intensities.bin"
+MAX_ENTRIES = 65536
+
+# header: magic, version, entry count
+HEADER = struct.Struct("<4sHI")
+# entry: key length, intensity, last used
+ENTRY = struct.Struct("<HdQ")
+
+
+def cache_dir() -> str:
+    """ the directory used for ascii_webcam's cache files """
+    if os.environ.get("ASCII_WEBCAM_CACHE_DIR"):
+        return os.environ["ASCII_WEBCAM_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ascii_webcam")
+
+
+class GlyphIntensityCache:
+    # font path -> (mtime, size, digest), so each font is only hashed once
+    _font_hashes: dict = {}
+
+    def __init__(self, path: Union[str, None] = None, max_entries: int = MAX_ENTRIES):
+        """
+        Initialize the GlyphIntensityCache class.
+
+        :param path: the cache file (default: glyph_intensities.bin in the user cache directory)
+        :param max_entries: evict the least recently used entries past this many entries
+        """
+        self.path = path or os.path.join(cache_dir(), CACHE_FILENAME)
+        self.max_entries = max_entries
+
+        # key -> [intensity, last used]
+        self.entries: Union[dict, None] = None
+        self.clock = 0
+        self.dirty = False
+
+    def get(self, font: str, size: int, method: str, glyph: str) -> Union[float, None]:
+        """ the cached intensity of a glyph, or None if it was never computed """
+        self._load()
+        entry = self.entries.get(self._key(font, size, method, glyph))
+        if entry is None:
+            return None
+
+        # recency is only written out with the next change to the cache
+        self.clock += 1
+        entry[1] = self.clock
+        return entry[0]
+
+    def put(self, font: str, size: int, method: str, glyph: str, intensity: float) -> None:
+        """ store the intensity of a glyph, call save() to write it to disk """
+        self._load()
+        self.clock += 1
+        self.entries[self._key(font, size, method, glyph)] = [float(intensity), self.clock]
+        self.dirty = True
+
+    def save(self) -> None:
+        """ write the cache file, if anything changed """
+        if not self.dirty or self.entries is None:
+            return
+
+        # other processes may have written entries since the file was loaded,
+        # keep theirs too (the more recently used one, when both have a glyph)
+        disk, clock = self._read()
+        for key, entry in disk.items():
+            ours = self.entries.get(key)
+            if ours is None or entry[1] > ours[1]:
+                self.entries[key] = entry
+        self.clock = max(self.clock, clock)
+
+        # evict the least recently used entries
+        if len(self.entries) > self.max_entries:
+            newest = sorted(self.entries.items(), key=lambda kv: kv[1][1])
+            self.entries = dict(newest[-self.max_entries:])
+
+        chunks = [HEADER.pack(CACHE_MAGIC, CACHE_VERSION, len(self.entries))]
+        for key, (intensity, last_used) in self.entries.items():
+            encoded = key.encode()
+            chunks.append(ENTRY.pack(len(encoded), intensity, last_used))
+            chunks.append(encoded)
+
+        # write to a temporary file & swap, so readers never see a partial file
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(b"".join(chunks))
+            os.replace(temp_path, self.path)
+        except OSError:
+            # the cache is only an optimization, a read-only home is fine
+            return
+        self.dirty = False
+
+    def clear(self) -> None:
+        """ remove every entry, and the cache file """
+        self.entries = {}
+        self.clock = 0
+        self.dirty = False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _load(self) -> None:
+        if self.entries is not None:
+            return
+        self.entries, self.clock = self._read()
+
+    def _read(self) -> tuple[dict, int]:
+        """ the entries of the cache file & the newest last used, empty if there is no valid file """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return {}, 0
+
+        entries, clock = {}, 0
+        try:
+            magic, version, count = HEADER.unpack_from(data, 0)
+            if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                return {}, 0
+
+            offset = HEADER.size
+            for _ in range(count):
+                key_length, intensity, last_used = ENTRY.unpack_from(data, offset)
+                offset += ENTRY.size
+                key = data[offset:offset + key_length].decode()
+                offset += key_length
+                entries[key] = [intensity, last_used]
+                clock = max(clock, last_used)
+        except (struct.error, UnicodeDecodeError):
+            # a truncated or corrupt file, start over
+            return {}, 0
+        return entries, clock
+
+    @staticmethod
+    def _key(font: str, size: int, method: str, glyph: str) -> str:
+        return f"{font}\0{size}\0{method}\0{glyph}"
+
+    @classmethod
+    def font_key(cls, font_path: Union[str, None]) -> str:
+        """ identify a font by the hash of its file (or PIL's version for the default font) """
+        if font_path is None:
+            from PIL import __version__ as pil_version
+            return f"default-pil-{pil_version}"
+
+        stat = os.stat(font_path)
+        cached = cls._font_hashes.get(font_path)
+        if cached is None or cached[:2] != (stat.st_mtime, stat.st_size):
+            with open(font_path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+            cached = (stat.st_mtime, stat.st_size, digest)
+            cls._font_hashes[font_path] = cached
+        return cached[2]
+
+
+_default_cache: Union[GlyphIntensityCache, None] = None
+
+
+def default_cache() -> GlyphIntensityCache:
+    """ the cache shared by every AsciiGradient in this process """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = GlyphIntensityCache()
+    return _default_cache
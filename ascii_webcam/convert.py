@@ -9,14 +9,20 @@ ImageNormalization class to normalize an image before converting it to Ascii.
 """
 
 import os
-import cv2
 import numpy as np
-from colored import Fore, Style
-from ascii_webcam.gradients import AsciiGradient
+from typing import Union
+from ascii_webcam.dither import Dither, glyph_values
+from ascii_webcam.frame import AsciiFrame
+from ascii_webcam.gradients import AsciiGradient, LUT_SIZE, FEATURE_GRID
 from ascii_webcam.normalize import ImageNormalization, image_resize
+from ascii_webcam.telemetry import Telemetry
+from ascii_webcam.terminal import TerminalEncoder
+from ascii_webcam.tone import Tone
 
 DEFAULT_OUTPUT_WIDTH = 100
 
+MatchingModes = ["intensity", "shape"]
+
 
 class AsciiImageConverter:
     def __init__(self, gradient: AsciiGradient, color: bool = False, **kwargs):
@@ -28,6 +34,30 @@ class AsciiImageConverter:
         :param image_size: (height, width) of the desired output image. Input None for automatic sizing.
         :param use_terminal: <terminal only> use the smallest terminal dimensions?
         :param normalization: the normalization to use when converting an image to ascii
+        :param lut_size: the number of entries in the intensity -> glyph lookup table
+        :param color_mode: <terminal only> truecolor, 256 or 16 color escapes
+        :param color_metric: <terminal only> rgb, redmean or cielab, how 256 & 16 colors are picked
+        :param mirror: flip the output horizontally, like a camera preview (default: True)
+        :param x_major: the images are indexed (x, y), like pygame.surfarray (default: False)
+        :param matching: how cells are matched to glyphs
+            -- Matching must be one of the following --
+            intensity: by the mean intensity of the cell (default)
+            shape: by grid x grid sub-cell intensities, keeps edges sharp
+        :param feature_grid: the number of sub-cells along each side of a cell, for shape matching
+        :param incremental: only recompute the tiles that changed since the last frame (default: False)
+        :param tile_size: <incremental only> the size of a tile, in cells (default: 4)
+        :param change_threshold: <incremental only> intensity change (0 - 255) that marks a tile dirty
+        :param color_threshold: <incremental only> color change (0 - 255, any channel) that marks a tile dirty
+        :param release: <incremental only> a dirty tile stays dirty until its change drops
+            below this fraction of the thresholds (hysteresis, default: 0.5)
+        :param dither: none, bayer, blue-noise or diffusion, applied before the glyph
+            lookup to break up banding with short palettes (intensity matching only)
+        :param dither_strength: the amplitude of the dithering, in glyph steps (default: 1.0)
+        :param invert: invert the colors & intensities (default: False)
+        :param grayscale: make the colors gray (default: False)
+        :param gamma: brighten (> 1) or darken (< 1) the midtones (default: 1.0)
+        :param contrast: stretch (> 1) or flatten (< 1) around the middle gray (default: 1.0)
+        :param telemetry: a Telemetry to record the normalize & map timings in (default: disabled)
         """
         self.gradient = gradient
         self.color = color
@@ -42,17 +72,347 @@ class AsciiImageConverter:
                 self.image_size = (None, term_size.columns)
 
         self.normalization_method = kwargs.get("normalization", "luminance")
+        self._normalization: Union[ImageNormalization, None] = None
+        self.lut_size = kwargs.get("lut_size", LUT_SIZE)
+        self.terminal_encoder = TerminalEncoder(
+            kwargs.get("color_mode", "truecolor"), kwargs.get("color_metric", "rgb"))
+        self.mirror = kwargs.get("mirror", True)
+        self.x_major = kwargs.get("x_major", False)
+
+        self.matching = kwargs.get("matching", "intensity")
+        if self.matching not in MatchingModes:
+            raise ValueError(f"Invalid matching: {self.matching}")
+        self.feature_grid = kwargs.get("feature_grid", FEATURE_GRID)
+
+        # temporal change detection
+        self.incremental = kwargs.get("incremental", False)
+        self.tile_size = kwargs.get("tile_size", 4)
+        self.change_threshold = kwargs.get("change_threshold", 8.0)
+        self.color_threshold = kwargs.get("color_threshold", 16.0)
+        self.release = kwargs.get("release", 0.5)
+        self.reset_incremental()
+
+        self.dither = Dither(kwargs.get("dither", "none"), kwargs.get("dither_strength", 1.0))
+        if self.incremental and self.dither.mode == "diffusion":
+            # the error of every cell depends on every cell before it
+            raise ValueError("Invalid dither for incremental mode: diffusion")
+        self._glyph_values = (None, None)
+
+        # applied after downsampling, the intensities through the lookup table
+        self.tone = Tone(
+            invert=kwargs.get("invert", False),
+            grayscale=kwargs.get("grayscale", False),
+            gamma=kwargs.get("gamma", 1.0),
+            contrast=kwargs.get("contrast", 1.0)
+        )
+        self._lookup_table = (None, None)
+
+        self.telemetry = kwargs.get("telemetry") or Telemetry()
+
+    def reset_incremental(self) -> None:
+        """ forget the previous frame, the next frame is recomputed in full """
+        self._previous = None
+        self._signature_basis = None
+
+        # which cells were recomputed for the last frame (output orientation)
+        self.dirty_mask: Union[np.ndarray, None] = None
+
+    @property
+    def mirror_axis(self) -> int:
+        """ the horizontal axis of the images """
+        return 0 if self.x_major else 1
+
+    @property
+    def normalization(self) -> ImageNormalization:
+        """ the ImageNormalization, rebuilt only when the method or image size changes """
+        conv = self._normalization
+        if conv is None or conv.mode != self.normalization_method or conv.image_size != self.image_size:
+            conv = self._normalization = ImageNormalization(
+                self.normalization_method, self.image_size)
+        return conv
 
     def normalize_image(self, input_image: np.ndarray) -> np.ndarray:
         """ normalize an image, using the norm method passed """
-        conv = ImageNormalization(self.normalization_method, self.image_size)
-        return conv.normalize(input_image)
+        return self.normalization.normalize(input_image)
 
     """
     Now, we will define our main function that will
     convert an image to ascii.
     """
 
+    def convert_frame(self, image: np.ndarray) -> AsciiFrame:
+        """
+        Vectorized version of `convert_image`. Instead of an object array, this
+        returns an AsciiFrame: the gradient's glyphs, the index of each cell's glyph
+        and (if AsciiImageConverter was passed color) the uint8 rgb of each cell.
+
+        :param image: the image to convert to ascii
+        :return: the converted image, indexed (row, column) even for x_major images
+        """
+        return self.map_frame(*self.downsample_image(image))
+
+    def convert_frames(self, images: Union[list, np.ndarray]) -> list[AsciiFrame]:
+        """
+        Batched version of `convert_frame`, for many streams (e.g. cameras) at once.
+        Frames that shrink to the same grid are stacked & normalized, toned and
+        mapped together, so the NumPy calls are made once per grid size instead of
+        once per frame.
+
+        :param images: an (n, height, width, 3) array, or a list of frames of any size
+        :return: one converted frame per image, in order
+        """
+        if self.incremental:
+            # the previous frame of which stream?
+            raise ValueError("Invalid mode for batches: incremental")
+
+        grid = self.feature_grid if self.matching == "shape" else None
+        with self.telemetry.stage("normalize"):
+            groups = self.normalization.downsample_batch(images, grid)
+
+        frames = [None] * len(images)
+        with self.telemetry.stage("map"):
+            for positions, intensities, colors in groups:
+                colors = self.tone.apply_colors(colors) if self.color else None
+                if grid is not None and not self.tone.identity:
+                    intensities = self.tone.curve(intensities)
+                if self.dither.ordered and grid is None:
+                    intensities = self.dither.apply(intensities, len(self.gradient.glyphs))
+
+                if grid is not None:
+                    indices = self._map_cells(intensities)
+                elif self.dither.mode == "diffusion":
+                    # the error runs down the rows of each frame
+                    indices = np.stack([self._diffuse(cells) for cells in intensities])
+                else:
+                    indices = self.map_intensities(intensities)
+
+                if self.mirror:
+                    indices = np.flip(indices, axis=self.mirror_axis + 1)
+                    colors = None if colors is None else np.flip(colors, axis=self.mirror_axis + 1)
+
+                for i, position in enumerate(positions):
+                    frames[position] = AsciiFrame(
+                        self.gradient.glyphs, indices[i], None if colors is None else colors[i], x_major=self.x_major)
+        return frames
+
+    def convert_image_tiled(self, source: Union[str, np.ndarray], **kwargs) -> AsciiFrame:
+        """
+        Like `convert_frame`, for images too large to hold in memory. The image is
+        read in strips, and every strip is downsampled straight into its rows of the
+        output, so the peak memory depends on the strip size, not the image size.
+
+        :param source: a .npy file, a raw file (with raw_shape), an encoded image
+            (decoded at a reduced resolution if possible) or an array, e.g. a memory map
+        :param strip_rows: the number of source rows read per strip (default: 512)
+        :param workers: the number of threads downsampling strips (default: 1)
+        :param raw_shape: the (height, width, channels) of a raw file
+        :param raw_dtype: the dtype of a raw file (default: uint8)
+        :return: the converted image
+        """
+        from ascii_webcam.tiled import DEFAULT_STRIP_ROWS, downsample_strips, open_image, output_dimensions
+
+        grid = self.feature_grid if self.matching == "shape" else None
+        with self.telemetry.stage("normalize"):
+            if isinstance(source, str):
+                source = open_image(source, self.image_size, grid or 1, **kwargs)
+            pixels = downsample_strips(
+                source, output_dimensions(source.shape, self.image_size, grid or 1),
+                kwargs.get("strip_rows", DEFAULT_STRIP_ROWS), kwargs.get("workers"))
+            intensities, colors = self.normalization.split_cells(pixels, grid)
+        return self.map_frame(intensities, colors if self.color else None)
+
+    def map_frame(self, intensities: np.ndarray, colors: Union[np.ndarray, None]) -> AsciiFrame:
+        """ `map_image`, wrapped in an AsciiFrame """
+        return AsciiFrame(self.gradient.glyphs, *self.map_image(intensities, colors), x_major=self.x_major)
+
+    def convert_image_compact(self, image: np.ndarray) -> tuple[np.ndarray, Union[np.ndarray, None]]:
+        """
+        The planes of `convert_frame`, in the orientation of the image: the index
+        of each cell's glyph in `self.gradient.glyphs`, and (if AsciiImageConverter
+        was passed color) the uint8 rgb of each cell.
+
+        :param image: the image to convert to ascii
+        :return: glyph indices (height, width), colors (height, width, 3) or None
+        """
+        return self.map_image(*self.downsample_image(image))
+
+    def downsample_image(self, image: np.ndarray) -> tuple[np.ndarray, Union[np.ndarray, None]]:
+        """
+        The first half of `convert_image_compact`, shrink the image to the output size.
+
+        :param image: the image to convert to ascii
+        :return: intensities (height, width), colors (height, width, 3) or None.
+            For shape matching the intensities are sub-cell features (height, width, grid, grid)
+        """
+        with self.telemetry.stage("normalize"):
+            if self.matching == "shape":
+                features, colors = self.normalization.downsample_features(
+                    image, self.feature_grid)
+                return features, colors if self.color else None
+
+            if not self.color:
+                return self.normalize_image(image), None
+
+            # one resize for both the intensities & the colors
+            return self.normalization.downsample(image)
+
+    def map_image(self, intensities: np.ndarray, colors: Union[np.ndarray, None]) -> tuple[np.ndarray, Union[np.ndarray, None]]:
+        """
+        The second half of `convert_image_compact`, map downsampled intensities to glyphs.
+
+        :param intensities: the output of `downsample_image`
+        :param colors: the output of `downsample_image`
+        :return: glyph indices (height, width), colors (height, width, 3) or None
+        """
+        with self.telemetry.stage("map"):
+            colors = self.tone.apply_colors(colors)
+
+            # intensities get the tone curve through the lookup table, features directly
+            if intensities.ndim >= 3 and not self.tone.identity:
+                intensities = self.tone.curve(intensities)
+
+            # the threshold matrix depends on the position, add it to the whole frame
+            if self.dither.ordered and intensities.ndim == 2:
+                intensities = self.dither.apply(intensities, len(self.gradient.glyphs))
+
+            if self.incremental:
+                indices, colors = self._map_incremental(intensities, colors)
+            else:
+                indices = self._map_cells(intensities)
+
+            # flip around the horizontal axis to fix mirroring effect by camera
+            if self.mirror:
+                indices = np.flip(indices, axis=self.mirror_axis)
+                if colors is not None:
+                    colors = np.flip(colors, axis=self.mirror_axis)
+                if self.dirty_mask is not None:
+                    self.dirty_mask = np.flip(self.dirty_mask, axis=self.mirror_axis)
+            return indices, colors
+
+    def _map_cells(self, intensities: np.ndarray) -> np.ndarray:
+        # sub-cell features (..., grid, grid) are matched by shape, a masked
+        # selection of cells is flattened to (cells, grid, grid)
+        if intensities.ndim >= 3:
+            return self.gradient.match_features(
+                intensities, x_major=self.x_major, mirror=self.mirror)
+        if self.dither.mode == "diffusion" and intensities.ndim == 2:
+            return self._diffuse(intensities)
+        return self.map_intensities(intensities)
+
+    def _diffuse(self, intensities: np.ndarray) -> np.ndarray:
+        table = self.lookup_table()
+        key, values = self._glyph_values
+        if key is not table:
+            values = glyph_values(table, len(self.gradient.glyphs))
+            self._glyph_values = (table, values)
+        return self.dither.diffuse(intensities, table, values)
+
+    def _map_incremental(self, intensities: np.ndarray, colors: Union[np.ndarray, None]) -> tuple:
+        """
+        Map only the tiles that changed since they were last computed. Every cell
+        keeps the signature & color it was last computed with, a tile is dirty when
+        any of its cells moved past a threshold from those, and stays dirty (is
+        recomputed every frame) until the change drops below the release level.
+        """
+        shape = intensities.shape[:2]
+        signature = self._signature(intensities)
+        key = (self.gradient, self.matching, self.lut_size, self.tone.key, intensities.shape, colors is None)
+        previous = self._previous
+        if previous is None or previous["key"] != key:
+            # nothing to compare against, compute everything
+            previous = self._previous = {
+                "key": key,
+                "signature": signature,
+                "colors": None if colors is None else colors.copy(),
+                "indices": self._map_cells(intensities),
+                "tiles": np.ones(self._tile_shape(shape), dtype=bool),
+            }
+            self.dirty_mask = np.ones(shape, dtype=bool)
+            return previous["indices"].copy(), None if colors is None else colors.copy()
+
+        import cv2
+
+        # the largest change of every tile, relative to its threshold
+        change = cv2.absdiff(signature, previous["signature"])
+        change = self._tile_max(change) * np.float32(1 / self.change_threshold)
+        if colors is not None:
+            color_change = self._tile_max(cv2.absdiff(colors, previous["colors"]))
+            change = np.maximum(change, color_change * np.float32(1 / self.color_threshold))
+
+        # hysteresis, dirty tiles are released at a lower threshold
+        tiles = (change > 1) | (previous["tiles"] & (change > self.release))
+        previous["tiles"] = tiles
+
+        t = self.tile_size
+        cells = np.broadcast_to(tiles[:, None, :, None], (tiles.shape[0], t, tiles.shape[1], t))
+        cells = cells.reshape(tiles.shape[0] * t, -1)[:shape[0], :shape[1]]
+        self.dirty_mask = cells
+
+        if tiles.any():
+            previous["signature"][cells] = signature[cells]
+            previous["indices"][cells] = self._map_cells(intensities[cells])
+            if colors is not None:
+                previous["colors"][cells] = colors[cells]
+
+        # the previous arrays are updated in place next frame, hand out copies
+        colors = None if colors is None else previous["colors"].copy()
+        return previous["indices"].copy(), colors
+
+    def _signature(self, intensities: np.ndarray) -> np.ndarray:
+        """
+        What change detection compares for every cell, (rows, cols, k) float32. That is
+        the intensity, and for sub-cell features also the horizontal & vertical gradient
+        (a few projections are much cheaper to compare than every sub-cell)
+        """
+        if intensities.ndim == 2:
+            return intensities.astype(np.float32, copy=False)[..., None]
+
+        grid = intensities.shape[-1]
+        if self._signature_basis is None or self._signature_basis.shape[0] != grid * grid:
+            ys, xs = np.mgrid[0:grid, 0:grid].astype(np.float32) - (grid - 1) / 2
+            basis = [np.ones((grid, grid), dtype=np.float32)]
+            for axis in (xs, ys):
+                basis.append(axis / max(np.abs(axis).sum(), 1))
+            basis[0] /= grid * grid
+            self._signature_basis = np.stack([b.ravel() for b in basis], axis=1)
+
+        flat = intensities.reshape(-1, grid * grid).astype(np.float32, copy=False)
+        return (flat @ self._signature_basis).reshape(*intensities.shape[:2], -1)
+
+    def _tile_shape(self, shape: tuple) -> tuple[int, int]:
+        return -(-shape[0] // self.tile_size), -(-shape[1] // self.tile_size)
+
+    def _tile_max(self, values: np.ndarray) -> np.ndarray:
+        """ the max of every tile_size x tile_size tile, over every channel (rows, cols, k) """
+        import cv2
+        t, k = self.tile_size, values[0, 0].size
+
+        # channels are folded into the columns, so one dilation takes the max of both
+        flat = values.reshape(values.shape[0], -1)
+        kernel = np.ones((t, t * k), dtype=np.uint8)
+        return cv2.dilate(flat, kernel, anchor=(0, 0), borderType=cv2.BORDER_REPLICATE)[::t, ::t * k]
+
+    def lookup_table(self) -> np.ndarray:
+        """ the gradient's intensity -> glyph lookup table, with the tone curve folded in """
+        key = (self.gradient, self.lut_size, self.tone.key)
+        cached_key, table = self._lookup_table
+        if cached_key != key:
+            table = self.tone.fold(self.gradient, self.lut_size)
+            self._lookup_table = (key, table)
+        return table
+
+    def map_intensities(self, intensities: np.ndarray) -> np.ndarray:
+        """ map normalized intensities (0 - 255) to glyph indices through the lookup table """
+        table = self.lookup_table()
+        scale = (len(table) - 1) / 255
+        return table[(np.clip(intensities, 0, 255) * scale).astype(np.intp)]
+
+    def sample_colors(self, image: np.ndarray) -> np.ndarray:
+        """ resize the original image to the output size to sample colors from """
+        resized_image = image_resize(
+            image, width=self.image_size[0], height=self.image_size[1])
+        return np.clip(resized_image[..., :3], 0, 255).astype(np.uint8)
+
     def convert_image(self, image: np.ndarray, to_ascii: bool = True) -> np.ndarray:
         """
         This is the main function that converts an image to ascii. Returns an image
@@ -60,55 +420,57 @@ class AsciiImageConverter:
         the shape (char, r, g, b). If there was no color passed, each pixel will have
         the shape (char, ).
 
+        This is a compatibility view over `convert_frame`, prefer that
+        function when the per-cell python objects are not needed.
+
         :param image: the image to convert to ascii
         :param to_ascii: should we convert the image to ascii? Default's true. If false,
             we will return intensities instead of characters.
         :return: the converted image (height, width, 1), or (height, width, 4)
-        :return:
         """
-        clean_image = self.normalize_image(image)
-        return_shape = (*clean_image.shape, 4 if self.color else 1)
-        new_image = np.empty(return_shape, dtype=object)
+        if to_ascii:
+            # in the orientation of the image, like before AsciiFrame
+            return AsciiFrame(self.gradient.glyphs, *self.convert_image_compact(image)).to_object_array()
 
-        # we will need to resize our original image to sample colors from
-        resized_image = image_resize(
-            image, width=self.image_size[0], height=self.image_size[1])
+        cells, colors = self.downsample_image(image)
+        if cells.ndim == 4:
+            cells = cells.mean(axis=(2, 3))
+        if not self.tone.identity:
+            cells = self.tone.curve(cells)
+        colors = self.tone.apply_colors(colors)
+        if self.mirror:
+            cells = np.flip(cells, axis=self.mirror_axis)
+            colors = None if colors is None else np.flip(colors, axis=self.mirror_axis)
+        return self.to_object_array(cells, colors)
 
-        for idx in np.ndindex(clean_image.shape[:2]):
-            pixel = clean_image[idx]
-            intensity = float(pixel)
-
-            # get the closest character match in first index, then
-            # return rgb values in the next three indices
-            new_image[idx] = [
-                # find closest match in the gradient
-                self.gradient.closest_match(
-                    intensity,
-                    return_intensity=not to_ascii
-                ),
-                *(resized_image[idx] if self.color else []),
-            ]
-
-        # flip around axis=0 to fix mirroring effect by camera
-        new_image = np.flip(new_image, axis=1)
+    @staticmethod
+    def to_object_array(cells: np.ndarray, colors: Union[np.ndarray, None]) -> np.ndarray:
+        """ build the (char, r, g, b) object array returned by `convert_image` """
+        return_shape = (*cells.shape, 1 if colors is None else 4)
+        new_image = np.empty(return_shape, dtype=object)
+        new_image[..., 0] = cells
+        if colors is not None:
+            new_image[..., 1:] = colors
         return new_image
 
     def convert_image_to_terminal(self, image: np.ndarray) -> str:
         """ convert an image to ascii for the terminal """
-        converted_image = self.convert_image(image)
+        return self.convert_frame(image).to_ansi(self.terminal_encoder)
 
-        def wrap_pixel(child, pixel: list):
-            if not self.color:
-                return child
-            return Fore.RGB(*pixel) + child + Style.RESET
+    def convert_image_from_path(self, path: str, to_terminal: bool = False, **kwargs):
+        """
+        convert an image from a path to ascii
 
-        return "\n".join([
-            "".join(wrap_pixel(char, pixel) for char, *pixel in row)
-            for row in converted_image
-        ])
+        :param tiled: read the image in strips (see `convert_image_tiled`), for images
+            too large to hold in memory. tiled_kwargs are passed on to it
+        """
+        if kwargs.pop("tiled", False):
+            frame = self.convert_image_tiled(path, **kwargs.pop("tiled_kwargs", {}))
+            if to_terminal:
+                return frame.to_ansi(self.terminal_encoder)
+            return frame.to_object_array()
 
-    def convert_image_from_path(self, path: str, to_terminal: bool = False, **kwargs):
-        """ convert an image from a path to ascii """
+        import cv2
         image = cv2.imread(path, cv2.IMREAD_COLOR)
         if image is None:
             raise IOError(f"Could not read image from path: {path}")
@@ -0,0 +1,202 @@
+"""
+17 October 2026
+
+`dither.py` This file contains the dithering used between normalization and
+the glyph lookup. Short palettes (BLOCKS has 5 glyphs) band heavily when
+every intensity is simply rounded to the closest glyph, dithering trades
+that banding for a fine pattern.
+
+Ordered dithering (Bayer or blue noise) adds a tiled threshold matrix to the
+whole normalized frame in one NumPy operation, and is stable from frame to
+frame. Error diffusion spreads the rounding error of each row onto the next,
+one vectorized row at a time; since it has no rightward term it is a little
+coarser than Floyd-Steinberg, but it needs no per-pixel python loop.
+"""
+
+import numpy as np
+from functools import lru_cache
+from typing import Literal
+
+DitherModesType = Literal["none", "bayer", "blue-noise", "diffusion"]
+DitherModes = ["none", "bayer", "blue-noise", "diffusion"]
+
+BAYER_SIZE = 8
+BLUE_NOISE_SIZE = 64
+
+
+@lru_cache(maxsize=None)
+def bayer_matrix(size: int = BAYER_SIZE) -> np.ndarray:
+    """
+    The Bayer threshold matrix, normalized to -0.5 - 0.5.
+
+    :param size: the width of the matrix, a power of two
+    :return: float32 (size, size)
+    """
+    if size < 2 or size & (size - 1):
+        raise ValueError(f"Invalid size: {size}")
+
+    matrix = np.zeros((1, 1), dtype=np.int64)
+    while len(matrix) < size:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2],
+                           [4 * matrix + 3, 4 * matrix + 1]])
+    return ((matrix + 0.5) / matrix.size - 0.5).astype(np.float32)
+
+
+@lru_cache(maxsize=None)
+def blue_noise_matrix(size: int = BLUE_NOISE_SIZE, sigma: float = 1.5, seed: int = 0) -> np.ndarray:
+    """
+    A blue noise threshold matrix, made with the void and cluster method, normalized
+    to -0.5 - 0.5. It tiles seamlessly, and has no visible structure like Bayer's.
+
+    :param size: the width of the matrix
+    :param sigma: the width of the gaussian that finds clusters & voids
+    :param seed: the seed of the initial pattern
+    :return: float32 (size, size)
+    """
+    # toroidal gaussian around (0, 0), rolled to a point to add its energy
+    distance = np.minimum(np.arange(size), size - np.arange(size))
+    kernel = np.exp(-(distance[:, None] ** 2 + distance[None, :] ** 2) / (2 * sigma ** 2))
+
+    def add(energy, index, sign):
+        y, x = divmod(index, size)
+        energy += sign * np.roll(kernel, (y, x), axis=(0, 1))
+
+    # an initial pattern of ~10% points
+    rng = np.random.default_rng(seed)
+    pattern = np.zeros(size * size, dtype=bool)
+    pattern[rng.choice(size * size, size * size // 10, replace=False)] = True
+    energy = np.zeros((size, size))
+    for index in np.flatnonzero(pattern):
+        add(energy, index, 1)
+
+    # move the tightest cluster into the largest void until they meet
+    flat = energy.reshape(-1)
+    while True:
+        cluster = np.where(pattern, flat, -np.inf).argmax()
+        pattern[cluster] = False
+        add(energy, cluster, -1)
+        void = np.where(pattern, np.inf, flat).argmin()
+        if void == cluster:
+            pattern[cluster] = True
+            add(energy, cluster, 1)
+            break
+        pattern[void] = True
+        add(energy, void, 1)
+
+    ranks = np.zeros(size * size, dtype=np.int64)
+    ones = int(pattern.sum())
+
+    # rank the initial points by removing the tightest clusters
+    initial, initial_energy = pattern.copy(), energy.copy()
+    for rank in range(ones - 1, -1, -1):
+        cluster = np.where(pattern, flat, -np.inf).argmax()
+        pattern[cluster] = False
+        add(energy, cluster, -1)
+        ranks[cluster] = rank
+
+    # rank the rest by filling the largest voids
+    pattern, energy = initial, initial_energy
+    flat = energy.reshape(-1)
+    for rank in range(ones, size * size):
+        void = np.where(pattern, np.inf, flat).argmin()
+        pattern[void] = True
+        add(energy, void, 1)
+        ranks[void] = rank
+
+    return ((ranks.reshape(size, size) + 0.5) / (size * size) - 0.5).astype(np.float32)
+
+
+def threshold_matrix(mode: DitherModesType) -> np.ndarray:
+    match mode:
+        case "bayer": return bayer_matrix()
+        case "blue-noise": return blue_noise_matrix()
+        case _: raise ValueError(f"Invalid mode: {mode}")
+
+
+class Dither:
+    def __init__(self, mode: DitherModesType = "none", strength: float = 1.0):
+        """
+        Initialize the Dither class.
+
+        :param mode: how to dither
+            -- Mode must be one of the following --
+            none: round every intensity to the closest glyph
+            bayer: ordered dithering with an 8x8 Bayer matrix
+            blue-noise: ordered dithering with a 64x64 blue noise matrix
+            diffusion: row-vectorized error diffusion
+        :param strength: the amplitude of the threshold matrix, in glyph steps
+        """
+        if mode not in DitherModes:
+            raise ValueError(f"Invalid mode: {mode}")
+        self.mode = mode
+        self.strength = strength
+
+        # the tiled threshold matrix, for the last frame shape & glyph step
+        self._offsets = None
+        self._offsets_key = None
+
+    @property
+    def ordered(self) -> bool:
+        return self.mode in ("bayer", "blue-noise")
+
+    def offsets(self, shape: tuple, step: float) -> np.ndarray:
+        """ the threshold matrix tiled over a frame, scaled to step intensity per glyph """
+        key = (shape, step)
+        if self._offsets_key != key:
+            matrix = threshold_matrix(self.mode)
+            reps = (-(-shape[0] // matrix.shape[0]), -(-shape[1] // matrix.shape[1]))
+            tiled = np.tile(matrix, reps)[:shape[0], :shape[1]]
+            self._offsets = np.ascontiguousarray(tiled * np.float32(step * self.strength))
+            self._offsets_key = key
+        return self._offsets
+
+    def apply(self, intensities: np.ndarray, levels: int) -> np.ndarray:
+        """
+        Ordered dithering, add the threshold matrix to a whole frame.
+
+        :param intensities: normalized intensities (..., height, width), 0 - 255
+        :param levels: the number of glyphs the intensities are rounded to
+        :return: the dithered intensities, float32
+        """
+        step = 255 / max(levels - 1, 1)
+        return intensities + self.offsets(intensities.shape[-2:], step)
+
+    def diffuse(self, intensities: np.ndarray, table: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Error diffusion, quantize a row, then push its error onto the next row
+        (1/4 down-left, 1/2 down, 1/4 down-right).
+
+        :param intensities: normalized intensities (height, width), 0 - 255
+        :param table: the intensity -> glyph index lookup table
+        :param values: the intensity each glyph stands for (glyphs, )
+        :return: glyph indices (height, width)
+        """
+        scale = (len(table) - 1) / 255
+        indices = np.empty(intensities.shape, dtype=table.dtype)
+        error = np.zeros(intensities.shape[1], dtype=np.float32)
+        spread = np.empty_like(error)
+
+        for y, row in enumerate(intensities):
+            row = np.clip(row + error * np.float32(self.strength), 0, 255)
+            indices[y] = table[(row * scale).astype(np.intp)]
+            error = row - values[indices[y]]
+
+            # the error of the next row, spread over the 3 cells below
+            spread[:] = error * 0.5
+            spread[1:] += error[:-1] * 0.25
+            spread[:-1] += error[1:] * 0.25
+            spread[0] += error[0] * 0.25
+            spread[-1] += error[-1] * 0.25
+            error, spread = spread, error
+        return indices
+
+
+def glyph_values(table: np.ndarray, glyph_count: int) -> np.ndarray:
+    """ the intensity each glyph stands for, the center of the intensities mapped to it """
+    inputs = np.linspace(0, 255, len(table))
+    sums = np.bincount(table, weights=inputs, minlength=glyph_count)
+    counts = np.bincount(table, minlength=glyph_count)
+
+    # glyphs that no intensity maps to keep their position in the palette
+    fallback = np.linspace(0, 255, glyph_count)
+    return np.where(counts > 0, sums / np.maximum(counts, 1), fallback).astype(np.float32)
@@ -0,0 +1,215 @@
+"""
+17 October 2026
+
+`frame.py` This file contains the AsciiFrame class, the result of converting
+an image. Instead of an object array holding a python list per cell, a frame
+is a reference to the gradient's glyph table, a uint8 (uint16 for palettes
+of more than 256 glyphs) plane of glyph indices and, optionally, a uint8 rgb
+plane. A frame costs 1 - 5 bytes per cell.
+
+Slicing & flipping a frame returns a new frame over views of the same planes,
+nothing is copied. Frames are always indexed (row, column), frames converted
+from x_major images are wrapped as transposed views.
+
+A frame can be written out as plain text, as ANSI escapes (through a
+TerminalEncoder), as an HTML <pre> block or as bytes, which `AsciiFrame.from_bytes` reads back without
+copying the planes.
+"""
+
+import html
+import struct
+import numpy as np
+from functools import lru_cache
+from typing import Union
+
+# magic, version, flags, rows, columns, length of the glyph table
+HEADER = struct.Struct("<4sBBIII")
+MAGIC = b"ASCF"
+VERSION = 1
+
+FLAG_COLOR = 1
+FLAG_WIDE = 2
+
+GLYPH_SEPARATOR = "\x00"
+
+
+@lru_cache(maxsize=64)
+def glyph_codepoints(glyphs: tuple) -> Union[np.ndarray, None]:
+    """ the code point of every glyph, or None when a glyph is not a single character """
+    if not all(len(glyph) == 1 for glyph in glyphs):
+        return None
+    return np.array([ord(glyph) for glyph in glyphs], dtype="<u4")
+
+
+def plane_flags(indices: np.ndarray, colors: Union[np.ndarray, None]) -> int:
+    """ the FLAG_COLOR & FLAG_WIDE flags that describe a frame's planes """
+    return (FLAG_COLOR if colors is not None else 0) | (FLAG_WIDE if indices.itemsize == 2 else 0)
+
+
+def read_planes(buffer, offset: int, flags: int, rows: int, columns: int) -> tuple[np.ndarray, Union[np.ndarray, None]]:
+    """
+    The index & rgb planes stored at offset in buffer, as read-only views.
+
+    :return: glyph indices (rows, columns), colors (rows, columns, 3) or None
+    """
+    dtype = np.uint16 if flags & FLAG_WIDE else np.uint8
+    indices = np.frombuffer(buffer, dtype=dtype, count=rows * columns, offset=offset)
+
+    colors = None
+    if flags & FLAG_COLOR:
+        colors = np.frombuffer(buffer, dtype=np.uint8, count=rows * columns * 3, offset=offset + indices.nbytes)
+        colors = colors.reshape(rows, columns, 3)
+    return indices.reshape(rows, columns), colors
+
+
+class AsciiFrame:
+    __slots__ = ("glyphs", "indices", "colors")
+
+    def __init__(self, glyphs: list, indices: np.ndarray, colors: Union[np.ndarray, None] = None, x_major: bool = False):
+        """
+        Initialize the AsciiFrame class. The planes are not copied.
+
+        :param glyphs: the glyph table that the indices point into, shared with the gradient
+        :param indices: glyph indices (rows, columns), uint8 or uint16
+        :param colors: uint8 rgb of each cell (rows, columns, 3), or None for no color
+        :param x_major: the planes are indexed (column, row), like pygame.surfarray
+        """
+        if x_major:
+            indices = indices.T
+            colors = None if colors is None else colors.transpose(1, 0, 2)
+        self.glyphs = glyphs
+        self.indices = indices
+        self.colors = colors
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """ (rows, columns) """
+        return self.indices.shape
+
+    @property
+    def nbytes(self) -> int:
+        """ the size of the planes, in bytes """
+        return self.indices.nbytes + (0 if self.colors is None else self.colors.nbytes)
+
+    def __getitem__(self, key) -> "AsciiFrame":
+        """ a region of the frame, e.g. frame[10:20, ::2]. Integers keep their axis """
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) > 2:
+            raise IndexError(f"Invalid index: {key}")
+
+        key = tuple(slice(k, k + 1 or None) if isinstance(k, int) else k for k in key)
+        if not all(isinstance(k, slice) for k in key):
+            raise IndexError(f"Invalid index: {key}")
+        return AsciiFrame(self.glyphs, self.indices[key], None if self.colors is None else self.colors[key])
+
+    def flip(self, horizontal: bool = True, vertical: bool = False) -> "AsciiFrame":
+        """ the frame mirrored left to right and/or upside down """
+        axes = tuple(axis for axis, flip in ((0, vertical), (1, horizontal)) if flip)
+        if not axes:
+            return self
+        colors = None if self.colors is None else np.flip(self.colors, axis=axes)
+        return AsciiFrame(self.glyphs, np.flip(self.indices, axis=axes), colors)
+
+    def copy(self) -> "AsciiFrame":
+        """ a frame with its own contiguous planes """
+        colors = None if self.colors is None else np.ascontiguousarray(self.colors).copy()
+        return AsciiFrame(self.glyphs, np.ascontiguousarray(self.indices).copy(), colors)
+
+    def to_text(self) -> str:
+        """ the glyphs, rows separated by newlines """
+        codes = glyph_codepoints(tuple(self.glyphs))
+        if codes is None:
+            return "\n".join("".join(self.glyphs[i] for i in row) for row in self.indices.tolist())
+
+        # every row is a run of code points followed by a newline, decoded at once
+        rows, columns = self.shape
+        text = np.empty((rows, columns + 1), dtype="<u4")
+        text[:, :columns] = codes[self.indices]
+        text[:, columns] = ord("\n")
+        return text.tobytes()[:-4].decode("utf-32-le")
+
+    def text_rows(self) -> list:
+        """ the text of every row """
+        return self.to_text().split("\n") if self.shape[0] else []
+
+    def to_ansi(self, encoder=None) -> str:
+        """
+        The frame with color escapes, for a terminal.
+
+        :param encoder: a TerminalEncoder, or the name of its color mode (default: truecolor)
+        """
+        from ascii_webcam.terminal import TerminalEncoder
+        if not isinstance(encoder, TerminalEncoder):
+            encoder = TerminalEncoder(encoder or "truecolor")
+        return encoder.encode_frame(self)
+
+    def to_html(self) -> str:
+        """ the frame as a <pre> block, with a colored span per run of cells of one color """
+        if self.colors is None:
+            return "<pre>" + html.escape(self.to_text(), quote=False) + "</pre>"
+
+        # escape the glyph table once, instead of every run
+        escaped = np.array([html.escape(glyph, quote=False) for glyph in self.glyphs], dtype=object)
+        colors = self.colors.astype(np.uint32)
+        packed = colors[..., 0] << 16 | colors[..., 1] << 8 | colors[..., 2]
+
+        pieces = ["<pre>"]
+        for y, (row, codes) in enumerate(zip(escaped[self.indices].tolist(), packed)):
+            # the cells where the color changes start a new span
+            starts = np.flatnonzero(np.diff(codes, prepend=codes[:1] + 1))
+            ends = np.append(starts[1:], len(codes))
+            if y:
+                pieces.append("\n")
+            for start, end, code in zip(starts.tolist(), ends.tolist(), codes[starts].tolist()):
+                pieces.append(f'<span style="color:#{code:06x}">{"".join(row[start:end])}</span>')
+        pieces.append("</pre>")
+        return "".join(pieces)
+
+    def to_bytes(self) -> bytes:
+        """ the frame as a header, the glyph table, the index plane & the rgb plane """
+        table = GLYPH_SEPARATOR.join(self.glyphs).encode()
+        flags = plane_flags(self.indices, self.colors)
+        header = HEADER.pack(MAGIC, VERSION, flags, *self.shape, len(table))
+        return b"".join([header, table, self.planes_bytes()])
+
+    def planes_bytes(self) -> bytes:
+        """ the index plane followed by the rgb plane (if any), row-major """
+        planes = np.ascontiguousarray(self.indices).tobytes()
+        if self.colors is not None:
+            planes += np.ascontiguousarray(self.colors).tobytes()
+        return planes
+
+    @classmethod
+    def from_bytes(cls, buffer, glyphs: Union[list, None] = None) -> "AsciiFrame":
+        """
+        Read a frame written by `to_bytes`. The planes are read-only views of buffer,
+        so a frame can be read straight from an mmap.
+
+        :param buffer: bytes, a memoryview, an mmap...
+        :param glyphs: reuse this glyph table if it matches the stored one
+        """
+        magic, version, flags, rows, columns, table_size = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Invalid frame: {magic!r} version {version}")
+
+        offset = HEADER.size
+        table = bytes(buffer[offset:offset + table_size]).decode()
+        if glyphs is None or GLYPH_SEPARATOR.join(glyphs) != table:
+            glyphs = table.split(GLYPH_SEPARATOR)
+        offset += table_size
+
+        return cls(glyphs, *read_planes(buffer, offset, flags, rows, columns))
+
+    def to_object_array(self) -> np.ndarray:
+        """ the (char, r, g, b) object array of `AsciiImageConverter.convert_image` """
+        return_shape = (*self.shape, 1 if self.colors is None else 4)
+        cells = np.empty(return_shape, dtype=object)
+        cells[..., 0] = np.array(self.glyphs, dtype=object)[self.indices]
+        if self.colors is not None:
+            cells[..., 1:] = self.colors
+        return cells
+
+    def __repr__(self) -> str:
+        color = "rgb" if self.colors is not None else "no color"
+        return f"AsciiFrame({self.shape[0]}x{self.shape[1]}, {len(self.glyphs)} glyphs, {color})"
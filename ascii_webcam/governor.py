@@ -0,0 +1,116 @@
+"""
+17 October 2026
+
+`governor.py` This file contains the ResolutionGovernor class. The cost of
+converting & rendering a frame grows with the number of cells, so on a slow
+machine a large window (or a small font) can drag the frame rate down. The
+governor measures how long every frame took end to end, and scales the grid
+down until the frames fit the frame budget of a target FPS, or back up (never
+past the requested size) once there is room again.
+
+To keep the grid from oscillating, the governor
+    - judges the median of a window of frames, not single frames
+    - waits for a full window of frames at the new size after every change
+    - leaves the grid alone while the load is inside a dead band
+      (between grow_below & shrink_above of the frame budget)
+    - changes the scale by at most max_step per adjustment
+"""
+
+import math
+import time
+import numpy as np
+from ascii_webcam.telemetry import RingBuffer
+
+DEFAULT_TARGET_FPS = 30.0
+
+
+class ResolutionGovernor:
+    def __init__(self, target_fps: float = DEFAULT_TARGET_FPS, **kwargs):
+        """
+        Initialize the ResolutionGovernor class.
+
+        :param target_fps: the frame rate to hold
+        :param min_scale: the smallest grid, as a fraction of the requested size (default: 0.25)
+        :param max_scale: the largest grid, as a fraction of the requested size (default: 1.0)
+        :param max_step: the largest change of the scale per adjustment, as a fraction (default: 0.15)
+        :param window: the number of frames judged per adjustment (default: 15)
+        :param shrink_above: shrink when the frames take more than this fraction of the budget (default: 1.0)
+        :param grow_below: grow when the frames take less than this fraction of the budget (default: 0.7)
+        """
+        self.target_fps = target_fps
+        self.min_scale = kwargs.get("min_scale", 0.25)
+        self.max_scale = kwargs.get("max_scale", 1.0)
+        self.max_step = kwargs.get("max_step", 0.15)
+        self.window = kwargs.get("window", 15)
+        self.shrink_above = kwargs.get("shrink_above", 1.0)
+        self.grow_below = kwargs.get("grow_below", 0.7)
+        if not self.grow_below < self.shrink_above:
+            raise ValueError(f"Invalid band: {self.grow_below} - {self.shrink_above}")
+
+        self.scale = self.max_scale
+        self.adjustments = 0
+
+        # frame times since the last change, and when frames completed (for the FPS)
+        self.samples = RingBuffer(self.window)
+        self.ticks = RingBuffer(4 * self.window)
+
+    @property
+    def budget(self) -> float:
+        """ the time one frame may take, in seconds """
+        return 1 / self.target_fps
+
+    @property
+    def load(self) -> float:
+        """ the median frame time of the current window, as a fraction of the budget """
+        if not len(self.samples):
+            return 0.0
+        return float(np.median(self.samples.snapshot())) / self.budget
+
+    @property
+    def fps(self) -> float:
+        """ the rolling rate of recorded frames, per second """
+        if len(self.ticks) < 2:
+            return 0.0
+        times = self.ticks.snapshot()
+        elapsed = times[-1] - times[0]
+        return float((len(times) - 1) / elapsed) if elapsed > 0 else 0.0
+
+    def record(self, seconds: float) -> bool:
+        """
+        Record the end to end time of a frame, and adjust the scale once a window is full.
+
+        :param seconds: how long converting & rendering the frame took
+        :return: True when the scale changed
+        """
+        self.samples.append(seconds)
+        self.ticks.append(time.perf_counter())
+        if len(self.samples) < self.window:
+            return False
+
+        load = self.load
+        if self.grow_below <= load <= self.shrink_above:
+            return False
+
+        # the cost grows with the number of cells, the square of the scale,
+        # so aim for the middle of the dead band
+        target = (self.grow_below + self.shrink_above) / 2
+        wanted = self.scale * math.sqrt(target / max(load, 1e-6))
+        wanted = min(max(wanted, self.scale * (1 - self.max_step)), self.scale * (1 + self.max_step))
+        wanted = min(max(wanted, self.min_scale), self.max_scale)
+        if abs(wanted - self.scale) < 0.01:
+            return False
+
+        self.scale = wanted
+        self.adjustments += 1
+
+        # frames measured at the old size say nothing about the new one
+        self.samples = RingBuffer(self.window)
+        return True
+
+    def scaled(self, size: tuple) -> tuple:
+        """
+        Scale an image_size by the current scale.
+
+        :param size: the requested image_size, None entries are kept
+        """
+        return tuple(None if n is None else max(1, round(n * self.scale)) for n in size)
@@ -7,15 +7,22 @@ responsible for not only ordering an ascii palette in terms of intensity,
 but also finding the closest match for a given pixel intensity.
 
 We also export a PresetGradients class that contains some pre-defined
-gradients for the user to use within their own projects.
+gradients for the user to use within their own projects. The presets are
+only built the first time they are accessed.
 """
 
 import numpy as np
-from PIL import ImageFont
+from bisect import bisect_left
 from itertools import chain
 from typing import Union, Callable
+from ascii_webcam.cache import GlyphIntensityCache, default_cache
 
 FONT_SIZE = 100
+LUT_SIZE = 256
+FEATURE_GRID = 3
+
+# the name of get_intensity_from_char's measurement, for the glyph cache
+INTENSITY_METHOD = "mean-padded"
 
 
 class AsciiGradient:
@@ -35,13 +42,23 @@ class AsciiGradient:
             pixel intensities
         - None
         - minmax scaler
+        :param cache: the GlyphIntensityCache for glyph intensities,
+            False to always rasterize (default: the shared cache)
         """
-        # find the font that the user wants to use
-        font = kwargs.get('font', None)
-        if font:
-            self.font = ImageFont.truetype(font, size=100)
-        else:
-            self.font = ImageFont.load_default(size=100)  # type: ignore
+        # find the font that the user wants to use, it is
+        # only loaded once we need to measure a glyph
+        self.font_path = kwargs.get('font', None)
+        self._font = None
+
+        # intensity -> glyph index tables, keyed by table size
+        self._lookup_tables = {}
+
+        # sorted dict-mode intensities, built on first match
+        self._intensity_list = None
+        self._intensity_array = None
+
+        # sub-cell glyph features, keyed by (grid, x_major, mirror)
+        self._features = {}
 
         # should we scale the pixel intensities?
         scaler = kwargs.get('scaler', None)
@@ -56,6 +73,10 @@ class AsciiGradient:
         # or just use the ordered palette
         use_dict = kwargs.get('use_dict', False)
 
+        # where to look up (and store) glyph intensities
+        cache = kwargs.get('cache', None)
+        self.cache = default_cache() if cache is None else cache
+
         # now we can compute the gradient that the user wants
         self.gradient = self.find_gradient(palette, use_dict)
 
@@ -64,9 +85,174 @@ class AsciiGradient:
         if return_intensity:
             return intensity
         if isinstance(self.gradient, dict):
-            return min(self.gradient, key=lambda x: abs(x - intensity))
+            # the matched intensity, see closest_glyph for its glyph
+            return self.sorted_intensities()[0][self._closest_index(intensity)]
         return self.gradient[int((intensity / 255) * (len(self.gradient) - 1))]
 
+    def closest_glyph(self, intensity: float) -> str:
+        """ the glyph closest to a pixel's intensity, in dict mode as well """
+        if isinstance(self.gradient, dict):
+            return self.gradient[self.closest_match(intensity)]
+        return self.closest_match(intensity)
+
+    def match_indices(self, intensities: np.ndarray) -> np.ndarray:
+        """
+        Batched version of `closest_match`. Returns the index into `self.glyphs`
+        of the closest match for every intensity in the array. In dict mode, the
+        intensities are resolved with a binary search over the sorted glyph
+        intensities, comparing each position with its lower neighbour.
+
+        :param intensities: array of pixel intensities (0 - 255)
+        :return: array of glyph indices, same shape as intensities
+        """
+        intensities = np.asarray(intensities, dtype=np.float64)
+        if not isinstance(self.gradient, dict):
+            return ((intensities / 255) * (len(self.gradient) - 1)).astype(np.intp)
+
+        keys = self.sorted_intensities()[1]
+        hi = np.searchsorted(keys, intensities).clip(0, len(keys) - 1)
+        lo = (hi - 1).clip(0)
+
+        # ties go to the lower intensity, like min() over the sorted dict
+        use_hi = np.abs(keys[hi] - intensities) < np.abs(intensities - keys[lo])
+        return np.where(use_hi, hi, lo)
+
+    def sorted_intensities(self) -> tuple[list, np.ndarray]:
+        """ the dict-mode glyph intensities, as a sorted list and array """
+        if self._intensity_list is None:
+            self._intensity_list = sorted(self.gradient)
+            self._intensity_array = np.array(self._intensity_list, dtype=np.float64)
+        return self._intensity_list, self._intensity_array
+
+    def _closest_index(self, intensity: float) -> int:
+        # scalar fast path of match_indices, bisect instead of a numpy call
+        keys = self.sorted_intensities()[0]
+        hi = min(bisect_left(keys, intensity), len(keys) - 1)
+        lo = max(hi - 1, 0)
+        return hi if abs(keys[hi] - intensity) < abs(intensity - keys[lo]) else lo
+
+    @property
+    def font(self):
+        """ the PIL font used to measure glyph intensities """
+        if self._font is None:
+            from PIL import ImageFont
+            if self.font_path:
+                self._font = ImageFont.truetype(self.font_path, size=FONT_SIZE)
+            else:
+                self._font = ImageFont.load_default(size=FONT_SIZE)  # type: ignore
+        return self._font
+
+    @property
+    def glyphs(self) -> list:
+        """ the characters of the gradient, in the order they are indexed """
+        if isinstance(self.gradient, dict):
+            return list(self.gradient.values())
+        return list(self.gradient)
+
+    def lookup_table(self, size: int = LUT_SIZE) -> np.ndarray:
+        """
+        Build (or fetch) a table that maps `size` evenly spaced intensities
+        between 0 and 255 to an index into `self.glyphs`. A whole frame can then
+        be mapped with a single indexing call instead of `closest_match` per pixel.
+
+        :param size: the number of entries in the table (256 = one per intensity)
+        :return: the lookup table, uint8 (or uint16 for palettes > 256 glyphs)
+        """
+        if size in self._lookup_tables:
+            return self._lookup_tables[size]
+
+        table = self.match_indices(np.linspace(0, 255, size))
+
+        dtype = np.uint8 if len(self.glyphs) <= 256 else np.uint16
+        self._lookup_tables[size] = table.astype(dtype)
+        return self._lookup_tables[size]
+
+    def glyph_features(self, grid: int = FEATURE_GRID) -> np.ndarray:
+        """
+        Reduce every glyph to a grid x grid feature vector, the ink coverage of each
+        sub-cell. Unlike the intensity, this keeps the shape of the glyph, e.g. where
+        its edges are. The features are scaled so each glyph averages the intensity
+        that the lookup table assigns to it.
+
+        :param grid: the number of sub-cells along each side of a glyph
+        :return: the features of every glyph (glyphs, grid, grid), row-major
+        """
+        import cv2
+        key = (grid, False, False)
+        if key in self._features:
+            return self._features[key]
+
+        # every glyph is drawn into the same cell, relative to the font's ascender
+        ascent, descent = self.font.getmetrics()
+        width = max(int(np.ceil(self.font.getlength(char))) for char in self.glyphs)
+        cell_shape = (ascent + descent, max(width, 1))
+
+        features = np.empty((len(self.glyphs), grid, grid), dtype=np.float32)
+        for feature, char in zip(features, self.glyphs):
+            cell = np.zeros(cell_shape, dtype=np.float32)
+            bmp, (x, y) = self.font.getmask2(char, mode='L')
+            arr = np.array(bmp, dtype=np.uint8).reshape(bmp.size[::-1])
+
+            # paste the glyph's bitmap at its offset, clipped to the cell
+            x, y = max(x, 0), max(y, 0)
+            h = max(min(arr.shape[0], cell_shape[0] - y), 0)
+            w = max(min(arr.shape[1], cell_shape[1] - x), 0)
+            cell[y:y + h, x:x + w] = arr[:h, :w]
+
+            feature[:] = cv2.resize(cell, (grid, grid), interpolation=cv2.INTER_AREA)
+
+        # scale every glyph so its mean matches the intensities the lookup table
+        # maps to it, shape matching then keeps the brightness of intensity matching
+        table = self.lookup_table(LUT_SIZE)
+        targets = np.bincount(table, weights=np.linspace(0, 255, LUT_SIZE), minlength=len(features))
+        counts = np.bincount(table, minlength=len(features))
+        means = features.mean(axis=(1, 2))
+
+        # glyphs the table never picks keep their rank by coverage
+        unused = counts == 0
+        counts[unused] = 1
+        targets[unused] = means[unused] * 255 / max(means.max(), 1e-6)
+        targets /= counts
+
+        blank = means <= 0
+        features[~blank] *= (targets[~blank] / means[~blank])[:, None, None]
+        features[blank] = targets[blank][:, None, None]
+
+        self._features[key] = features
+        return features
+
+    def match_features(self, features: np.ndarray, x_major: bool = False, mirror: bool = False) -> np.ndarray:
+        """
+        Match every cell to the glyph whose sub-cell features are closest (L2),
+        with one batched matrix multiply. ||x - f||^2 = ||x||^2 - 2 x.f + ||f||^2,
+        and ||x||^2 is the same for every glyph, so we only need x.f & ||f||^2.
+
+        :param features: the sub-cell intensities of every cell (..., grid, grid), as
+            sampled from the image (before any mirroring)
+        :param x_major: the image is indexed (x, y), like pygame.surfarray
+        :param mirror: the cells will be shown mirrored horizontally
+        :return: glyph indices (...)
+        """
+        grid = features.shape[-1]
+        key = (grid, x_major, mirror)
+        if key not in self._features:
+            # bring the glyphs into the orientation the image was sampled in
+            glyphs = self.glyph_features(grid)
+            if mirror:
+                glyphs = glyphs[:, :, ::-1]
+            if x_major:
+                glyphs = glyphs.transpose(0, 2, 1)
+            self._features[key] = np.ascontiguousarray(glyphs)
+
+        glyphs = self._features[key].reshape(-1, grid * grid)
+        cells = features.reshape(-1, grid * grid).astype(np.float32, copy=False)
+
+        scores = cells @ (-2 * glyphs.T) + np.sum(glyphs ** 2, axis=1)
+        indices = scores.argmin(axis=1)
+
+        dtype = np.uint8 if len(glyphs) <= 256 else np.uint16
+        return indices.astype(dtype).reshape(features.shape[:-2])
+
     def handle_scaler(self, scaler: str) -> None:
         match scaler:
             case 'minmax':
@@ -98,9 +284,26 @@ class AsciiGradient:
         area = np.multiply(*np.add(padding, arr.shape))
         return arr.sum() / area
 
+    def get_intensities(self, chars) -> list:
+        """ the intensity of every char, from the glyph cache where possible """
+        if not isinstance(self.cache, GlyphIntensityCache):
+            return [self.get_intensity_from_char(char) for char in chars]
+
+        font_key = GlyphIntensityCache.font_key(self.font_path)
+        intensities = []
+        for char in chars:
+            intensity = self.cache.get(font_key, FONT_SIZE, INTENSITY_METHOD, char)
+            if intensity is None:
+                intensity = self.get_intensity_from_char(char)
+                self.cache.put(font_key, FONT_SIZE, INTENSITY_METHOD, char, intensity)
+            intensities.append(intensity)
+
+        self.cache.save()
+        return intensities
+
     def find_gradient(self, palette: str, return_dict: bool) -> Union[str, dict]:
-        intensity_map = {self.get_intensity_from_char(
-            char): char for char in set(palette)}
+        chars = list(set(palette))
+        intensity_map = dict(zip(self.get_intensities(chars), chars))
 
         intensity_keys = list(intensity_map.keys())
         intensity_vals = list(self.scaler(intensity_map.values()))
@@ -126,29 +329,43 @@ class AsciiGradient:
         return dict(sorted(zip(keys, values)))
 
 
+class _Preset:
+    """ a preset gradient, built on first access & cached """
+
+    def __init__(self, palette: str, **kwargs):
+        self.palette = palette
+        self.kwargs = kwargs
+        self.gradient = None
+
+    def __get__(self, instance, owner) -> AsciiGradient:
+        if self.gradient is None:
+            self.gradient = AsciiGradient(self.palette, **self.kwargs)
+        return self.gradient
+
+
+class _AllPresets:
+    def __get__(self, instance, owner) -> list:
+        return [getattr(owner, name) for name in owner.names()]
+
+
 class PresetGradients:
-    UNI = AsciiGradient(" ˙·.,:;<*≠am#W@Ŵ₩", ordered=True)
-    ASCII = AsciiGradient(" .:-=+*#%@", ordered=True)
-    ASCII_EXTENDED = AsciiGradient("`.-':_,^=;><+!rc*/z?sLTv)J7(|Fi{C}fI31tlu["
-                                   "neoZ5Yxjya]2ESwqkP6h9d4VpOGbUAKXHm8RD#$Bg0MNWQ%&@", ordered=True)
+    UNI = _Preset(" ˙·.,:;<*≠am#W@Ŵ₩", ordered=True)
+    ASCII = _Preset(" .:-=+*#%@", ordered=True)
+    ASCII_EXTENDED = _Preset("`.-':_,^=;><+!rc*/z?sLTv)J7(|Fi{C}fI31tlu["
+                             "neoZ5Yxjya]2ESwqkP6h9d4VpOGbUAKXHm8RD#$Bg0MNWQ%&@", ordered=True)
 
-    ALPHABETIC = AsciiGradient(" ABCDEFGHIJKLMNOPQRSTUVWXYZ", ordered=True)
-    ALPHANUMERIC = AsciiGradient(
+    ALPHABETIC = _Preset(" ABCDEFGHIJKLMNOPQRSTUVWXYZ", ordered=True)
+    ALPHANUMERIC = _Preset(
         " ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", ordered=True)
 
-    BLOCKS = AsciiGradient(" ░▒▓█", ordered=True)
-    ARROWS = AsciiGradient(" ←↑→↓↖↗↘↙", ordered=True)
-    GEOMETRIC = AsciiGradient(" ○◔◐◕◕◑●", ordered=True)
-    MATHEMATICAL = AsciiGradient(" ≠≤≥±≈√∞∫∑∆π", ordered=True)
-
-    __ALL_GRADIENTS__ = [
-        UNI,
-        ASCII,
-        ASCII_EXTENDED,
-        ALPHABETIC,
-        ALPHANUMERIC,
-        BLOCKS,
-        ARROWS,
-        GEOMETRIC,
-        MATHEMATICAL
-    ]
+    BLOCKS = _Preset(" ░▒▓█", ordered=True)
+    ARROWS = _Preset(" ←↑→↓↖↗↘↙", ordered=True)
+    GEOMETRIC = _Preset(" ○◔◐◕◕◑●", ordered=True)
+    MATHEMATICAL = _Preset(" ≠≤≥±≈√∞∫∑∆π", ordered=True)
+
+    __ALL_GRADIENTS__ = _AllPresets()
+
+    @classmethod
+    def names(cls) -> list:
+        """ the names of the preset gradients, in declaration order """
+        return [name for name, value in vars(cls).items() if isinstance(value, _Preset)]
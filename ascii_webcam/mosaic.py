@@ -0,0 +1,172 @@
+"""
+17 October 2026
+
+`mosaic.py` This file converts several streams (e.g. cameras) at once and
+tiles them into one mosaic. The frames of all streams are converted together
+with `AsciiImageConverter.convert_frames`, which stacks the frames that shrink
+to the same grid, so one converter & one NumPy call per step serve every
+stream. The converted frames are then tiled into a single AsciiFrame, which
+can be drawn like any other frame (a terminal, the GUI, a recording...).
+
+Usage: python -m ascii_webcam.mosaic camera:0 camera:1 synthetic:bars --width 60
+"""
+
+import sys
+import math
+import time
+import argparse
+import numpy as np
+from typing import Union
+from ascii_webcam.frame import AsciiFrame
+
+
+def mosaic_shape(count: int, columns: Union[int, None] = None) -> tuple[int, int]:
+    """
+    The (rows, columns) of tiles for a mosaic of count frames.
+
+    :param columns: the number of tiles per row (default: as square as possible)
+    """
+    if columns is None:
+        columns = math.ceil(math.sqrt(count))
+    columns = max(1, min(columns, count))
+    return math.ceil(count / columns), columns
+
+
+def tile_frames(frames: list, columns: Union[int, None] = None, gap: int = 1, fill: str = " ") -> AsciiFrame:
+    """
+    Tile converted frames into one mosaic, left to right & top to bottom. Every
+    row of tiles is as tall as its tallest frame, every column as wide as its
+    widest frame.
+
+    :param frames: the AsciiFrames to tile
+    :param columns: the number of tiles per row (default: as square as possible)
+    :param gap: the number of cells between tiles
+    :param fill: the glyph of the cells between & around the tiles
+    :return: the mosaic, colored when any of the frames is
+    """
+    if not frames:
+        raise ValueError("Invalid mosaic: no frames")
+    rows, columns = mosaic_shape(len(frames), columns)
+
+    # frames of one converter share a glyph table, others are appended to it
+    glyphs = list(frames[0].glyphs)
+    offsets = []
+    for frame in frames:
+        if frame.glyphs == frames[0].glyphs:
+            offsets.append(0)
+        else:
+            offsets.append(len(glyphs))
+            glyphs.extend(frame.glyphs)
+    if fill not in glyphs:
+        glyphs.append(fill)
+
+    heights = [max(frame.shape[0] for frame in frames[r * columns:(r + 1) * columns]) for r in range(rows)]
+    widths = [max(frame.shape[1] for frame in frames[c::columns]) for c in range(columns)]
+    tops = np.cumsum([0] + [h + gap for h in heights])
+    lefts = np.cumsum([0] + [w + gap for w in widths])
+
+    dtype = np.uint8 if len(glyphs) <= 256 else np.uint16
+    indices = np.full((tops[-1] - gap, lefts[-1] - gap), glyphs.index(fill), dtype=dtype)
+    colors = None
+    if any(frame.colors is not None for frame in frames):
+        colors = np.zeros((*indices.shape, 3), dtype=np.uint8)
+
+    for i, (frame, offset) in enumerate(zip(frames, offsets)):
+        top, left = tops[i // columns], lefts[i % columns]
+        height, width = frame.shape
+        # cast first, the frame's own (uint8) indices would wrap past 255
+        indices[top:top + height, left:left + width] = frame.indices.astype(dtype) + offset
+        if colors is not None:
+            # frames without color are drawn white
+            colors[top:top + height, left:left + width] = 255 if frame.colors is None else frame.colors
+    return AsciiFrame(glyphs, indices, colors)
+
+
+def run(sources: list, converter, output=sys.stdout, **kwargs) -> int:
+    """
+    Convert the newest frame of every source, together, and draw them as a
+    mosaic in the terminal until every source ended.
+
+    :param sources: the FrameSources to tile, started & stopped here
+    :param converter: the AsciiImageConverter to convert with
+    :param columns: the number of tiles per row (default: as square as possible)
+    :param fps: the highest rate to draw at (default: 30)
+    :param seconds: stop after this many seconds (default: when the sources end)
+    :return: the number of mosaics drawn
+    """
+    from ascii_webcam.terminal import TerminalRenderer
+    columns = kwargs.get("columns")
+    interval = 1 / kwargs.get("fps", 30.0)
+    seconds = kwargs.get("seconds")
+    renderer = TerminalRenderer(converter)
+
+    for source in sources:
+        source.start()
+    try:
+        # a source keeps its last frame until it has a newer one
+        images = [source.read() for source in sources]
+        if any(image is None for image in images):
+            return 0
+
+        ended = [False] * len(sources)
+        drawn = 0
+        end = None if seconds is None else time.perf_counter() + seconds
+        while not all(ended) and (end is None or time.perf_counter() < end):
+            due = time.perf_counter() + interval
+            mosaic = tile_frames(converter.convert_frames(images), columns)
+            output.write(renderer.render_frame(mosaic))
+            output.flush()
+            drawn += 1
+
+            for i, source in enumerate(sources):
+                if ended[i]:
+                    continue
+                try:
+                    image = source.read(timeout=max(due - time.perf_counter(), 0.0))
+                except TimeoutError:
+                    continue
+                if image is None:
+                    ended[i] = True
+                else:
+                    images[i] = image
+
+            # unpaced sources (videos, directories...) have a newer frame right away
+            time.sleep(max(due - time.perf_counter(), 0.0))
+        return drawn
+    finally:
+        for source in sources:
+            source.stop()
+
+
+def main(argv: Union[list, None] = None) -> None:
+    from ascii_webcam.convert import AsciiImageConverter
+    from ascii_webcam.gradients import PresetGradients
+    from ascii_webcam.sources import open_source
+    from ascii_webcam.terminal import ColorModes
+
+    parser = argparse.ArgumentParser(description="Convert several sources at once & tile them in the terminal")
+    parser.add_argument("sources", nargs="+", help="camera[:index], synthetic[:pattern], video files or directories of images")
+    parser.add_argument("-g", "--gradient", choices=PresetGradients.names(), default="ASCII")
+    parser.add_argument("-c", "--color-mode", choices=ColorModes, default="truecolor")
+    parser.add_argument("--no-color", action="store_true")
+    parser.add_argument("--width", type=int, default=60, help="the number of columns of every tile")
+    parser.add_argument("--columns", type=int, help="the number of tiles per row (default: as square as possible)")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--seconds", type=float, help="stop after this many seconds")
+    args = parser.parse_args(argv)
+
+    converter = AsciiImageConverter(
+        getattr(PresetGradients, args.gradient),
+        color=not args.no_color,
+        image_size=(None, args.width),
+        color_mode=args.color_mode,
+        # only camera previews should be mirrored, one converter serves every source
+        mirror=all(spec.startswith("camera") for spec in args.sources)
+    )
+    drawn = run([open_source(spec) for spec in args.sources], converter,
+                columns=args.columns, fps=args.fps, seconds=args.seconds)
+    print(f"drew {drawn} mosaics of {len(args.sources)} sources", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,6 @@ lightness, average, and normalization (experimental).
 
 """
 
-import cv2
 import numpy as np
 from typing import Callable, Union, Literal
 
@@ -21,6 +20,8 @@ ImageSizeType = tuple[Union[int, None], Union[int, None]]
 ModesType = Literal["luminance", "lightness", "average"]
 NormalizationModes = ["luminance", "lightness", "average"]
 
+LUMINANCE_WEIGHTS = np.array([0.2989, 0.5870, 0.1140], dtype=np.float32)
+
 
 class ImageNormalization:
     normalizer: Callable
@@ -39,18 +40,148 @@ class ImageNormalization:
         :param img_size: the size of the output image (width, height)
             - use None for automatic sizing
         """
+        self.mode = mode
         self.normalizer = self._map_mode(mode)
         if img_size is None:
             self.image_size = (DEFAULT_OUTPUT_WIDTH, None)
         else:
             self.image_size = img_size
 
+        # resize dimensions per input shape & the resize destination,
+        # reused across frames of the same shape
+        self._dimensions = {}
+        self._resize_buffer = None
+
     def normalize(self, image: np.ndarray) -> np.ndarray:
         """ use normalization to convert an image to ascii """
-        image_resized = image_resize(image, *self.image_size)
+        image_resized = self.resize(image)
         image_norm = self.normalizer(image_resized)
         return image_norm
 
+    def downsample(self, image: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Shrink the image to the output size once, and compute both the
+        intensity and the color of every cell from that one resize.
+
+        :param image: the image to downsample (height, width, 3)
+        :return: float32 intensities (h, w), uint8 colors (h, w, 3)
+        """
+        image_resized = self.resize(image)
+        intensities = self.normalizer(image_resized).astype(np.float32, copy=False)
+
+        # the resize buffer is reused next frame, so the colors are a copy
+        if image_resized.dtype == np.uint8:
+            colors = image_resized[..., :3].copy()
+        else:
+            colors = np.clip(image_resized[..., :3], 0, 255).astype(np.uint8)
+        return intensities, colors
+
+    def downsample_features(self, image: np.ndarray, grid: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Like downsample, but every cell keeps grid x grid sub-cell intensities.
+
+        :param image: the image to downsample (height, width, 3)
+        :param grid: the number of sub-cells along each side of a cell
+        :return: float32 features (h, w, grid, grid), uint8 colors (h, w, 3)
+        """
+        return self.split_cells(self.resize(image, grid), grid)
+
+    def split_cells(self, image_resized: np.ndarray, grid: Union[int, None] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The intensities & colors of pixels that were already resized to the output size.
+
+        :param image_resized: (..., h, w, 3), or (..., h * grid, w * grid, 3) for features
+        :param grid: the number of sub-cells along each side of a cell, None for one pixel per cell
+        :return: float32 intensities (..., h, w) or features (..., h, w, grid, grid),
+            uint8 colors (..., h, w, 3), which may be a view of image_resized
+        """
+        intensities = self.normalizer(image_resized).astype(np.float32, copy=False)
+        if grid is None:
+            colors = image_resized[..., :3]
+            if colors.dtype != np.uint8:
+                colors = np.clip(colors, 0, 255).astype(np.uint8)
+            return intensities, colors
+
+        # (..., rows * grid, cols * grid) -> (..., rows, cols, grid, grid)
+        *lead, height, width = intensities.shape
+        rows, cols = height // grid, width // grid
+        features = intensities.reshape(*lead, rows, grid, cols, grid).swapaxes(-3, -2)
+
+        # the color of a cell is the mean of its sub-cells
+        colors = image_resized[..., :3].reshape(*lead, rows, grid, cols, grid, 3).mean(axis=(-4, -2))
+        return features, np.clip(colors, 0, 255).astype(np.uint8)
+
+    def downsample_batch(self, images: list, grid: Union[int, None] = None) -> list[tuple[list, np.ndarray, np.ndarray]]:
+        """
+        Like downsample (or downsample_features, with grid), for many images at once.
+        Images that shrink to the same size are stacked, so the intensities &
+        colors of a whole stack are computed with one NumPy operation each.
+
+        :param images: the images to downsample, a list or an (n, height, width, 3) array
+        :param grid: the number of sub-cells along each side of a cell, None for downsample
+        :return: one (positions in images, intensities (n, h, w) or features
+            (n, h, w, grid, grid), uint8 colors (n, h, w, 3)) per output size
+        """
+        return [(positions, *self.split_cells(stack, grid))
+                for positions, stack in self.resize_batch(images, grid or 1)]
+
+    def resize_batch(self, images: list, grid: int = 1) -> list[tuple[list, np.ndarray]]:
+        """
+        Resize every image to the output size, into one new stack per output size.
+
+        :param images: the images to resize, a list or an (n, height, width, ...) array
+        :param grid: resize to grid x grid pixels per output cell
+        :return: one (positions in images, stack (n, h, w, ...)) per output size
+        """
+        import cv2
+        sizes = {}
+        for position, image in enumerate(images):
+            shape = image.shape[:2]
+            if shape not in self._dimensions:
+                self._dimensions[shape] = resize_dimensions(shape, *self.image_size)
+            dim = self._dimensions[shape] or (shape[1], shape[0])
+            key = (dim[1] * grid, dim[0] * grid, *image.shape[2:], image.dtype)
+            sizes.setdefault(key, []).append(position)
+
+        groups = []
+        for (height, width, *channels, dtype), positions in sizes.items():
+            stack = np.empty((len(positions), height, width, *channels), dtype=dtype)
+            for out, position in zip(stack, positions):
+                image = images[position]
+                if image.shape[:2] == (height, width):
+                    out[...] = image
+                else:
+                    # every slice of the stack is contiguous, resize straight into it
+                    cv2.resize(image, (width, height), dst=out, interpolation=cv2.INTER_AREA)
+            groups.append((positions, stack))
+        return groups
+
+    def resize(self, image: np.ndarray, grid: int = 1) -> np.ndarray:
+        """
+        Resize the image to the output size, into a buffer reused across frames.
+
+        :param image: the image to resize
+        :param grid: resize to grid x grid pixels per output cell
+        """
+        import cv2
+        shape = image.shape[:2]
+        if shape not in self._dimensions:
+            self._dimensions[shape] = resize_dimensions(shape, *self.image_size)
+
+        dim = self._dimensions[shape]
+        if dim is None and grid == 1:
+            return image
+        if dim is None:
+            dim = (shape[1], shape[0])
+        dim = (dim[0] * grid, dim[1] * grid)
+
+        out_shape = (dim[1], dim[0], *image.shape[2:])
+        buffer = self._resize_buffer
+        if buffer is None or buffer.shape != out_shape or buffer.dtype != image.dtype:
+            buffer = self._resize_buffer = np.empty(out_shape, dtype=image.dtype)
+
+        return cv2.resize(image, dim, dst=buffer, interpolation=cv2.INTER_AREA)
+
     @staticmethod
     def _map_mode(mode: ModesType) -> Callable:
         match mode:
@@ -63,44 +194,56 @@ class ImageNormalization:
     @staticmethod
     def calculate_luminance(image: np.ndarray) -> np.ndarray:
         """ use luminance to convert an image to ascii """
-        weights = [0.2989, 0.5870, 0.1140]  # or [0.2126, 0.7152, 0.0722]
-        return np.dot(image[..., :3], weights)  # matrix * scalar = dot product
+        weights = LUMINANCE_WEIGHTS  # or [0.2126, 0.7152, 0.0722]
+        # as float32, np.dot of uint8 pixels skips BLAS & is ~10x slower
+        return image[..., :3].astype(np.float32, copy=False) @ weights
 
     @staticmethod
     def calculate_lightness(image: np.ndarray) -> np.ndarray:
         """ use lightness to convert an image to ascii """
-        return (np.max(image, axis=2) + np.min(image, axis=2)) / 2
+        # add as float32, uint8 images would overflow
+        return np.add(np.max(image, axis=-1), np.min(image, axis=-1), dtype=np.float32) / 2
 
     @staticmethod
     def calculate_average(image: np.ndarray) -> np.ndarray:
         """ use average to convert an image to ascii """
-        return np.mean(image, axis=2)
+        return np.mean(image, axis=-1, dtype=np.float32)
 
     @staticmethod
     def calculate_norm(image: np.ndarray) -> np.ndarray:
         """ use normalization to convert an image to ascii """
-        return image[..., :3] / np.linalg.norm(image[..., :3], axis=2, keepdims=True)
+        return image[..., :3] / np.linalg.norm(image[..., :3], axis=-1, keepdims=True)
 
 
-def image_resize(image: np.ndarray, width=None, height=None, inter=cv2.INTER_AREA):
-    """ Resize an image """
-    h, w = image.shape[:2]
+def resize_dimensions(shape: tuple, width=None, height=None) -> Union[tuple[int, int], None]:
+    """ the cv2.resize dsize that image_resize uses for an image shape, None for no resize """
+    h, w = shape[:2]
 
     if height is None and width is None:
-        return image
+        return None
 
     elif width is None and height is not None:
         # get ratio of height to width
         r = height / float(w)
-        dim = (height, int(h * r))
+        return (height, int(h * r))
 
     elif height is None and width is not None:
         r = width / float(h)
-        dim = (int(h * r), width)
+        return (int(h * r), width)
 
     else:
         if height is None or width is None:  # for typing
             raise Exception("Unreachable Code")
-        dim = (int(width / float(h) * h), int(height / float(w) * w))
+        return (int(width / float(h) * h), int(height / float(w) * w))
+
 
+def image_resize(image: np.ndarray, width=None, height=None, inter=None):
+    """ Resize an image (default interpolation: cv2.INTER_AREA) """
+    import cv2
+    if inter is None:
+        inter = cv2.INTER_AREA
+
+    dim = resize_dimensions(image.shape, width, height)
+    if dim is None:
+        return image
     return cv2.resize(image, dim, interpolation=inter)
@@ -0,0 +1,194 @@
+"""
+17 October 2026
+
+`palette.py` This file contains the PaletteQuantizer class, which maps rgb
+colors to the xterm 256 color palette or the 16 ansi colors. Searching the
+closest palette entry for every cell of every frame is slow, so the closest
+entry is computed once for every bin of a 32x32x32 rgb grid. Quantizing a
+frame's color plane is then a single NumPy indexing operation.
+
+The lookup tables are cached in the user's cache directory (see cache.py),
+one small .npy file per palette, distance metric & grid size.
+
+The distance metric used to build a table can be
+    rgb: euclidean distance in rgb
+    redmean: rgb weighted by the mean red of the two colors, a cheap
+        approximation of perceived difference
+    cielab: euclidean distance in CIELAB (CIE76 delta E)
+"""
+
+import os
+import numpy as np
+from functools import lru_cache
+from typing import Literal
+from ascii_webcam.cache import cache_dir
+
+PaletteModesType = Literal["256", "16"]
+PaletteModes = ["256", "16"]
+
+DistanceMetricsType = Literal["rgb", "redmean", "cielab"]
+DistanceMetrics = ["rgb", "redmean", "cielab"]
+
+# 32 bins per channel
+LUT_BITS = 5
+LUT_VERSION = 1
+
+# the xterm 6x6x6 color cube levels & the 24 step grayscale ramp
+CUBE_LEVELS = np.array([0, 95, 135, 175, 215, 255])
+GRAY_LEVELS = np.arange(8, 248, 10)
+
+# the standard xterm rgb values of the 16 ansi colors
+ANSI_16 = np.array([
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+])
+
+
+def palette_colors(mode: PaletteModesType) -> tuple[np.ndarray, np.ndarray]:
+    """
+    The colors a palette can pick from.
+
+    :return: the palette index of each color (n, ), their rgb (n, 3)
+    """
+    match mode:
+        case "256":
+            # the first 16 colors depend on the terminal's theme, only the cube & ramp are fixed
+            cube = np.stack(np.meshgrid(CUBE_LEVELS, CUBE_LEVELS, CUBE_LEVELS, indexing="ij"), axis=-1)
+            gray = np.repeat(GRAY_LEVELS[:, None], 3, axis=1)
+            return np.arange(16, 256), np.concatenate((cube.reshape(-1, 3), gray))
+        case "16":
+            return np.arange(16), ANSI_16
+        case _:
+            raise ValueError(f"Invalid mode: {mode}")
+
+
+def srgb_to_lab(colors: np.ndarray) -> np.ndarray:
+    """ convert srgb (..., 3), 0 - 255 to CIELAB (D65) """
+    c = np.asarray(colors, dtype=np.float64) / 255
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ np.array([
+        [0.4124, 0.2126, 0.0193],
+        [0.3576, 0.7152, 0.1192],
+        [0.1805, 0.0722, 0.9505],
+    ]) / np.array([0.95047, 1.0, 1.08883])
+
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack((
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2]),
+    ), axis=-1)
+
+
+def color_distances(colors: np.ndarray, palette: np.ndarray, metric: DistanceMetricsType) -> np.ndarray:
+    """
+    The (squared) distance from every color to every palette color.
+
+    :param colors: rgb (n, 3)
+    :param palette: rgb (m, 3)
+    :return: distances (n, m)
+    """
+    colors = np.asarray(colors, dtype=np.float64)
+    palette = np.asarray(palette, dtype=np.float64)
+
+    match metric:
+        case "rgb":
+            diff = colors[:, None, :] - palette
+            return np.sum(diff ** 2, axis=-1)
+        case "redmean":
+            diff = colors[:, None, :] - palette
+            red = (colors[:, None, 0] + palette[:, 0]) / 2
+            weights = np.stack((2 + red / 256, np.full_like(red, 4), 2 + (255 - red) / 256), axis=-1)
+            return np.sum(weights * diff ** 2, axis=-1)
+        case "cielab":
+            diff = srgb_to_lab(colors)[:, None, :] - srgb_to_lab(palette)
+            return np.sum(diff ** 2, axis=-1)
+        case _:
+            raise ValueError(f"Invalid metric: {metric}")
+
+
+def build_palette_lut(mode: PaletteModesType, metric: DistanceMetricsType = "rgb", bits: int = LUT_BITS) -> np.ndarray:
+    """
+    The closest palette index for the center of every bin of the rgb grid.
+
+    :param mode: the palette, 256 or 16
+    :param metric: the distance metric, one of DistanceMetrics
+    :param bits: the bins per channel, as a power of two
+    :return: uint8 (2 ** bits, 2 ** bits, 2 ** bits), indexed [r >> (8 - bits), g >> ..., b >> ...]
+    """
+    indices, palette = palette_colors(mode)
+    size = 1 << bits
+    centers = (np.arange(size) + 0.5) * (256 / size) - 0.5
+    grid = np.stack(np.meshgrid(centers, centers, centers, indexing="ij"), axis=-1).reshape(-1, 3)
+
+    # one slab of red at a time, to keep the distance matrix small
+    lut = np.empty(len(grid), dtype=np.uint8)
+    step = size * size
+    for start in range(0, len(grid), step):
+        distances = color_distances(grid[start:start + step], palette, metric)
+        lut[start:start + step] = indices[distances.argmin(axis=1)]
+    return lut.reshape(size, size, size)
+
+
+@lru_cache(maxsize=None)
+def palette_lut(mode: PaletteModesType, metric: DistanceMetricsType = "rgb", bits: int = LUT_BITS, cache: bool = True) -> np.ndarray:
+    """
+    The lookup table of build_palette_lut, built once per process and cached on disk.
+
+    :param cache: read & write the table in the user cache directory
+    """
+    if metric not in DistanceMetrics:
+        raise ValueError(f"Invalid metric: {metric}")
+    shape = (1 << bits,) * 3
+    path = os.path.join(cache_dir(), f"palette_v{LUT_VERSION}_{mode}_{metric}_{bits}.npy")
+
+    if cache:
+        try:
+            lut = np.load(path)
+            if lut.shape == shape and lut.dtype == np.uint8:
+                return lut
+        except (OSError, ValueError):
+            pass
+
+    lut = build_palette_lut(mode, metric, bits)
+    if cache:
+        # write to a temporary file & swap, so readers never see a partial file
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                np.save(f, lut)
+            os.replace(temp_path, path)
+        except OSError:
+            # the cache is only an optimization, a read-only home is fine
+            pass
+    return lut
+
+
+class PaletteQuantizer:
+    def __init__(self, mode: PaletteModesType, metric: DistanceMetricsType = "rgb", bits: int = LUT_BITS, cache: bool = True):
+        """
+        Initialize the PaletteQuantizer class.
+
+        :param mode: the palette, 256 (xterm cube & grayscale ramp) or 16 (ansi colors)
+        :param metric: the distance metric the table is built with, one of DistanceMetrics
+        :param bits: the bins per channel of the table, as a power of two (default: 32 bins)
+        :param cache: cache the table on disk (default: True)
+        """
+        self.mode = mode
+        self.metric = metric
+        self.lut = palette_lut(mode, metric, bits, cache)
+        self.shift = 8 - bits
+
+    def __call__(self, colors: np.ndarray) -> np.ndarray:
+        """
+        Quantize colors.
+
+        :param colors: uint8 rgb (..., 3)
+        :return: the palette index of every color (...), uint8
+        """
+        colors = np.asarray(colors, dtype=np.uint8)
+        s = self.shift
+        return self.lut[colors[..., 0] >> s, colors[..., 1] >> s, colors[..., 2] >> s]
@@ -0,0 +1,251 @@
+"""
+17 October 2026
+
+`pipeline.py` This file contains the FramePipeline class. Instead of
+capturing, converting and drawing each frame in lockstep, the pipeline runs
+every stage (capture, normalize, map and render) on its own long-lived
+thread. The stages are connected by small bounded FrameQueues, and when a
+stage falls behind the queue in front of it drops frames (the oldest or the
+newest, depending on the policy) instead of blocking the stages before it.
+
+The consumer (e.g. the GUI) never waits on the conversion. It asks for the
+newest completed frame with `latest()`, and simply redraws the last one if
+nothing new has finished since.
+"""
+
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Literal, Union
+
+DropPolicyType = Literal["oldest", "newest", "block"]
+DropPolicies = ["oldest", "newest", "block"]
+
+
+class PipelineStopped(Exception):
+    """ raised inside a stage when the pipeline is stopped """
+
+
+class FrameQueue:
+    def __init__(self, maxsize: int = 1, policy: DropPolicyType = "oldest"):
+        """
+        Initialize the FrameQueue class.
+
+        :param maxsize: the number of frames the queue holds
+        :param policy: what to do when a frame is put into a full queue
+            -- Policy must be one of the following --
+            oldest: drop the oldest queued frame to make room
+            newest: drop the frame being put
+            block: wait for room, like queue.Queue
+        """
+        if policy not in DropPolicies:
+            raise ValueError(f"Invalid policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items = deque()
+        self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, item: Any) -> bool:
+        """ put a frame in the queue, returns False if a frame was dropped """
+        with self.condition:
+            if self.policy == "block":
+                while len(self.items) >= self.maxsize and not self.closed:
+                    self.condition.wait()
+            if self.closed:
+                raise PipelineStopped()
+
+            dropped = len(self.items) >= self.maxsize
+            if dropped:
+                self.dropped += 1
+                if self.policy == "newest":
+                    return False
+                self.items.popleft()
+
+            self.items.append(item)
+            self.condition.notify_all()
+            return not dropped
+
+    def get(self, timeout: Union[float, None] = None) -> Any:
+        """ take the next frame, waiting for one to arrive """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items or self.closed, timeout):
+                raise TimeoutError()
+            if not self.items:
+                raise PipelineStopped()
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def close(self) -> None:
+        """ wake up every waiting stage, and refuse new frames """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class Stage(threading.Thread):
+    def __init__(self, name: str, func: Callable, inbox: Union[FrameQueue, None], outbox: FrameQueue):
+        """
+        Initialize the Stage class. A stage takes frames from its inbox, passes
+        them through func & puts the result in its outbox, until it is stopped.
+
+        :param name: the name of the stage (and its thread)
+        :param func: the work of the stage, func(frame) -> frame. Return None to
+            skip a frame. The first stage has no inbox and is called as func()
+        :param inbox: the queue to take frames from, None for the first stage
+        :param outbox: the queue to put finished frames in
+        """
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.running = True
+        self.processed = 0
+        self.error: Union[BaseException, None] = None
+
+        # how long func took for the last frame, not counting the wait for it
+        self.last_seconds = 0.0
+
+    def run(self):
+        try:
+            while self.running:
+                if self.inbox is None:
+                    start = time.perf_counter()
+                    result = self.func()
+                else:
+                    item = self.inbox.get()
+                    start = time.perf_counter()
+                    result = self.func(item)
+                self.last_seconds = time.perf_counter() - start
+                if result is not None:
+                    self.outbox.put(result)
+                    self.processed += 1
+        except PipelineStopped:
+            pass
+        except BaseException as error:
+            # keep the error around for the owner of the pipeline
+            self.error = error
+            self.outbox.close()
+
+    def stop(self):
+        self.running = False
+
+
+class LatestFrame:
+    """ the end of a pipeline, holds only the newest completed frame """
+
+    def __init__(self):
+        self.item = None
+        self.sequence = 0
+        self.taken = 0
+        self.dropped = 0
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def put(self, item: Any) -> bool:
+        with self.lock:
+            if self.closed:
+                raise PipelineStopped()
+            # the previous frame was replaced before anyone saw it
+            if self.sequence > self.taken:
+                self.dropped += 1
+            self.item = item
+            self.sequence += 1
+        return True
+
+    def take(self) -> tuple[int, Any]:
+        """ the newest frame & its sequence number, the frame is not consumed """
+        with self.lock:
+            self.taken = self.sequence
+            return self.sequence, self.item
+
+    def close(self) -> None:
+        with self.lock:
+            self.closed = True
+
+
+class FramePipeline:
+    def __init__(self, capture: Callable, converter, render: Union[Callable, None] = None, **kwargs):
+        """
+        Initialize the FramePipeline class.
+
+        :param capture: returns the next image to convert, called in a loop on
+            the capture thread (return None to skip)
+        :param converter: the AsciiImageConverter to convert with. It may be
+            replaced at any time through `pipeline.converter`, frames already in
+            flight finish with the converter they started with
+        :param render: render(converter, AsciiFrame) -> frame, optional last
+            stage, e.g. composing the glyphs into pixels
+        :param maxsize: the size of the queues between stages (default: 1)
+        :param policy: oldest, newest or block (default: oldest)
+        """
+        self.converter = converter
+        maxsize = kwargs.get("maxsize", 1)
+        policy = kwargs.get("policy", "oldest")
+
+        self.output = LatestFrame()
+        self.queues = [FrameQueue(maxsize, policy) for _ in range(3 if render else 2)]
+        outboxes = [*self.queues, self.output]
+
+        functions = [("capture", capture), ("normalize", self._normalize), ("map", self._map)]
+        if render:
+            functions.append(("render", lambda item: render(*item)))
+
+        inboxes = [None, *self.queues]
+        self.stages = [
+            Stage(name, func, inbox, outbox)
+            for (name, func), inbox, outbox in zip(functions, inboxes, outboxes)
+        ]
+
+    def _normalize(self, image):
+        converter = self.converter
+        return converter, *converter.downsample_image(image)
+
+    @staticmethod
+    def _map(item):
+        converter, intensities, colors = item
+        return converter, converter.map_frame(intensities, colors)
+
+    def start(self) -> "FramePipeline":
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    def stop(self, timeout: Union[float, None] = 1.0) -> None:
+        """ stop every stage & wait for their threads to finish """
+        for stage in self.stages:
+            stage.stop()
+        for queue in self.queues:
+            queue.close()
+        self.output.close()
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def latest(self) -> tuple[int, Any]:
+        """
+        The newest completed frame, without waiting.
+
+        :return: (sequence number, frame). The sequence number only changes when a
+            new frame completed, frame is None until the first frame completes
+        """
+        for stage in self.stages:
+            if stage.error is not None:
+                raise stage.error
+        return self.output.take()
+
+    @property
+    def work_seconds(self) -> float:
+        """ the time the stages after capture spent on their last frame, end to end """
+        return sum(stage.last_seconds for stage in self.stages[1:])
+
+    @property
+    def dropped(self) -> dict:
+        """ the number of frames dropped in front of each stage """
+        names = [stage.name for stage in self.stages[1:]] + ["output"]
+        counts = [queue.dropped for queue in self.queues] + [self.output.dropped]
+        return dict(zip(names, counts))
@@ -0,0 +1,369 @@
+"""
+17 October 2026
+
+`recording.py` This file contains the recording format for converted frames.
+A RecordingWriter appends AsciiFrames to a file as they are converted, and a
+Recording reads them back from a memory map, so a session can be replayed or
+scrubbed through without converting anything again.
+
+The file is laid out as
+    header    magic, version, frame & glyph table counts, offset of the index
+    records   a glyph table record before the first frame that uses it, then
+              one record per frame: its time, glyph table, size & planes
+              (stored as is, or zlib compressed)
+    index     the offset of every glyph table, the offset & time of every frame
+
+The index is written when the recording is closed, so recording never seeks.
+Any frame is found through the index in O(1), and only that frame's record is
+read from the map. A recording that was never closed (e.g. the program
+crashed) is still readable, its records are scanned once when it is opened.
+
+Usage: python -m ascii_webcam.recording record synthetic -o session.asciirec --seconds 10
+       python -m ascii_webcam.recording play session.asciirec
+"""
+
+import os
+import sys
+import mmap
+import time
+import zlib
+import struct
+import argparse
+import numpy as np
+from typing import Iterator, Union
+from ascii_webcam.frame import AsciiFrame, GLYPH_SEPARATOR, plane_flags, read_planes
+
+RECORDING_EXTENSION = ".asciirec"
+
+# magic, version, flags, frame count, glyph table count, index offset
+HEADER = struct.Struct("<4sBBHIIQ")
+MAGIC = b"ASCR"
+VERSION = 1
+
+# time, glyph table, flags, rows, columns, payload size
+RECORD = struct.Struct("<dHBxIII")
+
+# record flags, on top of the FLAG_COLOR & FLAG_WIDE plane flags
+FLAG_COMPRESSED = 4
+FLAG_TABLE = 8
+
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("time", "<f8")])
+
+
+class RecordingWriter:
+    def __init__(self, path: str, **kwargs):
+        """
+        Initialize the RecordingWriter class.
+
+        :param path: the file to record to, it is overwritten
+        :param compress: zlib compress every frame record (default: False)
+        :param level: the zlib compression level (default: 1)
+        """
+        self.path = path
+        self.compress = kwargs.get("compress", False)
+        self.level = kwargs.get("level", 1)
+
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0, 0, 0))
+
+        # glyph table -> its id, and the offsets for the index
+        self.tables: dict[tuple, int] = {}
+        self.table_offsets = []
+        self.frames = []
+        self.start: Union[float, None] = None
+
+    def write(self, frame: AsciiFrame, timestamp: Union[float, None] = None) -> None:
+        """
+        Append a frame.
+
+        :param frame: the converted frame
+        :param timestamp: when the frame was captured, perf_counter seconds (default: now)
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        if self.start is None:
+            self.start = timestamp
+        seconds = timestamp - self.start
+
+        table = self._table(frame.glyphs, seconds)
+        flags = plane_flags(frame.indices, frame.colors)
+        payload = frame.planes_bytes()
+        if self.compress:
+            payload = zlib.compress(payload, self.level)
+            flags |= FLAG_COMPRESSED
+
+        self.frames.append((self.file.tell(), seconds))
+        self.file.write(RECORD.pack(seconds, table, flags, *frame.shape, len(payload)))
+        self.file.write(payload)
+
+    def _table(self, glyphs: list, seconds: float) -> int:
+        """ the id of a glyph table, writing it the first time it is used """
+        key = tuple(glyphs)
+        table = self.tables.get(key)
+        if table is None:
+            table = self.tables[key] = len(self.tables)
+            payload = GLYPH_SEPARATOR.join(glyphs).encode()
+            self.table_offsets.append(self.file.tell())
+            self.file.write(RECORD.pack(seconds, table, FLAG_TABLE, 0, 0, len(payload)))
+            self.file.write(payload)
+        return table
+
+    def close(self) -> None:
+        """ write the index & finish the header """
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.table_offsets, dtype="<u8").tobytes())
+        self.file.write(np.array(self.frames, dtype=INDEX_DTYPE).tobytes())
+
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, 0, len(self.frames), len(self.tables), index_offset))
+        self.file.close()
+
+    def __enter__(self) -> "RecordingWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class Recording:
+    def __init__(self, path: str):
+        """
+        Initialize the Recording class, memory maps a recording.
+
+        :param path: the recording to read
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, _, frame_count, table_count, index_offset = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Invalid recording: {path}")
+
+        if index_offset:
+            tables = np.frombuffer(self.map, dtype="<u8", count=table_count, offset=index_offset)
+            index = np.frombuffer(self.map, dtype=INDEX_DTYPE, count=frame_count,
+                                  offset=index_offset + tables.nbytes)
+            # copies, the map can not be closed while anything points into it
+            table_offsets, self.index = tables.tolist(), index.copy()
+        else:
+            table_offsets, self.index = self._scan()
+
+        self.tables = [self._read_table(offset) for offset in table_offsets]
+        self.times = self.index["time"]
+
+    def _scan(self) -> tuple[list, np.ndarray]:
+        """ rebuild the index of a recording that was never closed, from its records """
+        table_offsets, frames = [], []
+        offset, size = HEADER.size, len(self.map)
+        while offset + RECORD.size <= size:
+            seconds, _, flags, _, _, payload_size = RECORD.unpack_from(self.map, offset)
+            if offset + RECORD.size + payload_size > size:
+                # the last record was cut off
+                break
+            if flags & FLAG_TABLE:
+                table_offsets.append(offset)
+            else:
+                frames.append((offset, seconds))
+            offset += RECORD.size + payload_size
+        return table_offsets, np.array(frames, dtype=INDEX_DTYPE)
+
+    def _read_table(self, offset: int) -> list:
+        *_, payload_size = RECORD.unpack_from(self.map, offset)
+        start = offset + RECORD.size
+        return self.map[start:start + payload_size].decode().split(GLYPH_SEPARATOR)
+
+    @property
+    def duration(self) -> float:
+        """ the time of the last frame, in seconds """
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, index: int) -> AsciiFrame:
+        """ decode a frame, uncompressed frames are read-only views of the map """
+        offset = int(self.index["offset"][index])
+        _, table, flags, rows, columns, payload_size = RECORD.unpack_from(self.map, offset)
+        start = offset + RECORD.size
+
+        if flags & FLAG_COMPRESSED:
+            payload = zlib.decompress(self.map[start:start + payload_size])
+            return AsciiFrame(self.tables[table], *read_planes(payload, 0, flags, rows, columns))
+        return AsciiFrame(self.tables[table], *read_planes(self.map, start, flags, rows, columns))
+
+    def __iter__(self) -> Iterator[AsciiFrame]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def index_at(self, seconds: float) -> int:
+        """ the index of the frame shown at a time, in seconds since the first frame """
+        return max(int(np.searchsorted(self.times, seconds, side="right")) - 1, 0)
+
+    def frame_at(self, seconds: float) -> AsciiFrame:
+        return self[self.index_at(seconds)]
+
+    def close(self) -> None:
+        try:
+            self.map.close()
+        except BufferError:
+            # frames still point into the map, it is closed once they are gone
+            pass
+        self.file.close()
+
+    def __enter__(self) -> "Recording":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class Playback:
+    def __init__(self, recording: Recording, loop: bool = True, speed: float = 1.0):
+        """
+        Initialize the Playback class, plays a recording in real time.
+
+        :param recording: the recording to play
+        :param loop: start over after the last frame
+        :param speed: the playback speed, 2.0 plays twice as fast
+        """
+        # there is no frame to show, e.g. the recorder stopped before the first one
+        if len(recording) == 0:
+            raise ValueError(f"Invalid recording: {recording.path} has no frames")
+
+        self.recording = recording
+        self.loop = loop
+        self.speed = speed
+        self.paused = False
+
+        # the position when playback (re)started, and when that was
+        self.origin = 0.0
+        self.started = time.perf_counter()
+
+    @property
+    def position(self) -> float:
+        """ the playback position, in seconds since the first frame """
+        position = self.origin
+        if not self.paused:
+            position += (time.perf_counter() - self.started) * self.speed
+
+        duration = self.recording.duration
+        if self.loop and duration > 0:
+            return position % duration
+        return min(position, duration)
+
+    def seek(self, seconds: float) -> None:
+        """ jump to a position, in seconds since the first frame """
+        self.origin = min(max(seconds, 0.0), self.recording.duration)
+        self.started = time.perf_counter()
+
+    def skip(self, seconds: float) -> None:
+        """ jump forwards (or backwards, for negative seconds) """
+        self.seek(self.position + seconds)
+
+    def toggle_pause(self) -> None:
+        self.seek(self.position)
+        self.paused = not self.paused
+
+    def current(self) -> tuple[int, AsciiFrame]:
+        """ the index & frame at the current position """
+        index = self.recording.index_at(self.position)
+        return index, self.recording[index]
+
+
+def record(source, converter, path: str, seconds: Union[float, None] = None, **kwargs) -> int:
+    """
+    Convert the frames of a FrameSource & record them, until the source ends or time is up.
+
+    :param source: the FrameSource to record, started & stopped here
+    :param converter: the AsciiImageConverter to convert with
+    :param path: the file to record to
+    :param seconds: stop after this many seconds (default: when the source ends)
+    :param kwargs: passed on to RecordingWriter
+    :return: the number of frames recorded
+    """
+    end = None if seconds is None else time.perf_counter() + seconds
+    with source, RecordingWriter(path, **kwargs) as writer:
+        while end is None or time.perf_counter() < end:
+            frame = source.read()
+            if frame is None:
+                break
+            writer.write(converter.convert_frame(frame))
+        return len(writer.frames)
+
+
+def play(recording: Recording, output=sys.stdout, loop: bool = False) -> None:
+    """ play a recording in the terminal, at the speed it was recorded """
+    from ascii_webcam.terminal import CLEAR, HOME, TerminalEncoder
+    encoder = TerminalEncoder("truecolor")
+    playback = Playback(recording, loop=loop)
+
+    output.write(CLEAR)
+    drawn = -1
+    while loop or drawn < len(recording) - 1:
+        index, frame = playback.current()
+        if index != drawn:
+            output.write(HOME + encoder.encode_frame(frame))
+            output.flush()
+            drawn = index
+        time.sleep(0.005)
+
+
+def main(argv: Union[list, None] = None) -> None:
+    from ascii_webcam.gradients import PresetGradients
+
+    parser = argparse.ArgumentParser(description="Record & replay converted ascii frames")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record a source")
+    record_parser.add_argument("source", help="camera[:index], synthetic[:pattern], a video file or a directory of images")
+    record_parser.add_argument("-o", "--output", required=True, help=f"the recording (e.g. session{RECORDING_EXTENSION})")
+    record_parser.add_argument("-g", "--gradient", choices=PresetGradients.names(), default="ASCII")
+    record_parser.add_argument("--width", type=int, default=100, help="the number of columns")
+    record_parser.add_argument("--seconds", type=float, help="stop after this many seconds")
+    record_parser.add_argument("--compress", action="store_true", help="zlib compress every frame")
+
+    play_parser = commands.add_parser("play", help="play a recording in the terminal")
+    play_parser.add_argument("recording")
+    play_parser.add_argument("--loop", action="store_true")
+
+    info_parser = commands.add_parser("info", help="describe a recording")
+    info_parser.add_argument("recording")
+    args = parser.parse_args(argv)
+
+    match args.command:
+        case "record":
+            from ascii_webcam.convert import AsciiImageConverter
+            from ascii_webcam.sources import open_source
+
+            # only a camera preview should be mirrored
+            converter = AsciiImageConverter(
+                getattr(PresetGradients, args.gradient),
+                color=True,
+                image_size=(None, args.width),
+                mirror=args.source.startswith("camera")
+            )
+            count = record(open_source(args.source), converter, args.output,
+                           seconds=args.seconds, compress=args.compress)
+            print(f"recorded {count} frames to {args.output}", file=sys.stderr)
+
+        case "play":
+            with Recording(args.recording) as recording:
+                if len(recording) == 0:
+                    parser.error(f"Invalid recording: {args.recording} has no frames")
+                play(recording, loop=args.loop)
+
+        case "info":
+            with Recording(args.recording) as recording:
+                size = os.path.getsize(args.recording)
+                shape = recording[0].shape if len(recording) else (0, 0)
+                print(f"{len(recording)} frames, {recording.duration:.2f}s, "
+                      f"{shape[1]}x{shape[0]} cells, {len(recording.tables)} glyph tables, "
+                      f"{size / max(len(recording), 1) / 1024:.1f} KiB per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+17 October 2026
+
+`server.py` This file contains the StreamServer class. It broadcasts one
+converted stream (a camera, a video, ... any FrameSource) to many viewers,
+over plain TCP (e.g. `telnet localhost 2323` or `nc localhost 2323`) and over
+WebSockets.
+
+Every frame is converted once, and encoded once per output format that has a
+viewer (text, truecolor, 256 or 16 color). Every viewer then gets the same
+shared bytes. Each viewer has its own small queue: when a viewer cannot keep
+up, its oldest queued frame is dropped instead of slowing down the others.
+The server tracks how many frames & seconds behind each viewer is.
+
+A viewer picks its format by sending its name as a line (TCP) or a message
+(WebSocket), or with the WebSocket path, e.g. ws://localhost:8765/256
+
+Usage: python -m ascii_webcam.server --source camera --tcp-port 2323 --ws-port 8765
+"""
+
+import sys
+import time
+import base64
+import struct
+import asyncio
+import hashlib
+import argparse
+import itertools
+from typing import Union
+from ascii_webcam.convert import AsciiImageConverter
+from ascii_webcam.frame import AsciiFrame
+from ascii_webcam.gradients import PresetGradients
+from ascii_webcam.sources import FrameSource, open_source
+from ascii_webcam.terminal import ColorModes, TerminalEncoder, CLEAR, HOME, RESET
+
+StreamFormats = ["text", *ColorModes]
+DEFAULT_QUEUE_SIZE = 2
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# viewers only send format names & pings, longer frames close the connection
+MAX_CONTROL_PAYLOAD = 125
+MAX_MESSAGE_PAYLOAD = 4096
+CLOSE_TOO_BIG = 1009
+
+
+class Client:
+    _ids = itertools.count(1)
+
+    def __init__(self, writer: asyncio.StreamWriter, kind: str, fmt: str, queue_size: int):
+        """
+        Initialize the Client class, one connected viewer.
+
+        :param writer: the connection to the viewer
+        :param kind: tcp or websocket
+        :param fmt: the format the viewer receives, one of StreamFormats
+        :param queue_size: the number of frames queued for the viewer before dropping
+        """
+        self.id = next(self._ids)
+        self.writer = writer
+        self.kind = kind
+        self.format = fmt
+        self.queue = asyncio.Queue(queue_size)
+        self.address = writer.get_extra_info("peername")
+
+        # delivery stats, lag is measured when a frame finished writing
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.lag_frames = 0
+        self.lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def offer(self, item: tuple) -> None:
+        """ queue a frame, dropping the oldest queued frame if the viewer is behind """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    def stats(self) -> dict:
+        return {
+            "id": self.id,
+            "address": str(self.address),
+            "kind": self.kind,
+            "format": self.format,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "bytes_sent": self.bytes_sent,
+            "queued": self.queue.qsize(),
+            "lag_frames": self.lag_frames,
+            "lag_seconds": round(self.lag_seconds, 4),
+            "max_lag_seconds": round(self.max_lag_seconds, 4),
+        }
+
+
+class StreamServer:
+    def __init__(self, source: FrameSource, converter: AsciiImageConverter, **kwargs):
+        """
+        Initialize the StreamServer class.
+
+        :param source: the frames to broadcast, started by the server
+        :param converter: the converter, its gradient & size decide the output
+        :param host: the interface to listen on (default: localhost)
+        :param tcp_port: the port for TCP viewers, None to disable (default: 2323)
+        :param ws_port: the port for WebSocket viewers, None to disable (default: 8765)
+        :param tcp_format: the format TCP viewers start with (default: truecolor)
+        :param queue_size: the frames queued per viewer before dropping (default: 2)
+        """
+        self.source = source
+        self.converter = converter
+        self.host = kwargs.get("host", "localhost")
+        self.tcp_port = kwargs.get("tcp_port", 2323)
+        self.ws_port = kwargs.get("ws_port", 8765)
+        self.tcp_format = kwargs.get("tcp_format", "truecolor")
+        self.queue_size = kwargs.get("queue_size", DEFAULT_QUEUE_SIZE)
+        if self.tcp_format not in StreamFormats:
+            raise ValueError(f"Invalid format: {self.tcp_format}")
+
+        # one encoder per format, shared by every viewer of that format
+        self.encoders = {fmt: TerminalEncoder("truecolor" if fmt == "text" else fmt)
+                         for fmt in StreamFormats}
+
+        self.clients: dict[int, Client] = {}
+        self.handlers: set[asyncio.Task] = set()
+        self.servers = []
+        self.sequence = 0
+        self.encodes = 0
+        self.stopping: Union[asyncio.Event, None] = None
+
+    async def start(self) -> "StreamServer":
+        """ start listening, the ports are updated if 0 was passed """
+        self.stopping = asyncio.Event()
+        if self.tcp_port is not None:
+            server = await asyncio.start_server(self._serve_tcp, self.host, self.tcp_port)
+            self.tcp_port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+        if self.ws_port is not None:
+            server = await asyncio.start_server(self._serve_websocket, self.host, self.ws_port)
+            self.ws_port = server.sockets[0].getsockname()[1]
+            self.servers.append(server)
+        self.source.start()
+        return self
+
+    async def serve(self) -> None:
+        """ start, and broadcast until the source ends or stop() is called """
+        await self.start()
+        try:
+            await self.broadcast()
+        finally:
+            await self.close()
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    async def close(self) -> None:
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        # abort, a viewer that stopped reading would never let a close flush
+        for client in list(self.clients.values()):
+            client.writer.transport.abort()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        self.source.stop()
+
+    async def broadcast(self) -> None:
+        """ convert every frame once & hand it to every viewer """
+        while not self.stopping.is_set():
+            try:
+                frame = await asyncio.to_thread(self.source.read, 0.5)
+            except TimeoutError:
+                continue
+            if frame is None:
+                break
+
+            captured = time.perf_counter()
+            ascii_frame = await asyncio.to_thread(self.converter.convert_frame, frame)
+            self.sequence += 1
+
+            # encode only the formats someone is watching, once each, then frame
+            # that text once per kind of viewer
+            texts, payloads = {}, {}
+            for client in list(self.clients.values()):
+                if client.format not in texts:
+                    texts[client.format] = self._encode(client.format, ascii_frame)
+                key = (client.format, client.kind)
+                if key not in payloads:
+                    payloads[key] = self._payload(client.kind, texts[client.format])
+                client.offer((self.sequence, captured, payloads[key]))
+
+    def _encode(self, fmt: str, frame: AsciiFrame) -> str:
+        self.encodes += 1
+        return self.encoders[fmt].encode_frame(frame, color=fmt != "text")
+
+    @staticmethod
+    def _payload(kind: str, text: str) -> bytes:
+        if kind == "websocket":
+            return websocket_frame(text.encode())
+        # terminals need \r\n, and the cursor back home for every frame
+        return (HOME + text.replace("\n", "\r\n")).encode()
+
+    def stats(self) -> dict:
+        """ the number of frames & encodes, and the delivery stats of every viewer """
+        return {
+            "frames": self.sequence,
+            "encodes": self.encodes,
+            "clients": [client.stats() for client in self.clients.values()],
+        }
+
+    async def _serve_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = Client(writer, "tcp", self.tcp_format, self.queue_size)
+        writer.write(CLEAR.encode())
+        await self._serve_client(client, self._read_tcp(reader, client))
+
+    async def _read_tcp(self, reader: asyncio.StreamReader, client: Client) -> None:
+        # a line with the name of a format switches to it
+        while line := await reader.readline():
+            fmt = line.decode(errors="ignore").strip()
+            if fmt in StreamFormats:
+                client.format = fmt
+                client.writer.write((RESET + CLEAR).encode())
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            path, headers = await read_http_request(reader)
+        except (ValueError, asyncio.IncompleteReadError):
+            writer.close()
+            return
+
+        key = headers.get("sec-websocket-key")
+        if key is None or headers.get("upgrade", "").lower() != "websocket":
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            writer.close()
+            return
+
+        accept = base64.b64encode(hashlib.sha1(key.encode() + WEBSOCKET_GUID).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                     b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+
+        fmt = path.strip("/").split("?")[0]
+        client = Client(writer, "websocket", fmt if fmt in StreamFormats else "text", self.queue_size)
+        await self._serve_client(client, self._read_websocket(reader, client))
+
+    async def _read_websocket(self, reader: asyncio.StreamReader, client: Client) -> None:
+        while True:
+            try:
+                opcode, payload = await read_websocket_frame(reader)
+            except ValueError:
+                # too long to be a format name, without reading the payload
+                client.writer.write(websocket_frame(struct.pack("!H", CLOSE_TOO_BIG), opcode=0x8))
+                return
+            match opcode:
+                case 0x1:
+                    fmt = payload.decode(errors="ignore").strip()
+                    if fmt in StreamFormats:
+                        client.format = fmt
+                case 0x8:
+                    client.writer.write(websocket_frame(payload[:2], opcode=0x8))
+                    return
+                case 0x9:
+                    client.writer.write(websocket_frame(payload, opcode=0xA))
+
+    async def _serve_client(self, client: Client, read) -> None:
+        """ send queued frames until the viewer disconnects """
+        self.clients[client.id] = client
+        self.handlers.add(asyncio.current_task())
+        reading = asyncio.ensure_future(read)
+        try:
+            while not reading.done():
+                getting = asyncio.ensure_future(client.queue.get())
+                await asyncio.wait([getting, reading], return_when=asyncio.FIRST_COMPLETED)
+                if not getting.done():
+                    getting.cancel()
+                    break
+
+                sequence, captured, payload = getting.result()
+                client.writer.write(payload)
+                await client.writer.drain()
+
+                client.sent += 1
+                client.bytes_sent += len(payload)
+                client.lag_frames = self.sequence - sequence
+                client.lag_seconds = time.perf_counter() - captured
+                client.max_lag_seconds = max(client.max_lag_seconds, client.lag_seconds)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            reading.cancel()
+            if reading.done() and not reading.cancelled():
+                reading.exception()
+            del self.clients[client.id]
+            self.handlers.discard(asyncio.current_task())
+            client.writer.close()
+
+
+async def read_http_request(reader: asyncio.StreamReader) -> tuple[str, dict]:
+    """ read the request line & headers of an http request, returns (path, lowercase headers) """
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, _ = lines[0].split(" ", 2)
+    if method != "GET":
+        raise ValueError(f"Invalid method: {method}")
+
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return path, headers
+
+
+def websocket_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """ a single, unmasked (server to client) websocket frame """
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_websocket_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """
+    Read one (masked, client to server) websocket frame.
+
+    :return: (opcode, payload)
+    :raises ValueError: when the frame is longer than MAX_CONTROL_PAYLOAD (control
+        frames) or MAX_MESSAGE_PAYLOAD (other frames), its payload is not read
+    """
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+
+    limit = MAX_CONTROL_PAYLOAD if opcode & 0x8 else MAX_MESSAGE_PAYLOAD
+    if length > limit:
+        raise ValueError(f"Invalid frame length: {length} (at most {limit})")
+
+    mask = await reader.readexactly(4) if second & 0x80 else b"\0\0\0\0"
+    payload = await reader.readexactly(length)
+
+    # xor the whole payload at once, with the mask repeated over its length
+    mask = (mask * (length // 4 + 1))[:length]
+    unmasked = (int.from_bytes(payload, "big") ^ int.from_bytes(mask, "big")).to_bytes(length, "big")
+    return opcode, unmasked
+
+
+def main(argv: Union[list, None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Broadcast an ascii stream over TCP & WebSockets")
+    parser.add_argument("-s", "--source", default="camera",
+                        help="camera[:index], synthetic[:pattern], a video file or a directory of images")
+    parser.add_argument("-g", "--gradient", choices=PresetGradients.names(), default="ASCII")
+    parser.add_argument("--width", type=int, default=100, help="the number of columns")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--tcp-port", type=int, default=2323)
+    parser.add_argument("--ws-port", type=int, default=8765)
+    parser.add_argument("--tcp-format", choices=StreamFormats, default="truecolor")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    args = parser.parse_args(argv)
+
+    # only a camera preview should be mirrored
+    source = open_source(args.source, loop=True)
+    converter = AsciiImageConverter(
+        getattr(PresetGradients, args.gradient),
+        color=True,
+        image_size=(None, args.width),
+        mirror=args.source.startswith("camera")
+    )
+    server = StreamServer(
+        source, converter,
+        host=args.host,
+        tcp_port=args.tcp_port,
+        ws_port=args.ws_port,
+        tcp_format=args.tcp_format,
+        queue_size=args.queue_size
+    )
+
+    async def run():
+        await server.start()
+        if server.tcp_port is not None:
+            print(f"tcp: telnet {server.host} {server.tcp_port}", file=sys.stderr)
+        if server.ws_port is not None:
+            print(f"websocket: ws://{server.host}:{server.ws_port}/<format>", file=sys.stderr)
+        try:
+            await server.broadcast()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+17 October 2026
+
+`sources.py` This file contains the FrameSource class & its implementations:
+a camera (pygame.camera), a video file (cv2.VideoCapture), a directory of
+images and a synthetic test pattern. Every source decodes on its own
+background thread into a small ring of preallocated buffers, so reading a
+frame never waits on the camera or the decoder, and nothing needs a display
+or a camera to be tested or benchmarked.
+
+Frames are uint8 rgb, (height, width, 3) or with x_major=True (width, height, 3)
+like pygame.surfarray.
+
+Use open_source to build a source from a string, e.g. "camera", "camera:1",
+"synthetic:bars", a video file or a directory of images.
+"""
+
+import os
+import time
+import threading
+import numpy as np
+from typing import Literal, Union
+
+PatternsType = Literal["gradient", "bars", "noise"]
+Patterns = ["gradient", "bars", "noise"]
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+DEFAULT_FRAME_SIZE = (640, 480)
+
+# the newest frame, the frame the reader holds & one being written
+DEFAULT_BUFFERS = 3
+
+
+class FrameSource:
+    def __init__(self, **kwargs):
+        """
+        Initialize the FrameSource class. Subclasses implement `open` & `grab`.
+
+        :param x_major: hand out frames as (width, height, 3), like pygame.surfarray (default: False)
+        :param buffers: the number of preallocated frame buffers, at least 3 (default: 3)
+        :param fps: produce at most this many frames per second (default: as fast as possible)
+        :param telemetry: a Telemetry to record the decode time of every frame in
+        """
+        self.x_major = kwargs.get("x_major", False)
+        self.buffer_count = max(DEFAULT_BUFFERS, kwargs.get("buffers", DEFAULT_BUFFERS))
+        self.fps = kwargs.get("fps", None)
+        self.telemetry = kwargs.get("telemetry", None)
+
+        self.size: Union[tuple[int, int], None] = None
+        self.buffers: Union[np.ndarray, None] = None
+
+        # the ring... frames are published by sequence number, the reader holds one slot
+        self.condition = threading.Condition()
+        self.sequence = 0
+        self.read_sequence = 0
+        self.latest_slot: Union[int, None] = None
+        self.held_slot: Union[int, None] = None
+        self.next_slot = 0
+        self.dropped = 0
+
+        self.running = False
+        self.ended = False
+        self.error: Union[BaseException, None] = None
+        self.thread: Union[threading.Thread, None] = None
+
+    def open(self) -> tuple[int, int]:
+        """ open the source, returns the (width, height) of its frames """
+        raise NotImplementedError
+
+    def grab(self, out: np.ndarray) -> bool:
+        """
+        Decode the next frame into out, (height, width, 3) rgb. out may be a transposed
+        view of the buffer, so write into it instead of replacing it.
+
+        :return: False when the source has no more frames
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """ release the camera / file, called on the source's thread when it stops """
+
+    def start(self) -> "FrameSource":
+        self.size = self.open()
+        width, height = self.size
+        shape = (width, height, 3) if self.x_major else (height, width, 3)
+        self.buffers = np.zeros((self.buffer_count, *shape), dtype=np.uint8)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout: Union[float, None] = 1.0) -> None:
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def read(self, timeout: Union[float, None] = None, copy: bool = False) -> Union[np.ndarray, None]:
+        """
+        Wait for a frame newer than the last one read.
+
+        :param timeout: seconds to wait, raises TimeoutError when no frame arrived
+        :param copy: return a copy. Otherwise the frame is a view of the ring, which
+            stays valid until the next call to read
+        :return: the newest frame, or None when the source ended
+        """
+        with self.condition:
+            ready = lambda: self.sequence > self.read_sequence or self.ended
+            if not self.condition.wait_for(ready, timeout):
+                raise TimeoutError()
+            if self.error is not None:
+                raise self.error
+            if self.sequence == self.read_sequence:
+                return None
+
+            self.held_slot = self.latest_slot
+            self.read_sequence = self.sequence
+            frame = self.buffers[self.held_slot]
+        return frame.copy() if copy else frame
+
+    def _take_slot(self) -> int:
+        # the writer never touches the newest frame or the one the reader holds
+        with self.condition:
+            for _ in range(self.buffer_count):
+                slot = self.next_slot
+                self.next_slot = (self.next_slot + 1) % self.buffer_count
+                if slot != self.latest_slot and slot != self.held_slot:
+                    return slot
+        raise RuntimeError("no free frame buffer")
+
+    def _run(self):
+        due = time.perf_counter()
+        try:
+            while self.running:
+                slot = self._take_slot()
+                out = self.buffers[slot]
+                if self.x_major:
+                    out = out.transpose(1, 0, 2)
+
+                start = time.perf_counter()
+                if not self.grab(out):
+                    break
+                if self.telemetry is not None:
+                    self.telemetry.record("decode", time.perf_counter() - start)
+
+                with self.condition:
+                    # the previous frame was replaced before anyone read it
+                    if self.sequence > self.read_sequence:
+                        self.dropped += 1
+                    self.latest_slot = slot
+                    self.sequence += 1
+                    self.condition.notify_all()
+
+                if self.fps:
+                    # when running behind, catch up without bursting
+                    due = max(due + 1 / self.fps, time.perf_counter())
+                    time.sleep(max(0.0, due - time.perf_counter()))
+        except BaseException as error:
+            # keep the error around for the reader
+            self.error = error
+        finally:
+            self.close()
+            with self.condition:
+                self.ended = True
+                self.condition.notify_all()
+
+    def __enter__(self) -> "FrameSource":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+class CameraSource(FrameSource):
+    def __init__(self, device: int = 0, **kwargs):
+        """
+        Initialize the CameraSource class.
+
+        :param device: the index of the camera in pygame.camera.list_cameras()
+        :param size: the (width, height) to ask the camera for (default: 640x480)
+        """
+        super().__init__(**kwargs)
+        self.device = device
+        self.requested_size = kwargs.get("size", DEFAULT_FRAME_SIZE)
+        self.camera = None
+
+    def open(self) -> tuple[int, int]:
+        import pygame.camera
+        pygame.camera.init()
+        cameras = pygame.camera.list_cameras()
+        if self.device >= len(cameras):
+            raise IOError(f"Could not find camera: {self.device}")
+
+        self.camera = pygame.camera.Camera(cameras[self.device], self.requested_size)
+        self.camera.start()
+        return self.camera.get_image().get_size()
+
+    def grab(self, out: np.ndarray) -> bool:
+        import pygame.surfarray
+        surface = self.camera.get_image()
+
+        # surfarray pixels are (x, y), the buffer is written as (y, x)
+        np.copyto(out, pygame.surfarray.pixels3d(surface).transpose(1, 0, 2))
+        return True
+
+    def close(self) -> None:
+        if self.camera is not None:
+            self.camera.stop()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path: str, **kwargs):
+        """
+        Initialize the VideoFileSource class.
+
+        :param path: the video file to play
+        :param loop: start over at the end of the video (default: False)
+        :param realtime: play at the frame rate of the video, instead of as
+            fast as it decodes (default: True)
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        self.loop = kwargs.get("loop", False)
+        self.realtime = kwargs.get("realtime", True)
+        self.capture = None
+        self.decoded = None
+
+    def open(self) -> tuple[int, int]:
+        import cv2
+        self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            raise IOError(f"Could not read video from path: {self.path}")
+
+        if self.realtime and not self.fps:
+            self.fps = self.capture.get(cv2.CAP_PROP_FPS) or None
+        return (int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def grab(self, out: np.ndarray) -> bool:
+        import cv2
+        ok, self.decoded = self.capture.read(self.decoded)
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, self.decoded = self.capture.read(self.decoded)
+        if not ok:
+            return False
+        _store_bgr(self.decoded, out)
+        return True
+
+    def close(self) -> None:
+        if self.capture is not None:
+            self.capture.release()
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, path: str, **kwargs):
+        """
+        Initialize the ImageDirectorySource class. The images are shown in the order
+        of their file names, and resized to the size of the first one.
+
+        :param path: the directory of images
+        :param loop: start over after the last image (default: True)
+        :param fps: the number of images per second (default: 30)
+        """
+        kwargs.setdefault("fps", 30)
+        super().__init__(**kwargs)
+        self.path = path
+        self.loop = kwargs.get("loop", True)
+        self.files = []
+        self.position = 0
+
+    def open(self) -> tuple[int, int]:
+        self.files = sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            raise IOError(f"Could not find any images in: {self.path}")
+
+        first = self._load(self.files[0])
+        return first.shape[1], first.shape[0]
+
+    def grab(self, out: np.ndarray) -> bool:
+        import cv2
+        if self.position == len(self.files):
+            if not self.loop:
+                return False
+            self.position = 0
+
+        image = self._load(self.files[self.position])
+        self.position += 1
+        height, width = out.shape[:2]
+        if image.shape[:2] != (height, width):
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+        _store_bgr(image, out)
+        return True
+
+    @staticmethod
+    def _load(path: str) -> np.ndarray:
+        import cv2
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise IOError(f"Could not read image from path: {path}")
+        return image
+
+
+class SyntheticSource(FrameSource):
+    def __init__(self, pattern: PatternsType = "gradient", **kwargs):
+        """
+        Initialize the SyntheticSource class, a moving test pattern.
+
+        :param pattern: what to draw
+            -- Pattern must be one of the following --
+            gradient: smooth color ramps with a moving wave
+            bars: vertical color bars scrolling sideways
+            noise: uniform random noise (nothing to compress, worst case)
+        :param size: the (width, height) of the frames (default: 640x480)
+        :param seed: the seed of the noise pattern
+        """
+        if pattern not in Patterns:
+            raise ValueError(f"Invalid pattern: {pattern}")
+        super().__init__(**kwargs)
+        self.pattern = pattern
+        self.frame_size = kwargs.get("size", DEFAULT_FRAME_SIZE)
+        self.rng = np.random.default_rng(kwargs.get("seed", 0))
+        self.frame_index = 0
+
+    def open(self) -> tuple[int, int]:
+        width, height = self.frame_size
+        y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+        self.ramp = np.stack((255 * x / width, 255 * y / height), axis=-1).astype(np.uint8)
+        self.x, self.y = x[0], y[:, 0]
+        return width, height
+
+    def grab(self, out: np.ndarray) -> bool:
+        t = self.frame_index
+        self.frame_index += 1
+
+        match self.pattern:
+            case "gradient":
+                out[..., :2] = self.ramp
+                wave = np.sin(self.x / 23 + t / 5)[None, :] * np.cos(self.y / 17 - t / 7)[:, None]
+                out[..., 2] = (127.5 + 127.5 * wave).astype(np.uint8)
+            case "bars":
+                bars = ((self.x + 4 * t) // 80).astype(np.int64) % 8
+                colors = np.array([[(i >> 2 & 1) * 255, (i >> 1 & 1) * 255, (i & 1) * 255]
+                                   for i in range(8)], dtype=np.uint8)
+                out[...] = colors[bars][None, :, :]
+            case "noise":
+                out[...] = self.rng.integers(0, 256, out.shape, dtype=np.uint8)
+        return True
+
+
+def _store_bgr(image: np.ndarray, out: np.ndarray) -> None:
+    """ write a cv2 bgr image into an rgb frame buffer """
+    import cv2
+    if out.flags.c_contiguous:
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=out)
+    else:
+        np.copyto(out, image[..., ::-1])
+
+
+def open_source(spec: str, **kwargs) -> FrameSource:
+    """
+    Build a FrameSource from a string.
+
+    :param spec: camera[:index], synthetic[:pattern], a directory of images or a video file
+    :param kwargs: passed on to the source
+    :return: the source, not started yet
+    """
+    kind, _, argument = spec.partition(":")
+    match kind:
+        case "camera":
+            return CameraSource(int(argument or 0), **kwargs)
+        case "synthetic":
+            return SyntheticSource(argument or "gradient", **kwargs)
+
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, **kwargs)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, **kwargs)
+    raise ValueError(f"Invalid source: {spec}")
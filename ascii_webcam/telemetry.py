@@ -0,0 +1,219 @@
+"""
+17 October 2026
+
+`telemetry.py` This file contains the Telemetry class. Telemetry records how
+long each stage of a frame takes (camera grab, array conversion, normalization,
+glyph mapping, rendering...) into small fixed-size ring buffers, and when each
+stage last completed, so it can report rolling latencies, FPS and histograms.
+
+Telemetry is off by default. A disabled Telemetry hands out a shared no-op
+timer, so leaving the instrumentation in the hot paths costs a method call
+per stage. Set ASCII_WEBCAM_TELEMETRY=1 to turn it on for the GUI, and
+ASCII_WEBCAM_TELEMETRY_LOG=path to also write a snapshot as a JSON line to
+that file every second.
+
+Each stage should be timed from a single thread at a time (which is how the
+FramePipeline runs them), the ring buffers are not locked.
+"""
+
+import os
+import json
+import time
+import threading
+import numpy as np
+from typing import TextIO, Union
+
+DEFAULT_CAPACITY = 256
+DUMP_INTERVAL = 1.0
+
+# histogram bucket edges, in milliseconds (roughly 1000 / fps for common frame rates)
+HISTOGRAM_EDGES = np.array([0, 0.5, 1, 2, 4, 8, 16.7, 33.3, 66.7, 133.3, np.inf])
+
+
+class RingBuffer:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """ a fixed-size buffer of floats, that overwrites the oldest value once full """
+        self.values = np.zeros(capacity)
+        self.count = 0
+
+    def append(self, value: float) -> None:
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+
+    def snapshot(self) -> np.ndarray:
+        """ a copy of the stored values, oldest first """
+        count, capacity = self.count, len(self.values)
+        if count <= capacity:
+            return self.values[:count].copy()
+        start = count % capacity
+        return np.concatenate((self.values[start:], self.values[:start]))
+
+    def __len__(self) -> int:
+        return min(self.count, len(self.values))
+
+
+class _NullTimer:
+    """ the timer of a disabled Telemetry, does nothing """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("buffer", "start")
+
+    def __init__(self, buffer: RingBuffer):
+        self.buffer = buffer
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.buffer.append(time.perf_counter() - self.start)
+        return False
+
+
+class Telemetry:
+    def __init__(self, enabled: bool = False, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initialize the Telemetry class.
+
+        :param enabled: record timings, can be changed at any time
+        :param capacity: the number of samples kept per stage
+        """
+        self.enabled = enabled
+        self.capacity = capacity
+
+        # stage -> durations (seconds), name -> completion times (perf_counter)
+        self.durations: dict[str, RingBuffer] = {}
+        self.ticks: dict[str, RingBuffer] = {}
+        self._timers: dict[str, _StageTimer] = {}
+
+        self._dump_thread: Union[threading.Thread, None] = None
+        self._dump_stop = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "Telemetry":
+        """ a Telemetry configured by ASCII_WEBCAM_TELEMETRY & ASCII_WEBCAM_TELEMETRY_LOG """
+        log_path = os.environ.get("ASCII_WEBCAM_TELEMETRY_LOG")
+        enabled = os.environ.get("ASCII_WEBCAM_TELEMETRY", "0") not in ("", "0") or bool(log_path)
+        telemetry = cls(enabled=enabled)
+        if log_path:
+            telemetry.start_dump(log_path)
+        return telemetry
+
+    def stage(self, name: str):
+        """
+        Time a stage, use as `with telemetry.stage("map"): ...`
+
+        :param name: the name of the stage
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _StageTimer(self._buffer(self.durations, name))
+        return timer
+
+    def record(self, name: str, seconds: float) -> None:
+        """ record the duration of a stage that was timed elsewhere """
+        if self.enabled:
+            self._buffer(self.durations, name).append(seconds)
+
+    def tick(self, name: str) -> None:
+        """ mark that something (e.g. a displayed frame) completed now, for its FPS """
+        if self.enabled:
+            self._buffer(self.ticks, name).append(time.perf_counter())
+
+    def fps(self, name: str) -> float:
+        """ the rolling rate of the ticks of name, per second """
+        buffer = self.ticks.get(name)
+        if buffer is None or len(buffer) < 2:
+            return 0.0
+        times = buffer.snapshot()
+        elapsed = times[-1] - times[0]
+        return float((len(times) - 1) / elapsed) if elapsed > 0 else 0.0
+
+    def stats(self, name: str) -> dict:
+        """ the rolling latency of a stage: count, mean, p50, p99 & max in milliseconds """
+        buffer = self.durations.get(name)
+        if buffer is None or not len(buffer):
+            return {"count": 0}
+        values = buffer.snapshot() * 1000
+        p50, p99 = np.percentile(values, [50, 99])
+        return {
+            "count": buffer.count,
+            "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(values.max()), 3),
+        }
+
+    def histogram(self, name: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The latency histogram of a stage.
+
+        :return: counts, bucket edges in milliseconds (len(counts) + 1)
+        """
+        buffer = self.durations.get(name)
+        values = buffer.snapshot() * 1000 if buffer is not None else np.zeros(0)
+        counts, _ = np.histogram(values, bins=HISTOGRAM_EDGES)
+        return counts, HISTOGRAM_EDGES
+
+    def snapshot(self) -> dict:
+        """ every stage's stats & histogram and every FPS, as plain json-able values """
+        stages = {}
+        for name in list(self.durations):
+            stats = self.stats(name)
+            stats["histogram"] = self.histogram(name)[0].tolist()
+            stages[name] = stats
+        return {
+            "time": round(time.time(), 3),
+            "stages": stages,
+            "fps": {name: round(self.fps(name), 2) for name in list(self.ticks)},
+            "histogram_edges_ms": [edge if np.isfinite(edge) else None for edge in HISTOGRAM_EDGES.tolist()],
+        }
+
+    def dump(self, stream: TextIO) -> None:
+        """ write a snapshot to a stream, as one JSON line """
+        stream.write(json.dumps(self.snapshot()) + "\n")
+        stream.flush()
+
+    def start_dump(self, path: str, interval: float = DUMP_INTERVAL) -> None:
+        """ append a snapshot to a JSON lines file every interval seconds, on a background thread """
+        self.stop_dump()
+        self._dump_stop.clear()
+
+        def run():
+            with open(path, "a", encoding="utf-8") as f:
+                while not self._dump_stop.wait(interval):
+                    self.dump(f)
+
+        self._dump_thread = threading.Thread(target=run, name="telemetry-dump", daemon=True)
+        self._dump_thread.start()
+
+    def stop_dump(self) -> None:
+        if self._dump_thread is not None:
+            self._dump_stop.set()
+            self._dump_thread.join()
+            self._dump_thread = None
+
+    def reset(self) -> None:
+        """ forget every recorded sample """
+        self.durations.clear()
+        self.ticks.clear()
+        self._timers.clear()
+
+    def _buffer(self, buffers: dict, name: str) -> RingBuffer:
+        buffer = buffers.get(name)
+        if buffer is None:
+            buffer = buffers[name] = RingBuffer(self.capacity)
+        return buffer
@@ -0,0 +1,289 @@
+"""
+17 October 2026
+
+`terminal.py` This file contains the TerminalEncoder class. This is the
+class that turns an AsciiFrame (the glyph indices and colors from the
+AsciiImageConverter) into a string that can be written to a terminal. Instead of wrapping every
+character in its own color escape, the encoder only emits an escape when the
+color changes, so runs of identical colors share a single escape.
+
+The encoder supports truecolor, 256 color and 16 color terminals. Colors are
+mapped to the 256 and 16 color palettes through the precomputed lookup tables
+of palette.py.
+
+We also export a TerminalRenderer class, for live output. It keeps the last
+frame that was drawn and only redraws the cells that changed since.
+"""
+
+import numpy as np
+from typing import TYPE_CHECKING, Union, Literal
+from ascii_webcam.palette import ANSI_16, CUBE_LEVELS, GRAY_LEVELS, DistanceMetricsType, PaletteQuantizer
+
+if TYPE_CHECKING:
+    from ascii_webcam.frame import AsciiFrame
+
+ESC = "\x1b["
+RESET = ESC + "0m"
+HOME = ESC + "H"
+CLEAR = ESC + "2J"
+
+ColorModesType = Literal["truecolor", "256", "16"]
+ColorModes = ["truecolor", "256", "16"]
+
+
+class TerminalEncoder:
+    def __init__(self, mode: ColorModesType = "truecolor", metric: DistanceMetricsType = "rgb"):
+        """
+        Initialize the TerminalEncoder class.
+
+        :param mode: the color escapes to use
+            -- Mode must be one of the following --
+            truecolor: 24 bit rgb escapes
+            256: xterm 256 color palette escapes
+            16: standard ansi color escapes
+        :param metric: <256 & 16 only> how the closest palette color is picked,
+            rgb, redmean or cielab (see palette.py)
+        """
+        self.mode = mode
+        self.metric = metric
+        self.quantize = self._map_mode(mode)
+
+        # the size of the encoded frames, in bytes
+        self.last_frame_bytes = 0
+        self.total_bytes = 0
+        self.frames = 0
+
+    @property
+    def average_frame_bytes(self) -> float:
+        """ the average size of an encoded frame, in bytes """
+        return self.total_bytes / self.frames if self.frames else 0.0
+
+    def encode(self, glyphs: list, indices: np.ndarray, colors: Union[np.ndarray, None] = None) -> str:
+        """
+        Encode a converted image for the terminal.
+
+        :param glyphs: the glyph table that the indices point into
+        :param indices: glyph indices (height, width)
+        :param colors: uint8 rgb of each cell (height, width, 3), or None for no color
+        :return: the frame, rows separated by newlines
+        """
+        rows = self.join_rows(glyphs, indices)
+
+        if colors is None:
+            frame = "\n".join(rows)
+        else:
+            frame = "\n".join(self._encode_runs(rows, colors))
+
+        self.last_frame_bytes = len(frame.encode())
+        self.total_bytes += self.last_frame_bytes
+        self.frames += 1
+        return frame
+
+    def encode_frame(self, frame: "AsciiFrame", color: bool = True) -> str:
+        """
+        Encode an AsciiFrame for the terminal.
+
+        :param frame: the converted image
+        :param color: emit color escapes, if the frame has colors
+        :return: the frame, rows separated by newlines
+        """
+        colors = frame.colors if color else None
+        if colors is not None:
+            return self.encode(frame.glyphs, frame.indices, colors)
+
+        # without escapes, the frame builds its text in one pass
+        text = frame.to_text()
+        self.last_frame_bytes = len(text.encode())
+        self.total_bytes += self.last_frame_bytes
+        self.frames += 1
+        return text
+
+    def escape_codes(self, colors: np.ndarray) -> tuple[np.ndarray, list]:
+        """
+        Map every cell color to a key, and every distinct key to its escape.
+
+        :param colors: uint8 rgb of each cell (..., 3)
+        :return: the key of each cell (...), the escape for each key
+        """
+        codes = self.quantize(colors)
+        keys, inverse = np.unique(codes, return_inverse=True)
+        return inverse.reshape(codes.shape), [self.escape(int(key)) for key in keys]
+
+    def _encode_runs(self, rows: list, colors: np.ndarray) -> list:
+        keys, escapes = self.escape_codes(colors)
+
+        # a run starts where the color differs from the previous cell,
+        # carrying the current color over from the end of the last row
+        flat = keys.ravel()
+        starts = np.ones(flat.shape, dtype=bool)
+        starts[1:] = flat[1:] != flat[:-1]
+        starts = starts.reshape(keys.shape)
+
+        lines = []
+        for row, key_row, start_row in zip(rows, keys, starts):
+            positions = np.flatnonzero(start_row).tolist()
+            pieces = [row[:positions[0]]] if positions else [row]
+            for start, end in zip(positions, positions[1:] + [len(row)]):
+                pieces.append(escapes[key_row[start]])
+                pieces.append(row[start:end])
+            lines.append("".join(pieces))
+
+        if lines:
+            lines[-1] += RESET
+        return lines
+
+    def escape(self, key: int) -> str:
+        """ the escape that selects a quantized color """
+        match self.mode:
+            case "truecolor": return f"{ESC}38;2;{key >> 16};{(key >> 8) & 255};{key & 255}m"
+            case "256": return f"{ESC}38;5;{key}m"
+            case "16": return f"{ESC}{30 + key if key < 8 else 82 + key}m"
+
+    def _map_mode(self, mode: ColorModesType):
+        match mode:
+            case "truecolor": return TerminalEncoder.pack_rgb
+            case "256" | "16": return PaletteQuantizer(mode, self.metric)
+            case _: raise ValueError(f"Invalid mode: {mode}")
+
+    @staticmethod
+    def join_rows(glyphs: list, indices: np.ndarray) -> list:
+        """ build the text of every row from the glyph table """
+        chars = np.array(glyphs)[indices]
+
+        # single character glyphs can be joined by viewing each row as one string
+        if chars.dtype.itemsize == np.dtype("U1").itemsize and chars.ndim == 2 and chars.shape[1]:
+            return np.ascontiguousarray(chars).view(f"U{chars.shape[1]}").ravel().tolist()
+        return ["".join(row) for row in chars]
+
+    @staticmethod
+    def pack_rgb(colors: np.ndarray) -> np.ndarray:
+        """ pack rgb into a single integer, 0xRRGGBB """
+        colors = colors.astype(np.uint32)
+        return (colors[..., 0] << 16) | (colors[..., 1] << 8) | colors[..., 2]
+
+    @staticmethod
+    def quantize_256(colors: np.ndarray) -> np.ndarray:
+        """
+        map rgb to the closest color of the xterm 256 color cube or grayscale ramp,
+        searched per color. The encoder uses the faster PaletteQuantizer
+        """
+        colors = colors.astype(np.int32)
+
+        # closest level of the 6x6x6 cube, per channel
+        levels = np.abs(colors[..., None] - CUBE_LEVELS).argmin(axis=-1)
+        cube = 16 + 36 * levels[..., 0] + 6 * levels[..., 1] + levels[..., 2]
+        cube_dist = np.sum((CUBE_LEVELS[levels] - colors) ** 2, axis=-1)
+
+        # closest step of the grayscale ramp
+        gray = np.abs(colors.mean(axis=-1)[..., None] - GRAY_LEVELS).argmin(axis=-1)
+        gray_dist = np.sum((GRAY_LEVELS[gray][..., None] - colors) ** 2, axis=-1)
+
+        return np.where(gray_dist < cube_dist, 232 + gray, cube)
+
+    @staticmethod
+    def quantize_16(colors: np.ndarray) -> np.ndarray:
+        """ map rgb to the closest of the 16 ansi colors, searched per color """
+        diff = colors.astype(np.int32)[..., None, :] - ANSI_16
+        return np.sum(diff ** 2, axis=-1).argmin(axis=-1)
+
+
+class TerminalRenderer:
+    def __init__(self, converter, threshold: float = 0.5):
+        """
+        Initialize the TerminalRenderer class.
+
+        :param converter: the AsciiImageConverter to convert frames with, its
+            terminal_encoder decides the color escapes
+        :param threshold: redraw the whole screen when more than this fraction
+            of the cells changed since the last frame (0 - 1)
+        """
+        self.converter = converter
+        self.threshold = threshold
+
+        # the last frame that was drawn
+        self.glyphs = None
+        self.indices = None
+        self.codes = None
+
+        # the size of the rendered frames, in bytes
+        self.last_frame_bytes = 0
+        self.full_redraws = 0
+
+    @property
+    def encoder(self) -> TerminalEncoder:
+        return self.converter.terminal_encoder
+
+    def reset(self) -> None:
+        """ forget the last frame, the next frame will be a full redraw """
+        self.glyphs = self.indices = self.codes = None
+
+    def render(self, image: np.ndarray) -> str:
+        """ convert an image & return the output that updates the terminal to it """
+        return self.render_frame(self.converter.convert_frame(image))
+
+    def render_frame(self, frame: "AsciiFrame") -> str:
+        """
+        Diff a converted frame against the last frame drawn.
+
+        :param frame: the converted image
+        :return: cursor moves & writes for the changed cells, or a full redraw
+        """
+        glyphs, indices, colors = frame.glyphs, frame.indices, frame.colors
+        codes = None if colors is None else self.encoder.quantize(colors)
+
+        if self._needs_full_redraw(glyphs, indices, codes):
+            output = CLEAR + HOME + self.encoder.encode_frame(frame)
+            self.full_redraws += 1
+        else:
+            changed = self.indices != indices
+            if codes is not None:
+                changed |= self.codes != codes
+
+            if changed.mean() > self.threshold:
+                output = HOME + self.encoder.encode_frame(frame)
+                self.full_redraws += 1
+            else:
+                output = self._encode_changes(glyphs, indices, codes, changed)
+
+        self.glyphs, self.indices, self.codes = glyphs, indices.copy(), codes
+        self.last_frame_bytes = len(output.encode())
+        return output
+
+    def _needs_full_redraw(self, glyphs: list, indices: np.ndarray, codes) -> bool:
+        return (
+            self.indices is None
+            or self.glyphs != glyphs
+            or self.indices.shape != indices.shape
+            or (self.codes is None) != (codes is None)
+        )
+
+    def _encode_changes(self, glyphs: list, indices: np.ndarray, codes, changed: np.ndarray) -> str:
+        rows = self.encoder.join_rows(glyphs, indices)
+
+        # runs of changed cells, as flat (start, end) pairs
+        width = changed.shape[1]
+        padded = np.zeros((changed.shape[0], width + 2), dtype=np.int8)
+        padded[:, 1:-1] = changed
+        edges = np.diff(padded, axis=1)
+        run_rows, run_starts = np.nonzero(edges == 1)
+        run_ends = np.nonzero(edges == -1)[1]
+
+        pieces = []
+        current = None
+        for y, start, end in zip(run_rows.tolist(), run_starts.tolist(), run_ends.tolist()):
+            pieces.append(f"{ESC}{y + 1};{start + 1}H")
+            if codes is None:
+                pieces.append(rows[y][start:end])
+                continue
+
+            # only emit a color escape where the color differs from the last one written
+            run_codes = codes[y, start:end].tolist()
+            for x, code in enumerate(run_codes, start=start):
+                if code != current:
+                    pieces.append(self.encoder.escape(code))
+                    current = code
+                pieces.append(rows[y][x])
+
+        if current is not None:
+            pieces.append(RESET)
+        return "".join(pieces)
@@ -0,0 +1,158 @@
+"""
+17 October 2026
+
+`tiled.py` This file converts images too large to hold in memory, like huge
+scans & panoramas. Instead of decoding the whole image and resizing it, the
+image is read in horizontal strips, and every strip is downsampled straight
+into its rows of the (small) output grid. Only a few strips are in memory at
+once, so the peak memory is bounded by the strip size, not the image size.
+
+Images are read from
+    .npy files, memory-mapped (np.load(mmap_mode="r"))
+    raw files, memory-mapped with a given shape & dtype
+    encoded images, decoded at a reduced resolution where the decoder
+        supports it (JPEG is scaled while decoding by 1/2, 1/4 or 1/8, other
+        formats are decoded in full)
+
+Strips can be downsampled on several threads, cv2.resize releases the GIL.
+"""
+
+import os
+import math
+import mmap
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+from ascii_webcam.normalize import ImageSizeType, resize_dimensions
+
+# the number of source rows per strip
+DEFAULT_STRIP_ROWS = 512
+
+# the decoder scales JPEGs by these factors
+REDUCED_DECODES = {8: "IMREAD_REDUCED_COLOR_8", 4: "IMREAD_REDUCED_COLOR_4", 2: "IMREAD_REDUCED_COLOR_2"}
+
+# keep at least this many decoded pixels per output pixel, for the area filter
+MIN_PIXELS_PER_OUTPUT = 2
+
+
+def output_dimensions(shape: tuple, image_size: ImageSizeType, grid: int = 1) -> tuple[int, int]:
+    """ the (width, height) in pixels that an image of shape is downsampled to """
+    dim = resize_dimensions(shape, *image_size) or (shape[1], shape[0])
+    return dim[0] * grid, dim[1] * grid
+
+
+def open_image(path: str, image_size: ImageSizeType, grid: int = 1, **kwargs) -> np.ndarray:
+    """
+    Open a large image without reading it all into memory.
+
+    :param path: a .npy file, a raw file (with raw_shape) or an encoded image
+    :param image_size: the output size of the converter, to pick the decoded resolution
+    :param grid: the pixels per output cell along each side
+    :param raw_shape: the (height, width, channels) of a raw file
+    :param raw_dtype: the dtype of a raw file (default: uint8)
+    :return: (height, width, channels) or (height, width) pixels, rgb for encoded images,
+        a read-only memory map for .npy & raw files
+    """
+    if kwargs.get("raw_shape") is not None:
+        return np.memmap(path, dtype=kwargs.get("raw_dtype", np.uint8), mode="r", shape=tuple(kwargs["raw_shape"]))
+    if os.path.splitext(path)[1].lower() == ".npy":
+        return np.load(path, mmap_mode="r")
+    return decode_reduced(path, image_size, grid)
+
+
+def decode_reduced(path: str, image_size: ImageSizeType, grid: int = 1) -> np.ndarray:
+    """ decode an image at the lowest resolution that still covers the output size, as rgb """
+    import cv2
+    from PIL import Image
+
+    # the header is enough to know the size, & huge images are expected here
+    limit, Image.MAX_IMAGE_PIXELS = Image.MAX_IMAGE_PIXELS, None
+    try:
+        with Image.open(path) as header:
+            width, height = header.size
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+    out_width, out_height = output_dimensions((height, width), image_size, grid)
+
+    flag = cv2.IMREAD_COLOR
+    for factor, name in REDUCED_DECODES.items():
+        if min(width // factor / out_width, height // factor / out_height) >= MIN_PIXELS_PER_OUTPUT:
+            flag = getattr(cv2, name)
+            break
+
+    image = cv2.imread(path, flag)
+    if image is None:
+        raise IOError(f"Could not read image from path: {path}")
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+
+
+def strip_bounds(height: int, out_height: int, strip_rows: int) -> list[tuple[int, int, int, int]]:
+    """
+    Split the output rows into strips of about strip_rows source rows.
+
+    :return: (first output row, end output row, first source row, end source row) per strip
+    """
+    rows_per_output = height / out_height
+    outputs_per_strip = max(1, int(strip_rows / rows_per_output))
+
+    bounds = []
+    for start in range(0, out_height, outputs_per_strip):
+        end = min(start + outputs_per_strip, out_height)
+        bounds.append((start, end, int(start * rows_per_output), min(height, math.ceil(end * rows_per_output))))
+    return bounds
+
+
+def release_rows(image: np.ndarray, start: int, end: int) -> None:
+    """
+    Drop the pages of rows start - end of a memory map from memory, once they were
+    downsampled. They are read from the file again if they are needed.
+    """
+    mapping = getattr(image, "_mmap", None)
+    if mapping is None or not hasattr(mapping, "madvise"):
+        return
+
+    # the offset of the rows in the mapping, in whole pages inside the rows
+    offset = image.ctypes.data - np.frombuffer(mapping, dtype=np.uint8).ctypes.data
+    first = -(-(offset + start * image.strides[0]) // mmap.PAGESIZE) * mmap.PAGESIZE
+    last = (offset + end * image.strides[0]) // mmap.PAGESIZE * mmap.PAGESIZE
+    if last > first:
+        mapping.madvise(mmap.MADV_DONTNEED, first, last - first)
+
+
+def downsample_strips(image: np.ndarray, dsize: tuple[int, int], strip_rows: int = DEFAULT_STRIP_ROWS,
+                      workers: Union[int, None] = None) -> np.ndarray:
+    """
+    Area-downsample an image one strip at a time, into a new (height, width, 3) array.
+
+    :param image: (height, width, channels) or (height, width) pixels, e.g. a memory map
+    :param dsize: the (width, height) to downsample to
+    :param strip_rows: the number of source rows read per strip, bounds the memory
+        to workers x strip_rows x width x channels (memory maps are released strip by strip)
+    :param workers: the number of threads downsampling strips (default: 1)
+    """
+    import cv2
+    out_width, out_height = dsize
+    channels = image.shape[2] if image.ndim == 3 else 1
+    out = np.empty((out_height, out_width, channels), dtype=image.dtype)
+
+    def downsample(bounds: tuple) -> None:
+        start, end, source_start, source_end = bounds
+        # a slice of rows is contiguous, cv2 reads it straight from the map. A source
+        # row that straddles two strips counts fully in both, a few levels at most
+        strip = np.asarray(image[source_start:source_end])
+        resized = cv2.resize(strip, (out_width, end - start), interpolation=cv2.INTER_AREA)
+        out[start:end] = resized.reshape(end - start, out_width, channels)
+        release_rows(image, source_start, source_end)
+
+    bounds = strip_bounds(image.shape[0], out_height, strip_rows)
+    if (workers or 1) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(downsample, bounds))
+    else:
+        for strip in bounds:
+            downsample(strip)
+
+    # gray images get three equal channels, alpha is dropped
+    if channels == 1:
+        return np.repeat(out, 3, axis=2)
+    return out[..., :3]
@@ -0,0 +1,105 @@
+"""
+17 October 2026
+
+`tone.py` This file contains the Tone class, the color options of the
+converter: invert, grayscale, gamma & contrast. Applying them to a camera
+frame costs a few operations per pixel, millions per frame, before the
+converter shrinks it to a few thousand cells. Instead the converter applies
+them after downsampling:
+
+    - for the intensities, the tone curve is folded into the intensity ->
+      glyph lookup table, so mapping a frame costs exactly what it did
+    - for the colors, every channel goes through a 256 entry table, on the
+      downsampled color plane
+
+Every normalization mode is a weighted mean (or min/max) of the channels, so
+inverting the channels of a frame inverts its intensities, and grayscale
+colors have the intensities the colors had.
+"""
+
+import numpy as np
+from typing import Union
+
+# the weights of the grayscale colors
+GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+class Tone:
+    def __init__(self, **kwargs):
+        """
+        Initialize the Tone class.
+
+        :param invert: invert the colors & intensities (default: False)
+        :param grayscale: make the colors gray (default: False)
+        :param gamma: brighten (> 1) or darken (< 1) the midtones, out = in ** (1 / gamma) (default: 1.0)
+        :param contrast: stretch (> 1) or flatten (< 1) around the middle gray (default: 1.0)
+        """
+        self.invert = kwargs.get("invert", False)
+        self.grayscale = kwargs.get("grayscale", False)
+        self.gamma = kwargs.get("gamma", 1.0)
+        self.contrast = kwargs.get("contrast", 1.0)
+        if self.gamma <= 0:
+            raise ValueError(f"Invalid gamma: {self.gamma}")
+
+        # the tone curve of every channel value, for the key it was built for
+        self._color_table = (None, None)
+
+    @property
+    def key(self) -> tuple:
+        """ what the tone curve depends on, to know when a folded table is stale """
+        return self.invert, self.gamma, self.contrast
+
+    @property
+    def identity(self) -> bool:
+        """ the tone curve changes nothing """
+        return self.key == (False, 1.0, 1.0)
+
+    def curve(self, values: np.ndarray) -> np.ndarray:
+        """
+        The tone curve, applied to intensities or channels.
+
+        :param values: 0 - 255
+        :return: float32 0 - 255
+        """
+        v = np.asarray(values, dtype=np.float32) / 255
+        if self.invert:
+            v = 1 - v
+        if self.gamma != 1.0:
+            v = np.clip(v, 0, 1) ** (1 / self.gamma)
+        if self.contrast != 1.0:
+            v = (v - 0.5) * self.contrast + 0.5
+        return np.clip(v, 0, 1) * 255
+
+    def fold(self, gradient, size: int) -> np.ndarray:
+        """
+        The intensity -> glyph lookup table of gradient, with the tone curve folded in.
+
+        :param gradient: the AsciiGradient to match the toned intensities with
+        :param size: the number of entries in the table
+        """
+        table = gradient.lookup_table(size)
+        if self.identity:
+            return table
+        return gradient.match_indices(self.curve(np.linspace(0, 255, size))).astype(table.dtype)
+
+    def apply_colors(self, colors: Union[np.ndarray, None]) -> Union[np.ndarray, None]:
+        """
+        Apply the tone curve & grayscale to a color plane.
+
+        :param colors: uint8 rgb (..., 3), or None
+        :return: uint8 rgb (..., 3), or colors itself when nothing changes
+        """
+        if colors is None or (self.identity and not self.grayscale):
+            return colors
+
+        if self.grayscale:
+            gray = (colors @ GRAY_WEIGHTS).astype(np.uint8)
+            colors = np.repeat(gray[..., None], 3, axis=-1)
+        if self.identity:
+            return colors
+
+        key, table = self._color_table
+        if key != self.key:
+            table = np.round(self.curve(np.arange(256))).astype(np.uint8)
+            self._color_table = (self.key, table)
+        return table[colors]
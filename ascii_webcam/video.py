@@ -0,0 +1,261 @@
+"""
+17 October 2026
+
+`video.py` This file converts recorded videos to ascii, offline. Frames are
+read with cv2.VideoCapture and handed to a pool of worker processes in small
+chunks, each worker converting them with its own AsciiImageConverter. The
+chunks are collected in order, so the frames can be written out as a stream
+(plain text, ANSI or an asciicast v2 recording) while the video is still being
+read. Only a fixed number of chunks are in flight at once, so memory stays
+bounded no matter how long the video is.
+
+Usage: python -m ascii_webcam.video input.mp4 -o output.cast --format asciicast
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Literal, TextIO, Union
+from ascii_webcam.convert import AsciiImageConverter
+from ascii_webcam.dither import DitherModes
+from ascii_webcam.gradients import PresetGradients
+from ascii_webcam.normalize import NormalizationModes
+from ascii_webcam.palette import DistanceMetrics
+from ascii_webcam.terminal import ColorModes, CLEAR, HOME
+
+OutputFormatsType = Literal["text", "ansi", "asciicast"]
+OutputFormats = ["text", "ansi", "asciicast"]
+
+DEFAULT_CHUNK_SIZE = 16
+
+# the converter of a worker process, created by _init_worker
+_worker_converter: Union[AsciiImageConverter, None] = None
+
+
+def _init_worker(gradient: str, color: bool, converter_kwargs: dict) -> None:
+    global _worker_converter
+    _worker_converter = AsciiImageConverter(
+        getattr(PresetGradients, gradient), color=color, **converter_kwargs)
+
+
+def _convert_chunk(frames: list) -> list:
+    """ convert a chunk of bgr frames, returns (text, (rows, columns)) per frame """
+    import cv2
+    converter = _worker_converter
+    results = []
+    for frame in frames:
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame = converter.convert_frame(rgb)
+        results.append((frame.to_ansi(converter.terminal_encoder), frame.shape))
+    return results
+
+
+def read_chunks(capture, chunk_size: int) -> Iterator[list]:
+    """ read frames from a cv2.VideoCapture, chunk_size frames at a time """
+    chunk = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        chunk.append(frame)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def convert_video_frames(path: str, gradient: str = "ASCII", color: bool = False, **kwargs) -> Iterator[tuple]:
+    """
+    Convert a video, yielding the converted frames in order.
+
+    :param path: the video file to convert
+    :param gradient: the name of the PresetGradients entry to use
+    :param color: encode colors (ANSI escapes) in the output
+    :param workers: the number of worker processes (default: cpu count)
+    :param chunk_size: the number of frames sent to a worker at once
+    :param max_pending: the number of chunks in flight (default: 2 per worker)
+    :param stats: a dict that is updated with frames, total_frames, fps & seconds
+    :param converter_kwargs: passed on to each worker's AsciiImageConverter
+    :return: (text, (rows, columns)) for every frame
+    """
+    import cv2
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise IOError(f"Could not read video from path: {path}")
+
+    workers = kwargs.get("workers", None) or os.cpu_count() or 1
+    chunk_size = kwargs.get("chunk_size", DEFAULT_CHUNK_SIZE)
+    max_pending = kwargs.get("max_pending", None) or 2 * workers
+
+    stats = kwargs.get("stats", {})
+    stats.update(
+        frames=0,
+        total_frames=int(capture.get(cv2.CAP_PROP_FRAME_COUNT)),
+        video_fps=capture.get(cv2.CAP_PROP_FPS) or 30.0,
+        fps=0.0,
+        seconds=0.0
+    )
+
+    # videos should not be mirrored like a camera preview
+    converter_kwargs = {"mirror": False, **kwargs.get("converter_kwargs", {})}
+
+    start = time.perf_counter()
+    pending = deque()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(gradient, color, converter_kwargs)
+        ) as pool:
+            for chunk in read_chunks(capture, chunk_size):
+                pending.append(pool.submit(_convert_chunk, chunk))
+
+                # block on the oldest chunk, so memory stays bounded
+                while len(pending) >= max_pending:
+                    yield from _collect(pending.popleft(), stats, start)
+
+            while pending:
+                yield from _collect(pending.popleft(), stats, start)
+    finally:
+        capture.release()
+
+
+def _collect(future, stats: dict, start: float) -> Iterator[tuple]:
+    for result in future.result():
+        stats["frames"] += 1
+        stats["seconds"] = time.perf_counter() - start
+        stats["fps"] = stats["frames"] / stats["seconds"]
+        yield result
+
+
+class FrameWriter:
+    def __init__(self, output: TextIO, fmt: OutputFormatsType = "text", fps: float = 30.0):
+        """
+        Initialize the FrameWriter class.
+
+        :param output: the text stream to write to
+        :param fmt: the output format
+            -- Format must be one of the following --
+            text: plain text frames, separated by a form feed
+            ansi: frames that redraw the terminal, play back with `cat`
+            asciicast: an asciicast v2 recording, play back with `asciinema play`
+        :param fps: the frame rate of the video (asciicast timestamps)
+        """
+        if fmt not in OutputFormats:
+            raise ValueError(f"Invalid format: {fmt}")
+        self.output = output
+        self.fmt = fmt
+        self.fps = fps
+        self.frames = 0
+
+    def write(self, text: str, shape: tuple) -> None:
+        """ write one frame, of shape (rows, columns) """
+        match self.fmt:
+            case "text":
+                self.output.write(("\f\n" if self.frames else "") + text + "\n")
+            case "ansi":
+                self.output.write(CLEAR + HOME + text)
+            case "asciicast":
+                if not self.frames:
+                    header = {"version": 2, "width": int(shape[1]), "height": int(shape[0]),
+                              "timestamp": int(time.time())}
+                    self.output.write(json.dumps(header) + "\n")
+                event = [round(self.frames / self.fps, 6), "o",
+                         HOME + text.replace("\n", "\r\n")]
+                self.output.write(json.dumps(event) + "\n")
+        self.frames += 1
+
+
+def convert_video(path: str, output: TextIO, fmt: OutputFormatsType = "text", **kwargs) -> dict:
+    """
+    Convert a video & write it to a text stream.
+
+    :param path: the video file to convert
+    :param output: the text stream to write to
+    :param fmt: text, ansi or asciicast
+    :param progress: report progress & frames per second to stderr (default: False)
+    :param kwargs: passed on to convert_video_frames
+    :return: the conversion stats
+    """
+    stats = kwargs.pop("stats", {})
+    progress = kwargs.pop("progress", False)
+    kwargs.setdefault("color", fmt != "text")
+
+    frames = convert_video_frames(path, stats=stats, **kwargs)
+    writer = None
+    last_report = 0.0
+    for text, shape in frames:
+        if writer is None:
+            writer = FrameWriter(output, fmt, stats["video_fps"])
+        writer.write(text, shape)
+
+        # report at most twice a second
+        if progress and stats["seconds"] - last_report >= 0.5:
+            last_report = stats["seconds"]
+            print(f"\r{stats['frames']}/{stats['total_frames']} frames, "
+                  f"{stats['fps']:.1f} fps", end="", file=sys.stderr)
+
+    if progress:
+        print(file=sys.stderr)
+    return stats
+
+
+def main(argv: Union[list, None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert a video to ascii")
+    parser.add_argument("input", help="the video file to convert")
+    parser.add_argument("-o", "--output", help="the output file (default: stdout)")
+    parser.add_argument("-f", "--format", choices=OutputFormats, default="text")
+    parser.add_argument("-g", "--gradient", choices=PresetGradients.names(), default="ASCII")
+    parser.add_argument("-n", "--normalization", choices=NormalizationModes, default="luminance")
+    parser.add_argument("-c", "--color-mode", choices=ColorModes, default="truecolor")
+    parser.add_argument("--color-metric", choices=DistanceMetrics, default="rgb",
+                        help="how 256 & 16 colors are picked")
+    parser.add_argument("-d", "--dither", choices=DitherModes, default="none")
+    parser.add_argument("--invert", action="store_true", help="invert the colors & intensities")
+    parser.add_argument("--grayscale", action="store_true", help="make the colors gray")
+    parser.add_argument("--gamma", type=float, default=1.0, help="> 1 brightens, < 1 darkens the midtones")
+    parser.add_argument("--contrast", type=float, default=1.0, help="> 1 stretches, < 1 flattens the tones")
+    parser.add_argument("--width", type=int, default=100, help="the number of columns")
+    parser.add_argument("--height", type=int, help="the number of rows (default: keep aspect ratio)")
+    parser.add_argument("-w", "--workers", type=int, help="worker processes (default: cpu count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    # image_size is passed straight to image_resize as (width, height)
+    image_size = (None, args.width) if args.height is None else (args.width, args.height)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        stats = convert_video(
+            args.input, output, args.format,
+            gradient=args.gradient,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            progress=True,
+            converter_kwargs={
+                "image_size": image_size,
+                "normalization": args.normalization,
+                "color_mode": args.color_mode,
+                "color_metric": args.color_metric,
+                "dither": args.dither,
+                "invert": args.invert,
+                "grayscale": args.grayscale,
+                "gamma": args.gamma,
+                "contrast": args.contrast,
+            }
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"converted {stats['frames']} frames in {stats['seconds']:.2f}s "
+          f"({stats['fps']:.1f} fps)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+17 October 2026
+
+`check_import.py` This file checks that importing the package stays cheap.
+Each module is imported in a fresh interpreter, the check fails when the
+median import time is over the budget, or when the import pulled in one of
+the heavy modules (they must only be loaded lazily, where they are used).
+
+Usage: python benchmarks/check_import.py [--budget 0.3] [--runs 5]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Union
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the modules that are imported, & the modules that importing them must not pull in
+MODULES = ["ascii_webcam", "ascii_webcam.convert", "ascii_webcam.gradients"]
+HEAVY_MODULES = ["cv2", "PIL", "colored", "pygame"]
+IMPORT_BUDGET = 0.3
+
+
+def import_once(module: str) -> tuple[float, list]:
+    """ import a module in a fresh interpreter, returns the seconds & the heavy modules it loaded """
+    script = (
+        "import sys, time, json\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start\n"
+        f"print(json.dumps([seconds, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))\n"
+    )
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    seconds, loaded = json.loads(output)
+    return seconds, loaded
+
+
+def check(budget: float = IMPORT_BUDGET, runs: int = 5, verbose: bool = True) -> list:
+    """ import every module runs times, returns the failures """
+    failures = []
+    for module in MODULES:
+        results = [import_once(module) for _ in range(runs)]
+        seconds = statistics.median(seconds for seconds, _ in results)
+        loaded = sorted({m for _, modules in results for m in modules})
+
+        if verbose:
+            print(f"import {module}: {seconds * 1000:.1f} ms (budget {budget * 1000:.0f} ms)")
+        if seconds > budget:
+            failures.append(f"import {module} took {seconds * 1000:.1f} ms, over the {budget * 1000:.0f} ms budget")
+        if loaded:
+            failures.append(f"import {module} loaded {', '.join(loaded)}")
+    return failures
+
+
+def main(argv: Union[list, None] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import time & the lazily loaded modules")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET, help="seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    failures = check(args.budget, args.runs)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,553 @@
+"""
+17 October 2026
+
+`run.py` This file contains the benchmark suite for the conversion and
+rendering hot paths. Nothing here needs a camera, every benchmark runs on
+synthetic frames or frames derived from `assets/dogo.jpeg`, at several grid
+sizes, and the conversion benchmarks cover every PresetGradients entry and
+every normalization mode.
+
+Each benchmark records ops/sec, p50/p99 latency and the peak memory allocated
+by one call (tracemalloc, measured in a separate pass so it does not distort
+the timings). The results are written to JSON & compared against a stored
+baseline, the run fails when a benchmark got slower than the tolerance allows
+or when importing the package takes longer than the import budget.
+
+Usage:
+    python benchmarks/run.py                     # run everything & compare to the baseline
+    python benchmarks/run.py --quick -k convert  # a short run of the matching benchmarks
+    python benchmarks/run.py --save-baseline     # store the results as the new baseline
+
+benchmarks/check_import.py checks the import budget on its own, without the benchmarks.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import shutil
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from typing import Callable, Iterator, Union
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from check_import import IMPORT_BUDGET, import_once  # noqa: E402
+from ascii_webcam.cache import GlyphIntensityCache  # noqa: E402
+from ascii_webcam.convert import AsciiImageConverter  # noqa: E402
+from ascii_webcam.dither import DitherModes  # noqa: E402
+from ascii_webcam.gradients import AsciiGradient, PresetGradients  # noqa: E402
+from ascii_webcam.mosaic import tile_frames  # noqa: E402
+from ascii_webcam.normalize import NormalizationModes  # noqa: E402
+from ascii_webcam.recording import RECORDING_EXTENSION, Recording, RecordingWriter  # noqa: E402
+from ascii_webcam.sources import Patterns, open_source  # noqa: E402
+from ascii_webcam.palette import PaletteModes, PaletteQuantizer  # noqa: E402
+from ascii_webcam.terminal import ColorModes, TerminalEncoder, TerminalRenderer  # noqa: E402
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results.json")
+DOGO_PATH = os.path.join(ROOT, "assets", "dogo.jpeg")
+FONT_PATH = os.path.join(ROOT, "assets", "Consolas.ttf")
+
+# the number of columns of the converted image
+GRID_SIZES = [40, 100, 200]
+FRAME_SIZE = (640, 480)
+FRAME_SOURCES = ["synthetic", "dogo"]
+
+# the AsciiFrame outputs, to_object_array is the old convert_image result
+FRAME_METHODS = ["to_text", "to_ansi", "to_html", "to_bytes", "to_object_array"]
+
+# a large image, for the strip-by-strip conversion of memory maps
+LARGE_FRAME_SIZE = (4000, 3000)
+
+# the number of streams converted at once
+STREAM_COUNTS = [4, 16]
+
+
+def synthetic_frame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """ a deterministic rgb test frame, smooth gradients with some structure & noise """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    frame = np.empty((height, width, 3), dtype=np.float32)
+    frame[..., 0] = 255 * x / width
+    frame[..., 1] = 255 * y / height
+    frame[..., 2] = 127.5 + 127.5 * np.sin(x / 23) * np.cos(y / 17)
+    frame += rng.normal(0, 8, frame.shape)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def dogo_frame(width: int, height: int, shift: int = 0) -> np.ndarray:
+    """ assets/dogo.jpeg as an rgb frame, optionally panned by shift pixels """
+    import cv2
+    image = cv2.imread(DOGO_PATH, cv2.IMREAD_COLOR)
+    if image is None:
+        raise IOError(f"Could not read image from path: {DOGO_PATH}")
+    image = cv2.cvtColor(cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+    return np.roll(image, shift, axis=1)
+
+
+def make_frame(source: str, shift: int = 0) -> np.ndarray:
+    match source:
+        case "synthetic": return synthetic_frame(*FRAME_SIZE, seed=shift)
+        case "dogo": return dogo_frame(*FRAME_SIZE, shift=shift)
+        case _: raise ValueError(f"Invalid source: {source}")
+
+
+def converter(gradient: str = "ASCII", columns: int = 100, **kwargs) -> AsciiImageConverter:
+    # image_size is passed straight to image_resize as (width, height)
+    return AsciiImageConverter(getattr(PresetGradients, gradient), image_size=(None, columns), **kwargs)
+
+
+def benchmarks() -> Iterator[tuple[str, Callable]]:
+    """
+    Every benchmark, as (name, setup). setup() prepares the inputs & returns the
+    function that is timed, so only the hot path itself is measured. If that
+    function has a teardown attribute, it is called once the benchmark is done
+    (or failed).
+    """
+    for source in FRAME_SOURCES:
+        for columns in GRID_SIZES:
+            for gradient in PresetGradients.names():
+                for normalization in NormalizationModes:
+                    yield (f"convert/{source}/{gradient}/{normalization}/{columns}",
+                           _convert(source, gradient, normalization, columns))
+
+            for matching in ["intensity", "shape"]:
+                yield (f"convert_color/{source}/{matching}/{columns}",
+                       _convert(source, "ASCII", "luminance", columns, color=True, matching=matching))
+
+    for columns in GRID_SIZES:
+        for mode in DitherModes:
+            yield (f"dither/{mode}/{columns}",
+                   _convert("dogo", "BLOCKS", "luminance", columns, dither=mode))
+        # invert, grayscale & a tone curve, after downsampling
+        yield (f"convert_tone/{columns}",
+               _convert("dogo", "ASCII", "luminance", columns, color=True,
+                        invert=True, grayscale=True, gamma=1.5, contrast=1.2))
+
+    for count in STREAM_COUNTS:
+        for columns in GRID_SIZES:
+            # one call for every stream vs a convert_frame per stream, & the mosaic of them
+            yield f"streams/batch/{count}/{columns}", _streams(count, columns, batched=True)
+            yield f"streams/loop/{count}/{columns}", _streams(count, columns, batched=False)
+            yield f"streams/mosaic/{count}/{columns}", _mosaic(count, columns)
+
+    for columns in GRID_SIZES:
+        yield f"convert_image/{columns}", _convert_image(columns)
+        for mode in ColorModes:
+            yield f"terminal/{mode}/{columns}", _terminal(mode, columns)
+        for mode in PaletteModes:
+            yield f"palette/{mode}/{columns}", _palette(mode, columns, exact=False)
+            yield f"palette_exact/{mode}/{columns}", _palette(mode, columns, exact=True)
+        yield f"terminal_renderer/{columns}", _terminal_renderer(columns)
+        yield f"gui_rows/{columns}", _gui_rows(columns)
+        yield f"gui_compose/{columns}", _gui_compose(columns)
+        for method in FRAME_METHODS:
+            yield f"frame/{method}/{columns}", _frame(method, columns)
+        for compress in [False, True]:
+            storage = "zlib" if compress else "raw"
+            yield f"recording/write/{storage}/{columns}", _recording_write(columns, compress)
+            yield f"recording/seek/{storage}/{columns}", _recording_seek(columns, compress)
+        # a memory-mapped .npy read in strips vs loaded whole
+        yield f"tiled/strips/{columns}", _tiled(columns, tiled=True)
+        yield f"tiled/full/{columns}", _tiled(columns, tiled=False)
+
+    for pattern in Patterns:
+        yield f"source/synthetic/{pattern}", _source(f"synthetic:{pattern}")
+    yield "source/images", _source("images")
+
+    # the presets are stored ordered, so order their palettes from scratch
+    for gradient in PresetGradients.names():
+        palette = vars(PresetGradients)[gradient].palette
+        yield f"find_gradient/{gradient}", _find_gradient(palette, cached=False)
+        yield f"find_gradient_cached/{gradient}", _find_gradient(palette, cached=True)
+
+
+def _convert(source: str, gradient: str, normalization: str, columns: int, **kwargs) -> Callable:
+    def setup():
+        image = make_frame(source)
+        instance = converter(gradient, columns, normalization=normalization, **kwargs)
+        return lambda: instance.convert_image_compact(image)
+    return setup
+
+
+def _convert_image(columns: int) -> Callable:
+    def setup():
+        image = make_frame("dogo")
+        instance = converter("ASCII", columns, color=True)
+        return lambda: instance.convert_image(image)
+    return setup
+
+
+def _streams(count: int, columns: int, batched: bool) -> Callable:
+    def setup():
+        images = np.stack([make_frame("dogo", shift=i) for i in range(count)])
+        instance = converter("ASCII", columns, color=True)
+        if batched:
+            return lambda: instance.convert_frames(images)
+        return lambda: [instance.convert_frame(image) for image in images]
+    return setup
+
+
+def _mosaic(count: int, columns: int) -> Callable:
+    def setup():
+        frames = converter("ASCII", columns, color=True).convert_frames(
+            [make_frame("dogo", shift=i) for i in range(count)])
+        return lambda: tile_frames(frames)
+    return setup
+
+
+def _terminal(mode: str, columns: int) -> Callable:
+    def setup():
+        image = make_frame("dogo")
+        instance = converter("ASCII", columns, color=True, color_mode=mode)
+        return lambda: instance.convert_image_to_terminal(image)
+    return setup
+
+
+def _palette(mode: str, columns: int, exact: bool) -> Callable:
+    def setup():
+        _, colors = converter("ASCII", columns, color=True).convert_image_compact(make_frame("dogo"))
+        if exact:
+            return lambda: TerminalEncoder.quantize_256(colors) if mode == "256" else TerminalEncoder.quantize_16(colors)
+        quantize = PaletteQuantizer(mode)
+        return lambda: quantize(colors)
+    return setup
+
+
+def _terminal_renderer(columns: int) -> Callable:
+    def setup():
+        # a slow pan, so the renderer has a realistic amount of changed cells
+        frames = [make_frame("dogo", shift) for shift in range(0, 8, 2)]
+        renderer = TerminalRenderer(converter("ASCII", columns, color=True, color_mode="256"))
+        position = iter(range(sys.maxsize))
+        return lambda: renderer.render(frames[next(position) % len(frames)])
+    return setup
+
+
+def _gui_rows(columns: int) -> Callable:
+    def setup():
+        instance = converter("ASCII", columns, x_major=True)
+        frame = instance.convert_frame(make_frame("dogo").transpose(1, 0, 2))
+        return frame.text_rows
+    return setup
+
+
+def _gui_compose(columns: int) -> Callable:
+    def setup():
+        os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+        try:
+            import pygame.freetype
+            from gui import GlyphAtlas
+        except ImportError:
+            return None
+
+        pygame.freetype.init()
+        font = pygame.freetype.Font(FONT_PATH, 12)
+        instance = converter("ASCII", columns, color=True, x_major=True)
+        frame = instance.convert_frame(make_frame("dogo").transpose(1, 0, 2))
+        atlas = GlyphAtlas(font, instance.gradient.glyphs, (7, 12))
+        return lambda: atlas.compose(frame.indices.T, frame.colors.transpose(1, 0, 2))
+    return setup
+
+
+def _frame(method: str, columns: int) -> Callable:
+    def setup():
+        frame = converter("ASCII", columns, color=True).convert_frame(make_frame("dogo"))
+        return getattr(frame, method)
+    return setup
+
+
+def _recording_frames(columns: int) -> list:
+    # a slow pan, so compressed records are realistically sized
+    instance = converter("ASCII", columns, color=True)
+    return [instance.convert_frame(make_frame("dogo", shift)) for shift in range(0, 16, 2)]
+
+
+def _recording_write(columns: int, compress: bool) -> Callable:
+    def setup():
+        frames = _recording_frames(columns)
+        directory = tempfile.mkdtemp(prefix="ascii_webcam_bench_")
+        writer = RecordingWriter(os.path.join(directory, f"bench{RECORDING_EXTENSION}"), compress=compress)
+        position = iter(range(sys.maxsize))
+        func = lambda: writer.write(frames[next(position) % len(frames)])
+
+        def teardown():
+            try:
+                writer.close()
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        func.teardown = teardown
+        return func
+    return setup
+
+
+def _recording_seek(columns: int, compress: bool) -> Callable:
+    def setup():
+        directory = tempfile.mkdtemp(prefix="ascii_webcam_bench_")
+        path = os.path.join(directory, f"bench{RECORDING_EXTENSION}")
+        try:
+            with RecordingWriter(path, compress=compress) as writer:
+                for frame in _recording_frames(columns) * 32:
+                    writer.write(frame)
+            recording = Recording(path)
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+
+        # decode a random frame, as when scrubbing through a recording
+        rng = np.random.default_rng(0)
+        func = lambda: recording[int(rng.integers(len(recording)))].to_text()
+
+        def teardown():
+            try:
+                recording.close()
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        func.teardown = teardown
+        return func
+    return setup
+
+
+def _tiled(columns: int, tiled: bool) -> Callable:
+    def setup():
+        directory = tempfile.mkdtemp(prefix="ascii_webcam_bench_")
+        path = os.path.join(directory, "large.npy")
+        try:
+            np.save(path, dogo_frame(*LARGE_FRAME_SIZE))
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+
+        instance = converter("ASCII", columns, color=True)
+        if tiled:
+            func = lambda: instance.convert_image_tiled(path)
+        else:
+            func = lambda: instance.convert_frame(np.load(path))
+        func.teardown = lambda: shutil.rmtree(directory, ignore_errors=True)
+        return func
+    return setup
+
+
+def _find_gradient(palette: str, cached: bool) -> Callable:
+    def setup():
+        # without a cache every glyph is rasterized again, with one nothing is
+        directory = tempfile.mkdtemp(prefix="ascii_webcam_bench_")
+        cache = GlyphIntensityCache(os.path.join(directory, "glyph_intensities.bin")) if cached else False
+        func = lambda: AsciiGradient(palette, ordered=False, cache=cache)
+        func.teardown = lambda: shutil.rmtree(directory, ignore_errors=True)
+        return func
+    return setup
+
+
+def _source(spec: str) -> Callable:
+    def setup():
+        path = tempfile.mkdtemp(prefix="ascii_webcam_bench_images_") if spec == "images" else None
+        try:
+            if path is not None:
+                import cv2
+                for shift in range(8):
+                    frame = cv2.cvtColor(make_frame("dogo", shift * 8), cv2.COLOR_RGB2BGR)
+                    cv2.imwrite(os.path.join(path, f"{shift:03}.jpg"), frame)
+                source = open_source(path, fps=None)
+            else:
+                source = open_source(spec, size=FRAME_SIZE)
+
+            # the time between frames, the source decodes on its own thread
+            source.start()
+        except BaseException:
+            if path is not None:
+                shutil.rmtree(path, ignore_errors=True)
+            raise
+        func = lambda: source.read(timeout=5)
+
+        def teardown():
+            try:
+                source.stop()
+            finally:
+                if path is not None:
+                    shutil.rmtree(path, ignore_errors=True)
+        func.teardown = teardown
+        return func
+    return setup
+
+
+def measure(func: Callable, min_time: float, min_runs: int) -> dict:
+    """
+    Time func until both min_time seconds & min_runs calls have passed.
+
+    :return: runs, ops_per_sec, mean_ms, p50_ms & p99_ms
+    """
+    func()  # warm up lazily built tables, buffers & caches
+
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < min_runs or time.perf_counter() - start < min_time:
+        begin = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - begin)
+
+    timings = np.array(timings) * 1000
+    return {
+        "runs": len(timings),
+        "ops_per_sec": round(1000 / timings.mean(), 3),
+        "mean_ms": round(float(timings.mean()), 4),
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4),
+    }
+
+
+def peak_memory(func: Callable) -> int:
+    """ the peak number of bytes allocated during one (warm) call of func """
+    func()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_import(runs: int = 5) -> dict:
+    """ import the package in fresh interpreters, and list any heavy modules it loaded """
+    timings, loaded = [], []
+    for _ in range(runs):
+        seconds, loaded = import_once("ascii_webcam.convert")
+        timings.append(seconds)
+    return {"p50_s": round(float(np.median(timings)), 4), "heavy_modules": loaded}
+
+
+def metadata() -> dict:
+    import cv2
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "frame_size": FRAME_SIZE,
+    }
+
+
+def run(pattern: Union[str, None] = None, quick: bool = False, verbose: bool = True) -> dict:
+    """
+    Run the benchmarks.
+
+    :param pattern: only run the benchmarks whose name contains this
+    :param quick: a short run, for a rough number while iterating
+    :param verbose: print every result as it finishes
+    :return: {"meta": ..., "import": ..., "results": {name: result}}
+    """
+    min_time, min_runs = (0.05, 3) if quick else (0.25, 10)
+
+    results = {}
+    for name, setup in benchmarks():
+        if pattern and pattern not in name:
+            continue
+        func = setup()
+        if func is None:
+            results[name] = {"skipped": True}
+            continue
+
+        # the teardown removes temporary files, also when the benchmark fails
+        try:
+            result = measure(func, min_time, min_runs)
+            result["peak_bytes"] = peak_memory(func)
+        finally:
+            if hasattr(func, "teardown"):
+                func.teardown()
+        results[name] = result
+        if verbose:
+            print(f"{name:<52} {result['ops_per_sec']:>10.1f} ops/s  p50 {result['p50_ms']:>8.3f} ms  "
+                  f"p99 {result['p99_ms']:>8.3f} ms  {result['peak_bytes'] / 1024:>8.0f} KiB")
+
+    return {"meta": metadata(), "import": measure_import(), "results": results}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare the p50 latency of every benchmark with the baseline.
+
+    :param tolerance: the fraction a benchmark may slow down before it is a regression
+    :return: the names of the regressed benchmarks
+    """
+    regressions = []
+    print(f"\n{'benchmark':<52} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in results["results"].items():
+        before = baseline["results"].get(name)
+        if result.get("skipped") or before is None or before.get("skipped"):
+            continue
+
+        change = result["p50_ms"] / before["p50_ms"] - 1
+        flag = ""
+        if change > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<52} {before['p50_ms']:>8.3f}ms {result['p50_ms']:>8.3f}ms {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: Union[list, None] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the conversion & rendering hot paths")
+    parser.add_argument("-k", "--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("-o", "--output", default=RESULTS_PATH, help="where to write the results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="the results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed p50 slowdown before a benchmark counts as a regression")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET,
+                        help="the most seconds importing ascii_webcam.convert may take")
+    parser.add_argument("--quick", action="store_true", help="shorter runs, rougher numbers")
+    args = parser.parse_args(argv)
+
+    # keep the user's glyph cache out of the measurements
+    cache_dir = os.environ["ASCII_WEBCAM_CACHE_DIR"] = tempfile.mkdtemp(prefix="ascii_webcam_bench_")
+    try:
+        results = run(args.filter, args.quick)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nwrote {len(results['results'])} results to {args.output}")
+
+    failed = False
+    imported = results["import"]
+    print(f"import ascii_webcam.convert: {imported['p50_s'] * 1000:.1f} ms "
+          f"(budget {args.import_budget * 1000:.0f} ms)")
+    if imported["p50_s"] > args.import_budget:
+        print("import time is over budget")
+        failed = True
+    if imported["heavy_modules"]:
+        print(f"importing the package loaded: {', '.join(imported['heavy_modules'])}")
+        failed = True
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"saved the baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
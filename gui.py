@@ -3,10 +3,26 @@
 
 `gui.py` This file contains the pygame gui
 used for visualizing the results of this
-project, This file does use threading to keep
+project, This file uses a FramePipeline to keep
 the GUI responsive while the image is being
 converted to ascii.
 
+Usage: python gui.py [--source camera|camera:1|synthetic|path]
+The source can be a camera, a synthetic test pattern,
+a video file or a directory of images.
+
+Pass --record session.asciirec to record the converted
+frames, and --play session.asciirec to play them back
+instead of converting a source (space pauses, the left
+& right arrows skip 5 seconds).
+
+The grid shrinks when converting & rendering can not keep
+up with --target-fps (default: 30, 0 keeps the full grid),
+and grows back once it can.
+
+Press F3 to show the per-stage timings & FPS over the
+frame (see ascii_webcam/telemetry.py for logging them).
+
 Tip: The GUI is buggy when initially focusing the
 app. Click out of the pygame window as to focus
 a different app, and then click back. I do not know
@@ -15,19 +31,26 @@ Mac. Maybe a different machine will have better results.
 """
 
 import sys
-import threading
+import time
+import argparse
 import numpy as np
+from typing import Union
 
 import pygame
 import pygame_gui
-import pygame.camera
 import pygame.freetype
 import pygame.surfarray
 
 from itertools import count
 from ascii_webcam.gradients import PresetGradients
 from ascii_webcam.convert import AsciiImageConverter
+from ascii_webcam.frame import AsciiFrame
+from ascii_webcam.governor import DEFAULT_TARGET_FPS, ResolutionGovernor
 from ascii_webcam.normalize import NormalizationModes
+from ascii_webcam.pipeline import FramePipeline
+from ascii_webcam.recording import Playback, Recording, RecordingWriter
+from ascii_webcam.sources import open_source
+from ascii_webcam.telemetry import Telemetry
 
 
 class GUIOptions:
@@ -91,8 +114,7 @@ class GUIOptions:
         self.m_gradient = PresetGradients.UNI
         self.selector_gradient = pygame_gui.elements.UIDropDownMenu(
             relative_rect=next(pos),
-            options_list=[
-                opt for opt in PresetGradients.__dict__.keys() if not opt.startswith("__")],
+            options_list=PresetGradients.names(),
             starting_option="UNI",
             manager=self.manager
         )
@@ -114,6 +136,14 @@ class GUIOptions:
             manager=self.manager
         )
 
+        # glyph matching button
+        self.m_matching = "intensity"
+        self.btn_matching = pygame_gui.elements.UIButton(
+            relative_rect=next(pos),
+            text='Intensity',
+            manager=self.manager
+        )
+
         # use colors button
         self.m_use_color = True
         self.btn_use_color = pygame_gui.elements.UIButton(
@@ -146,6 +176,21 @@ class GUIOptions:
             manager=self.manager
         )
 
+    def make_converter(self) -> AsciiImageConverter:
+        """ a converter for the current options """
+        return AsciiImageConverter(
+            gradient=self.m_gradient,
+            color=True,
+            image_size=self.parent.output_size,
+            normalization=self.m_normalization,
+            matching=self.m_matching,
+            invert=self.m_invert_colors,
+            grayscale=not self.m_use_color,
+            # surfarray frames are (x, y)
+            x_major=True,
+            telemetry=self.parent.telemetry
+        )
+
     def handle_ui_event(self, event: pygame.Event):
         match event.type:
             case pygame_gui.UI_BUTTON_PRESSED:
@@ -155,12 +200,16 @@ class GUIOptions:
                         states = {"ASCII": "IMAGE", "IMAGE": "ASCII"}
                         self.m_mode = states[self.m_mode]
 
-                        # stop the threading, reset conversion state
-                        self.parent.engine_thread.join()
-                        self.parent.conversion_ready = True
-
                     case self.btn_invert_colors:
                         self.m_invert_colors = not self.m_invert_colors
+                        self.parent.converter = self.make_converter()
+
+                    case self.btn_matching:
+                        # match glyphs by intensity or by shape
+                        states = {"intensity": "shape", "shape": "intensity"}
+                        self.m_matching = states[self.m_matching]
+                        self.btn_matching.set_text(self.m_matching.capitalize())
+                        self.parent.converter = self.make_converter()
 
                     case self.btn_use_color:
                         # update state & text
@@ -174,6 +223,7 @@ class GUIOptions:
                         if self.m_use_color:
                             self.m_equidistant = True
                             self.btn_switch_spacing.set_text('Equidistant')
+                        self.parent.converter = self.make_converter()
 
                     case self.btn_switch_spacing:
                         # update state
@@ -188,66 +238,114 @@ class GUIOptions:
                         self.y_spacing = 1.0 if self.m_equidistant else 0.583
                         self.slider_x_spacing.current_value = self.x_spacing
                         self.slider_y_spacing.current_value = self.y_spacing
-                        self.parent.converter.image_size = self.ascii_output_size
+                        self.parent.converter.image_size = self.parent.output_size
 
                         # no equal spacing -> no color
                         if not self.m_equidistant:
                             self.m_use_color = False
                             self.btn_use_color.set_text('Grayscale')
+                            self.parent.converter = self.make_converter()
 
             case pygame_gui.UI_DROP_DOWN_MENU_CHANGED:
                 match event.ui_element:
                     case self.selector_gradient:
                         # get the gradient
-                        self.m_gradient = PresetGradients.__dict__[event.text]
+                        self.m_gradient = getattr(PresetGradients, event.text)
 
                         # update the converter
-                        self.parent.converter = AsciiImageConverter(
-                            gradient=self.m_gradient,
-                            color=True,
-                            image_size=self.ascii_output_size,
-                            normalization=self.m_normalization
-                        )
+                        self.parent.converter = self.make_converter()
                     case self.selector_normalization:
                         # update the normalization
                         self.m_normalization = event.text
 
                         # update the converter
-                        self.parent.converter = AsciiImageConverter(
-                            gradient=self.m_gradient,
-                            color=True,
-                            image_size=self.ascii_output_size,
-                            normalization=self.m_normalization
-                        )
+                        self.parent.converter = self.make_converter()
 
             case pygame_gui.UI_HORIZONTAL_SLIDER_MOVED:
                 match event.ui_element:
                     case self.slider_x_spacing:
                         self.x_spacing = event.value
-                        self.parent.converter.image_size = self.ascii_output_size
+                        self.parent.converter.image_size = self.parent.output_size
                     case self.slider_y_spacing:
                         self.y_spacing = event.value
-                        self.parent.converter.image_size = self.ascii_output_size
+                        self.parent.converter.image_size = self.parent.output_size
 
         # update the manager (UI events)
         self.manager.process_events(event)
 
 
+class GlyphAtlas:
+    """
+    Every glyph of a gradient, pre-rendered once into an alpha mask the
+    size of one character cell. A frame is then composed by indexing the
+    tiles with the converter's glyph indices and tinting them with the
+    per-cell rgb, instead of a font.render_to call per character.
+    """
+
+    def __init__(self, font: pygame.freetype.Font, glyphs: list, tile_size: tuple[int, int]):
+        self.tile_size = tile_size
+
+        # surfarray convention... tiles are (glyph, x, y)
+        self.tiles = np.zeros((len(glyphs), *tile_size), dtype=np.uint8)
+        for tile, glyph in zip(self.tiles, glyphs):
+            font.render_raw_to(tile, glyph, dest=(0, 0))
+
+    def compose(self, indices: np.ndarray, colors: np.ndarray) -> np.ndarray:
+        """
+        :param indices: glyph indices (columns, rows)
+        :param colors: uint8 rgb of each cell (columns, rows, 3)
+        :return: rgb pixel array (columns * tile width, rows * tile height, 3)
+        """
+        masks = self.tiles[indices].astype(np.uint16)
+        pixels = (masks[..., None] * colors[:, :, None, None, :] + 255) >> 8
+
+        # (cx, cy, tx, ty, 3) -> (cx, tx, cy, ty, 3) -> (x, y, 3)
+        cx, cy, tx, ty, _ = pixels.shape
+        return pixels.transpose(0, 2, 1, 3, 4).reshape(cx * tx, cy * ty, 3).astype(np.uint8)
+
+
 class AsciiMain:
     options: GUIOptions
 
     # this is just to manage view
     clock = pygame.time.Clock()
 
-    # manage the game loops
-    engine_thread: threading.Thread
+    # capture, conversion & rendering run on the pipeline's threads
+    pipeline: Union[FramePipeline, None] = None
+    _converter: AsciiImageConverter
+
+    # the sequence number & grid size (rows, columns) of the frame in text_display
+    drawn_sequence = 0
+    grid_size: tuple = (0, 0)
+
+    # scales the grid to hold the target FPS
+    governor: ResolutionGovernor
+
+    # recording the converted frames, or playing them back instead of a source
+    recorder: Union[RecordingWriter, None] = None
+    playback: Union[Playback, None] = None
+    drawn_playback: tuple = ()
 
-    # Okay to render next frame?
-    conversion_ready = True
+    # per-stage timings, shown over the frame with F3
+    telemetry: Telemetry
+    show_telemetry = False
 
-    def __init__(self):
+    # pre-rendered glyphs for the equidistant view
+    atlas: Union[GlyphAtlas, None] = None
+    atlas_key: tuple = ()
+
+    def __init__(self, source: str = "camera", record: Union[str, None] = None, play: Union[str, None] = None,
+                 target_fps: float = DEFAULT_TARGET_FPS):
         pygame.init()
 
+        # with no target, the governor only measures (the grid can't shrink)
+        self.governor = ResolutionGovernor(
+            target_fps or DEFAULT_TARGET_FPS, min_scale=0.25 if target_fps else 1.0)
+
+        # off unless ASCII_WEBCAM_TELEMETRY is set or F3 is pressed
+        self.telemetry = Telemetry.from_env()
+        self.telemetry_from_env = self.telemetry.enabled
+
         # initialize options
         self.options = GUIOptions(self)
 
@@ -274,16 +372,6 @@ class AsciiMain:
             self.options.FONT_SIZE
         )
 
-        # create & initialize camera
-        pygame.camera.init()
-        self.camera = pygame.camera.Camera(
-            pygame.camera.list_cameras()[0]
-        )
-        self.camera.start()
-
-        # init & get first frame
-        self.frame = self.camera.get_image()
-
         # screen for the camera
         self.screen = pygame.surface.Surface(
             self.options.window_size, 0, self.display)
@@ -292,131 +380,187 @@ class AsciiMain:
         self.text_display = pygame.surface.Surface(
             self.options.window_size, 0, self.display)
 
-        # --- Ascii Conversion ---
-        self.converter = AsciiImageConverter(
-            gradient=PresetGradients.UNI,
-            image_size=self.options.ascii_output_size,
-            color=True,
-        )
+        self._converter = self.options.make_converter()
+
+        if play:
+            # the frames are already converted, nothing to capture
+            self.playback = Playback(Recording(play))
+            self.source = None
+            self.filtered_frame = None
+        else:
+            # start decoding frames in the background, as (x, y) like surfarray
+            self.source = open_source(
+                source, x_major=True, loop=True, telemetry=self.telemetry).start()
+
+            # the latest frame of the source
+            self.filtered_frame = self.source.read(copy=True)
+
+            if record:
+                self.recorder = RecordingWriter(record)
+
+            # --- Ascii Conversion ---
+            self.pipeline = FramePipeline(
+                capture=self.capture_frame,
+                converter=self._converter,
+                render=self.render_frame
+            ).start()
 
         # start the loop
         self.main_loop()
 
-    def convert_next_frame(self, arr: np.ndarray):
+    @property
+    def converter(self) -> AsciiImageConverter:
+        return self._converter
+
+    @property
+    def output_size(self) -> tuple:
+        """ the grid size the options ask for, scaled by the governor """
+        return self.governor.scaled(self.options.ascii_output_size)
+
+    @converter.setter
+    def converter(self, converter: AsciiImageConverter):
+        self._converter = converter
+        # frames already in the pipeline finish with the old converter
+        if self.pipeline is not None:
+            self.pipeline.converter = converter
+
+    def capture_frame(self) -> np.ndarray:
         """
-        This function prepares the next frame to be rendered.
-        Since this function will be called through a thread,
-        it does not actually update the display.
-        :param arr: the image to convert
-        :return: None -> updates self.text_display
+        The first stage of the pipeline, runs on the capture thread.
+        :return: a copy of the next frame of the source
         """
-        # lock up the thread / engine rendering
-        self.conversion_ready = False
+        with self.telemetry.stage("grab"):
+            frame = self.source.read()
+
+        if frame is None:
+            # the source ended, keep showing the last frame
+            time.sleep(0.1)
+            return None
+
+        # the source reuses its buffer once we read the next frame, the color
+        # options are applied by the converter, after downsampling
+        np_img = frame.copy()
+
+        self.filtered_frame = np_img
+        self.telemetry.tick("capture")
+        return np_img
+
+    def render_frame(self, converter: AsciiImageConverter, frame: AsciiFrame):
+        """
+        The last stage of the pipeline, runs on the render thread.
+        Since the display belongs to the main thread, this only
+        prepares what engine_loop draws into text_display.
+        :return: ("pixels", rgb array, grid) or ("rows", list of row strings, grid),
+            grid is the (rows, columns) the frame was converted at
+        """
+        self.grid_size = frame.shape
+        if self.recorder is not None:
+            self.recorder.write(frame)
+
+        with self.telemetry.stage("render"):
+            # if we want a grid-like output
+            if self.options.m_equidistant:
+                # compose the whole frame from the glyph atlas, in (x, y) like surfarray
+                atlas = self.get_atlas(frame.glyphs)
+                indices = frame.indices.T
+                if frame.colors is None:
+                    # frames converted without colors are drawn white
+                    colors = np.full((*indices.shape, 3), 255, dtype=np.uint8)
+                else:
+                    colors = frame.colors.transpose(1, 0, 2)
+                return "pixels", atlas.compose(indices, colors), frame.shape
+
+            # one string per row, frames are always indexed (row, column)
+            return "rows", frame.text_rows(), frame.shape
+
+    def draw_text_display(self, frame: tuple):
+        """ draw a frame from render_frame into text_display """
+        kind, content, _ = frame
 
         # clear the canvas
         self.text_display.fill(pygame.Color('#000000'))
 
-        # convert the image to ascii text
-        text_to_render = self.converter.convert_image(arr)
-        text_to_render = np.flip(text_to_render, axis=(0, 1))
-
-        # if we want a grid-like output
-        if self.options.m_equidistant:
-            for i, row in enumerate(text_to_render):
-                for j, (char, *rgb) in enumerate(row):
-                    # it is possible to create a master set of text_surfaces, but I think that
-                    # the time complexity would be ~ the same, as we would still need to change
-                    # the color of the text_surface
-
-                    """
-                    DEBUGGING A PROBLEM
-                    ----------------------------
-                    Problem: When using the ascii rendering with equidistant spacing,
-                    the image appears in black / white mirrored above output
-
-                    self.font.render << antialias. Tried with true / false, no difference
-                    self.font.color << only upside down image appears...
-
-                    self.text_display << location: I added in a if j > 30 break, to ensure that
-                    the text wasn't wrapping the Surface, but that was not the issue. 
-
-                    self.converter.convert_image: We saw good results in the no interpolation mode,
-                    however, that did not have color.
-
-                        -> Solved: I flipped the image too early in the normalize function. This resulted
-                                    in one image being flipped (ascii) and one not being flipped (colored)
-
-                        -> Solution: moved the flip function
-
-                    """
-                    self.font.render_to(
-                        text=char,
-                        surf=self.text_display,
-                        dest=(
-                            i * self.options.FONT_SIZE * self.options.x_spacing,
-                            j * self.options.FONT_SIZE * self.options.y_spacing
-                        ),
-                        fgcolor=pygame.Color(*rgb),
-                    )
+        if kind == "pixels":
+            # blit the composed frame at once
+            width = min(content.shape[0], self.text_display.get_width())
+            height = min(content.shape[1], self.text_display.get_height())
+            pygame.surfarray.blit_array(
+                self.text_display.subsurface((0, 0, width, height)),
+                content[:width, :height]
+            )
+            return
+
+        for i, row in enumerate(content):
+            self.font.render_to(
+                text=row,
+                surf=self.text_display,
+                dest=(0, i * self.options.FONT_SIZE *
+                      self.options.x_spacing),
+                fgcolor=pygame.Color("#FFFFFF")
+            )
 
-        else:
-            # we need to flip (transpose) text_to_render
-            # because we want to render it in the correct orientation
-            # the output is row, col, (char, rgb)... when we print
-            text_to_render = np.transpose(text_to_render, axes=(1, 0, 2))
-
-            for i, row in enumerate(text_to_render):
-                # Join the characters to a row
-                text_to_render = "".join([char for char, *_ in row])
-                self.font.render_to(
-                    text=text_to_render,
-                    surf=self.text_display,
-                    dest=(0, i * self.options.FONT_SIZE *
-                          self.options.x_spacing),
-                    fgcolor=pygame.Color("#FFFFFF")
-                )
-
-        # unlock the thread / engine loop
-        self.conversion_ready = True
+    def fill_text_display(self, grid: tuple):
+        """ stretch a frame drawn on a shrunk (rows, columns) grid over the whole text_display """
+        rows, columns = grid
+        full_rows, full_columns = self.options.ascii_output_size
+        width, height = self.text_display.get_size()
+        region = self.text_display.subsurface((
+            0, 0,
+            max(1, min(width, round(width * columns / full_columns))),
+            max(1, min(height, round(height * rows / full_rows)))
+        )).copy()
+        pygame.transform.scale(region, (width, height), self.text_display)
+
+    def get_atlas(self, glyphs: list) -> GlyphAtlas:
+        """ the glyph atlas, rebuilt only when the glyphs, font size or spacing changes """
+        key = (
+            tuple(glyphs),
+            self.options.FONT_SIZE,
+            self.options.x_spacing,
+            self.options.y_spacing
+        )
+        if self.atlas is None or key != self.atlas_key:
+            tile_size = (
+                max(1, round(self.options.FONT_SIZE * self.options.x_spacing)),
+                max(1, round(self.options.FONT_SIZE * self.options.y_spacing))
+            )
+            self.atlas = GlyphAtlas(self.font, glyphs, tile_size)
+            self.atlas_key = key
+        return self.atlas
 
     def engine_loop(self):
-        # transform image
-        np_img = pygame.surfarray.array3d(self.frame)
-
-        # invert image if option says...
-        if self.options.m_invert_colors:
-            np_img = 255 - np_img
-
-        if not self.options.m_use_color:
-            # convert to grayscale -> use np.dot for performance
-            np_img = np_img.dot([0.298, 0.587, 0.114])[
-                :, :, None].repeat(3, axis=2)
+        # clear the canvas
+        self.display.blit(self.background, (0, 0))
 
         # render
-        if self.options.m_mode == "ASCII":
-            # clear the canvas
-            self.display.blit(self.background, (0, 0))
+        if self.playback is not None:
+            self.draw_playback()
+
+        elif self.options.m_mode == "ASCII":
+            # draw the newest converted frame, if there is one we haven't drawn
+            sequence, frame = self.pipeline.latest()
+            if frame is not None and sequence != self.drawn_sequence:
+                with self.telemetry.stage("draw"):
+                    self.draw_text_display(frame)
+                    # the grid of the frame itself, frames still in the pipeline when
+                    # the governor stepped were converted at the previous size
+                    grid = frame[2]
+                    if grid != self.options.ascii_output_size:
+                        self.fill_text_display(grid)
+                self.drawn_sequence = sequence
+                self.telemetry.tick("display")
+
+                # shrink or grow the grid for the frames still to come
+                if self.governor.record(self.pipeline.work_seconds):
+                    self.converter.image_size = self.output_size
 
             # update the text display
             self.display.blit(self.text_display, (0, 0))
-
-            # create & run the next thread
-            self.engine_thread = threading.Thread(
-                target=self.convert_next_frame,
-                args=(np_img,)
-            )
-            if not self.engine_thread.is_alive():
-                self.engine_thread.start()
+            self.draw_status()
 
         else:
-            # clear the canvas
-            self.display.blit(self.background, (0, 0))
-
-            # check if we are filtering the image
-            if not self.options.m_use_color or self.options.m_invert_colors:
-                image = pygame.surfarray.make_surface(np_img)
-            else:
-                image = self.frame
+            # only the image mode shows full frames, tone them here
+            image = pygame.surfarray.make_surface(self.converter.tone.apply_colors(self.filtered_frame))
 
             scaled_image = pygame.transform.scale(
                 surface=image,
@@ -433,8 +577,47 @@ class AsciiMain:
             # add the scaled image to the canvas
             self.display.blit(mirrored_image, (0, 0))
 
-        # update the next camera frame
-        self.frame = self.camera.get_image()
+    def draw_status(self):
+        """ draw the grid size & frame rate in the bottom left corner """
+        rows, columns = self.grid_size
+        governor = self.governor
+        status = f"{columns}x{rows} cells   {governor.fps:5.1f} fps"
+        if governor.min_scale < governor.max_scale:
+            status += f" (target {governor.target_fps:g}, grid {governor.scale:.0%})"
+        self.font.render_to(
+            surf=self.display,
+            dest=(4, self.options.WINDOW_HEIGHT - self.options.FONT_SIZE - 4),
+            text=status,
+            fgcolor=pygame.Color("#00FF00"),
+            bgcolor=pygame.Color("#000000")
+        )
+
+    def draw_playback(self):
+        """ draw the recorded frame at the playback position, and where that is """
+        index, frame = self.playback.current()
+
+        # redraw when the frame or the way it is drawn changed
+        key = (index, self.options.m_equidistant, self.options.x_spacing, self.options.y_spacing)
+        if key != self.drawn_playback:
+            with self.telemetry.stage("draw"):
+                self.draw_text_display(self.render_frame(self.converter, frame))
+            self.drawn_playback = key
+            self.telemetry.tick("display")
+        self.display.blit(self.text_display, (0, 0))
+
+        state = "paused" if self.playback.paused else "playing"
+        self.font.render_to(
+            surf=self.display,
+            dest=(4, self.options.WINDOW_HEIGHT - self.options.FONT_SIZE - 4),
+            text=f"{state} {self.playback.position:6.1f} / {self.playback.recording.duration:.1f} s",
+            fgcolor=pygame.Color("#00FF00")
+        )
+
+    def handle_playback_key(self, key: int):
+        match key:
+            case pygame.K_SPACE: self.playback.toggle_pause()
+            case pygame.K_LEFT: self.playback.skip(-5)
+            case pygame.K_RIGHT: self.playback.skip(5)
 
     def main_loop(self):
         while True:
@@ -445,25 +628,89 @@ class AsciiMain:
                 if event.type == pygame.QUIT:
                     return self.quit()
 
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.toggle_telemetry()
+
+                if event.type == pygame.KEYDOWN and self.playback is not None:
+                    self.handle_playback_key(event.key)
+
                 # pass the event to options
                 self.options.handle_ui_event(event)
 
             # update the tick
             self.options.manager.update(dt)
 
-            # check if we have a frame to convert
-            if self.conversion_ready:
-                self.engine_loop()
+            # draw the newest frame
+            self.engine_loop()
 
             # draw the UI
             self.options.manager.draw_ui(self.display)
+            if self.show_telemetry:
+                self.draw_telemetry()
             pygame.display.flip()
+            self.telemetry.tick("loop")
+
+    def toggle_telemetry(self):
+        """ show or hide the overlay, recording only while it is shown (or logged) """
+        self.show_telemetry = not self.show_telemetry
+        if self.show_telemetry:
+            self.telemetry.enabled = True
+        else:
+            # keep recording if it was turned on through the environment
+            self.telemetry.enabled = self.telemetry_from_env
+
+    def draw_telemetry(self):
+        """ draw the FPS & per-stage latencies in the top left corner """
+        lines = [
+            f"display {self.telemetry.fps('display'):5.1f} fps   "
+            f"capture {self.telemetry.fps('capture'):5.1f} fps   "
+            f"loop {self.telemetry.fps('loop'):5.1f} fps"
+        ]
+        for stage in ("decode", "grab", "normalize", "map", "render", "draw"):
+            stats = self.telemetry.stats(stage)
+            if stats["count"]:
+                lines.append(f"{stage:<10}p50 {stats['p50_ms']:6.2f} ms   p99 {stats['p99_ms']:6.2f} ms")
+        if self.pipeline is not None:
+            dropped = ", ".join(f"{name} {count}" for name, count in self.pipeline.dropped.items())
+            lines.append(f"dropped   {dropped}")
+
+        line_height = self.options.FONT_SIZE + 2
+        backdrop = pygame.Surface((420, line_height * len(lines) + 8), pygame.SRCALPHA)
+        backdrop.fill((0, 0, 0, 180))
+        self.display.blit(backdrop, (0, 0))
+        for i, line in enumerate(lines):
+            self.font.render_to(
+                surf=self.display,
+                dest=(4, 4 + i * line_height),
+                text=line,
+                fgcolor=pygame.Color("#00FF00")
+            )
 
     def quit(self):
-        self.camera.stop()
+        self.telemetry.stop_dump()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.source.stop()
+        if self.recorder is not None:
+            # after the pipeline, the render thread writes the frames
+            self.recorder.close()
+        if self.playback is not None:
+            self.playback.recording.close()
         pygame.quit()
         sys.exit()
 
 
 if __name__ == "__main__":
-    AsciiMain()
+    parser = argparse.ArgumentParser(description="Real time ascii conversion")
+    parser.add_argument("--source", default="camera",
+                        help="camera[:index], synthetic[:pattern], a video file or a directory of images")
+    parser.add_argument("--record", help="record the converted frames to this file")
+    parser.add_argument("--play", help="play a recording instead of converting the source")
+    parser.add_argument("--target-fps", type=float, default=DEFAULT_TARGET_FPS,
+                        help="shrink the grid to hold this frame rate, 0 to keep the full grid")
+    args = parser.parse_args()
+    try:
+        AsciiMain(args.source, record=args.record, play=args.play, target_fps=args.target_fps)
+    except ValueError as e:
+        # e.g. an empty or broken recording
+        parser.error(str(e))
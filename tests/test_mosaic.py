@@ -0,0 +1,28 @@
+"""
+17 October 2026
+
+`test_mosaic.py` This file tests tiling converted frames into a mosaic.
+
+Usage: python -m pytest tests
+"""
+
+import numpy as np
+from ascii_webcam.frame import AsciiFrame
+from ascii_webcam.mosaic import tile_frames
+
+
+def gradient_frame(glyphs: list, shape: tuple = (4, 6)) -> AsciiFrame:
+    """ a frame that uses every glyph of its table, the last one first """
+    indices = (len(glyphs) - 1 - np.arange(np.prod(shape)) % len(glyphs)).reshape(shape)
+    return AsciiFrame(glyphs, indices.astype(np.uint8))
+
+
+def test_tile_frames_with_more_than_256_glyphs():
+    # two gradients of 200 & 100 glyphs, the second one is appended past index 255
+    first = gradient_frame([chr(0x4E00 + i) for i in range(200)])
+    second = gradient_frame([chr(0x4F00 + i) for i in range(100)])
+
+    mosaic = tile_frames([first, second], columns=2, gap=1)
+
+    assert mosaic.indices.dtype == np.uint16
+    assert mosaic.text_rows() == [a + " " + b for a, b in zip(first.text_rows(), second.text_rows())]